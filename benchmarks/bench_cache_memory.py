@@ -0,0 +1,182 @@
+"""
+Memory of cached search result pages.
+
+Fills a cache with --pages pages of --per-page tracks, each page built from
+freshly created strings as after parsing a yt-dlp response, and reports
+the memory the cache keeps (tracemalloc) for:
+
+    dataclass  the previous Track (@dataclass with __dict__) in the
+               previous cache entry dict
+    slots      Track lists as is in (expire_at, value) entries
+    packed     SimpleCache, which stores Track lists with pack_tracks()
+
+plus pack/unpack time per page:
+
+    python -m benchmarks.bench_cache_memory --pages 100000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict
+
+os.environ.setdefault("BOT_TOKEN", "123456:BENCHMARK")
+os.environ.setdefault("LOGS_DIR", os.path.join(tempfile.gettempdir(), "bench_logs"))
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+from src.models import Track, pack_tracks, unpack_tracks  # noqa: E402
+from src.utils.cache import SimpleCache  # noqa: E402
+
+WORDS = (
+    "love night dance heart fire summer dream baby time life world girl light "
+    "rain city star moon road home blue gold wild young free song remix live"
+).split()
+
+
+@dataclass
+class LegacyTrack:
+    """Track as it was before: plain dataclass, duration formatted on access."""
+
+    id: str
+    title: str
+    artist: str = "Unknown"
+    duration: int = 0
+    url: str = ""
+
+
+class PageGenerator:
+    """Deterministic pages of (id, title, artist, duration, url) rows."""
+
+    def __init__(self, per_page: int, artists: int, seed: int):
+        self.per_page = per_page
+        self.artists = artists
+        self.seed = seed
+
+    def pages(self, count: int):
+        rng = random.Random(self.seed)
+        for _ in range(count):
+            rows = []
+            for _ in range(self.per_page):
+                video_id = "".join(rng.choices("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_", k=11))
+                # Popular artists show up far more often (Zipf-like)
+                artist = f"Artist {int(self.artists ** rng.random())}"
+                title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).title()
+                rows.append((video_id, title, artist, rng.randint(90, 420), f"https://youtube.com/watch?v={video_id}"))
+            yield rows
+
+
+def fill_dataclass(pages) -> Any:
+    cache = {}
+    expire_at = datetime.now() + timedelta(seconds=600)
+    for i, rows in enumerate(pages):
+        tracks = [LegacyTrack(id=r[0], title=r[1], artist=r[2], duration=r[3], url=r[4]) for r in rows]
+        cache[f"search:{i}"] = {'data': tracks, 'expire_at': expire_at}
+    return cache
+
+
+def fill_slots(pages) -> Any:
+    cache = {}
+    expire_at = datetime.now() + timedelta(seconds=600)
+    for i, rows in enumerate(pages):
+        tracks = [Track(id=r[0], title=r[1], artist=r[2], duration=r[3], url=r[4]) for r in rows]
+        cache[f"search:{i}"] = (expire_at, tracks)
+    return cache
+
+
+def fill_packed(pages) -> Any:
+    cache = SimpleCache()
+    for i, rows in enumerate(pages):
+        cache.set(f"search:{i}", [Track(id=r[0], title=r[1], artist=r[2], duration=r[3], url=r[4]) for r in rows])
+    return cache
+
+
+VARIANTS: Dict[str, Callable[[Any], Any]] = {
+    "dataclass": fill_dataclass,
+    "slots": fill_slots,
+    "packed": fill_packed,
+}
+
+
+def measure(fill: Callable[[Any], Any], generator: PageGenerator, pages: int) -> Dict[str, float]:
+    """Bytes kept by a filled cache and time to fill it."""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    cache = fill(generator.pages(pages))
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    kept = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del cache
+    gc.collect()
+    return {"bytes": kept, "bytes_per_page": kept / pages, "fill_seconds": elapsed}
+
+
+def codec_timing(generator: PageGenerator, pages: int = 2000) -> Dict[str, float]:
+    """Microseconds to pack and unpack one page."""
+    tracks = [
+        [Track(id=r[0], title=r[1], artist=r[2], duration=r[3], url=r[4]) for r in rows]
+        for rows in generator.pages(pages)
+    ]
+    started = time.perf_counter()
+    packed = [pack_tracks(page) for page in tracks]
+    pack_time = time.perf_counter() - started
+    started = time.perf_counter()
+    for data in packed:
+        unpack_tracks(data)
+    unpack_time = time.perf_counter() - started
+    return {
+        "pack_us": pack_time / pages * 1e6,
+        "unpack_us": unpack_time / pages * 1e6,
+        "packed_page_bytes": sum(len(data) for data in packed) / pages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100_000, help="Cached result pages")
+    parser.add_argument("--per-page", type=int, default=20, help="Tracks per page")
+    parser.add_argument("--artists", type=int, default=5000, help="Distinct artists")
+    parser.add_argument("--only", default="", help="Comma-separated variants to run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    generator = PageGenerator(args.per_page, args.artists, args.seed)
+    names = [name for name in args.only.split(",") if name] or list(VARIANTS)
+    results = {"pages": args.pages, "per_page": args.per_page, "variants": {}}
+    for name in names:
+        print(f"Filling {name}...", file=sys.stderr)
+        results["variants"][name] = measure(VARIANTS[name], generator, args.pages)
+    results["codec"] = codec_timing(generator)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{args.pages} pages x {args.per_page} tracks:")
+    base = results["variants"].get("dataclass", {}).get("bytes")
+    for name, result in results["variants"].items():
+        ratio = f"  {result['bytes'] / base:5.2f}x" if base else ""
+        print(
+            f"  {name:<10} {result['bytes'] / 2 ** 20:9.1f} MiB  "
+            f"{result['bytes_per_page']:8.0f} B/page  fill {result['fill_seconds']:6.1f} s{ratio}"
+        )
+    codec = results["codec"]
+    print(
+        f"Packed page {codec['packed_page_bytes']:.0f} B, "
+        f"pack {codec['pack_us']:.1f} us, unpack {codec['unpack_us']:.1f} us"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Cold-start benchmark: time from launching Python to a bot ready for updates.
+
+Each run starts a fresh interpreter with ``-X importtime`` that imports
+src.main, connects a new database, loads locales and registers routers -
+everything main() does before talking to Telegram. Reported per run: wall
+time of the whole process, the bot's own startup phases
+(src/utils/startup.py) and import time by package. Exits with 1 when
+the median wall time misses --target:
+
+    python -m benchmarks.bench_startup --repeat 10 --target 3.0
+    python -m benchmarks.bench_startup --json > startup.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from benchmarks.webhook_load import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Startup up to the first Telegram API call, run in the child process
+CHILD = """
+import asyncio, json
+from src.utils.startup import startup_timer, HEAVY_MODULES
+import src.main as main
+import sys
+
+async def run():
+    main.ensure_directories()
+    with startup_timer.phase("database"):
+        await main.db.connect()
+    with startup_timer.phase("locales"):
+        from src.locales import init_locales
+        init_locales()
+    with startup_timer.phase("routers"):
+        main.setup_routers()
+    await main.db.disconnect()
+
+asyncio.run(run())
+print(json.dumps({
+    "total": startup_timer.total(),
+    "phases": startup_timer.phases,
+    "heavy_loaded": [name for name in HEAVY_MODULES if name in sys.modules],
+}))
+"""
+
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+\d+ \| \s*(\S+)")
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """Seconds spent importing each package (own time of all its modules)."""
+    result = defaultdict(float)
+    for match in IMPORTTIME.finditer(stderr):
+        self_us, name = match.groups()
+        result[name.split(".")[0]] += int(self_us) / 1e6
+    return dict(result)
+
+
+def run_once(tmp_dir: str) -> Dict[str, Any]:
+    """Start one bot process, return its timings."""
+    env = {
+        **os.environ,
+        "BOT_TOKEN": os.environ.get("BOT_TOKEN", "123456:BENCHMARK"),
+        "DATABASE_PATH": os.path.join(tmp_dir, f"startup_{time.monotonic_ns()}.db"),
+        "LOGS_DIR": os.path.join(tmp_dir, "logs"),
+        "TEMP_DIR": os.path.join(tmp_dir, "temp"),
+        "CACHE_DIR": os.path.join(tmp_dir, "cache"),
+        "LOG_LEVEL": "ERROR",
+    }
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup failed:\n{proc.stderr[-2000:]}")
+    child = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {
+        "wall": wall,
+        "bot": child["total"],
+        "phases": dict(child["phases"]),
+        "heavy_loaded": child["heavy_loaded"],
+        "imports": parse_importtime(proc.stderr),
+    }
+
+
+def summarize(runs: List[Dict[str, Any]], top: int) -> Dict[str, Any]:
+    """Medians over runs."""
+    def median(values):
+        return percentile(values, 50)
+
+    phases = defaultdict(list)
+    imports = defaultdict(list)
+    for run in runs:
+        for name, seconds in run["phases"].items():
+            phases[name].append(seconds)
+        for name, seconds in run["imports"].items():
+            imports[name].append(seconds)
+
+    slowest = sorted(((median(v), name) for name, v in imports.items()), reverse=True)[:top]
+    return {
+        "runs": len(runs),
+        "wall_p50": median([run["wall"] for run in runs]),
+        "wall_p90": percentile([run["wall"] for run in runs], 90),
+        "bot_p50": median([run["bot"] for run in runs]),
+        "phases_p50": {name: median(values) for name, values in phases.items()},
+        "packages_p50": {name: seconds for seconds, name in slowest},
+        "heavy_loaded": sorted({name for run in runs for name in run["heavy_loaded"]}),
+    }
+
+
+def print_summary(summary: Dict[str, Any], target: float):
+    print(f"Cold start over {summary['runs']} runs:")
+    print(f"  process wall  p50 {summary['wall_p50'] * 1000:8.1f} ms   p90 {summary['wall_p90'] * 1000:8.1f} ms")
+    print(f"  bot startup   p50 {summary['bot_p50'] * 1000:8.1f} ms")
+    print("Phases (p50):")
+    for name, seconds in summary["phases_p50"].items():
+        print(f"  {name:<20} {seconds * 1000:8.1f} ms")
+    print("Import time by package (p50):")
+    for name, seconds in summary["packages_p50"].items():
+        print(f"  {name:<40} {seconds * 1000:8.1f} ms")
+    if summary["heavy_loaded"]:
+        print(f"Loaded at startup though deferred: {', '.join(summary['heavy_loaded'])}")
+    status = "OK" if summary["wall_p50"] <= target else "MISSED"
+    print(f"Target {target * 1000:.0f} ms: {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Processes to start")
+    parser.add_argument("--target", type=float, default=3.0, help="Max median wall time, seconds")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as tmp_dir:
+        # Warm-up run: writes bytecode caches, like an image built with compileall
+        run_once(tmp_dir)
+        runs = [run_once(tmp_dir) for _ in range(args.repeat)]
+
+    summary = summarize(runs, args.top)
+    summary["target"] = args.target
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary, args.target)
+    return 0 if summary["wall_p50"] <= args.target else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""
+Synthetic production-like data for database benchmarks.
+
+Creates the bot schema (Database.connect) and fills it with users,
+downloads with Zipfian track popularity and skewed user activity,
+favorites, payments and referrals:
+
+    python -m benchmarks.datagen data/bench.db --users 1000000 --downloads 50000000
+
+Downloads are inserted in time order over ``--days``, as they accumulate in
+production, so rowid order follows downloaded_at. Same seed gives same data.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Iterator, List, Sequence, Tuple
+
+# Settings are read on import of src modules
+os.environ.setdefault("BOT_TOKEN", "123456:BENCHMARK")
+os.environ.setdefault("LOGS_DIR", os.path.join(tempfile.gettempdir(), "bench_logs"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+BATCH_SIZE = 50_000
+LANGUAGES = ("ru", "ru", "ru", "en", "uk", "kk")
+PAYMENT_TYPES = (("premium_7", 49.0), ("premium_30", 149.0), ("premium_365", 990.0))
+PAYMENT_SYSTEMS = ("stars", "yoomoney", "cryptobot")
+
+
+def zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    """Cumulative Zipf weights for random.choices (rank 1 is most popular)."""
+    return list(accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def ts(value: datetime) -> str:
+    """Format timestamp like aiosqlite stores datetime parameters."""
+    return value.isoformat(sep=" ")
+
+
+def batched(rows: Iterator[tuple], size: int = BATCH_SIZE) -> Iterator[List[tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class DataGenerator:
+    """Fills a database with synthetic data."""
+
+    def __init__(
+        self,
+        path: str,
+        users: int,
+        downloads: int,
+        tracks: int = 0,
+        days: int = 365,
+        seed: int = 42,
+        now: datetime = None
+    ):
+        self.path = path
+        self.users = users
+        self.downloads = downloads
+        self.tracks = tracks or max(1000, users // 5)
+        self.days = days
+        self.rng = random.Random(seed)
+        self.now = now or datetime.now().replace(microsecond=0)
+        self.first_user_id = 100_000_000
+        self.user_ids = range(self.first_user_id, self.first_user_id + users)
+        # Few users do most downloads
+        self.user_weights = zipf_weights(users, 0.8)
+        self.track_weights = zipf_weights(self.tracks, 1.1)
+        self.artists = [f"Artist {i}" for i in range(max(100, self.tracks // 8))]
+
+    def track(self, rank: int) -> Tuple[str, str, str, int]:
+        """Track (id, title, artist, duration) by popularity rank."""
+        rng = random.Random(rank)
+        track_id = f"t{rank:010d}"
+        artist = self.artists[int(rng.paretovariate(1.2)) % len(self.artists)]
+        return track_id, f"Song {rank}", artist, rng.randint(90, 420)
+
+    def sample_users(self, k: int) -> List[int]:
+        # Shuffle ranks so heavy users have scattered IDs
+        ranks = self.rng.choices(range(self.users), cum_weights=self.user_weights, k=k)
+        return [self.first_user_id + (rank * 7919) % self.users for rank in ranks]
+
+    def sample_tracks(self, k: int) -> List[int]:
+        return self.rng.choices(range(1, self.tracks + 1), cum_weights=self.track_weights, k=k)
+
+    async def create_schema(self):
+        """Create tables with the bot's own schema and migrations."""
+        from src.database.connection import Database
+
+        database = Database(self.path)
+        await database.connect()
+        await database.disconnect()
+
+    def generate(self, progress: bool = True):
+        """Create schema and insert all data."""
+        started = time.perf_counter()
+        asyncio.run(self.create_schema())
+
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA journal_mode = MEMORY")
+        try:
+            for name, step in (
+                ("users", self._users),
+                ("downloads", self._downloads),
+                ("track_stats", self._track_stats),
+                ("daily_downloads", self._daily_downloads),
+                ("favorites", self._favorites),
+                ("payments", self._payments),
+                ("referrals", self._referrals),
+            ):
+                step_started = time.perf_counter()
+                step(conn)
+                conn.commit()
+                if progress:
+                    count = conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+                    print(f"{name}: {count} rows ({time.perf_counter() - step_started:.1f}s)", file=sys.stderr)
+            conn.execute("ANALYZE")
+            conn.commit()
+        finally:
+            conn.close()
+
+        if progress:
+            print(f"Generated {self.path} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    def _users(self, conn: sqlite3.Connection):
+        rng = self.rng
+        start = self.now - timedelta(days=self.days)
+
+        def rows():
+            for index, user_id in enumerate(self.user_ids):
+                # Sign-ups grow over time
+                created = start + timedelta(seconds=self.days * 86400 * (index / self.users) ** 0.7)
+                last_seen = created + (self.now - created) * rng.random() ** 0.3
+                premium = rng.random() < 0.03
+                premium_until = ts(self.now + timedelta(days=rng.randint(-30, 300))) if premium else None
+                referred_by = None
+                if index > 100 and rng.random() < 0.1:
+                    referred_by = self.first_user_id + rng.randrange(index)
+                reachable = rng.random() >= 0.12
+                yield (
+                    user_id, f"user{user_id}", f"User {index}", int(premium), premium_until,
+                    f"ref{user_id:x}", referred_by, rng.choice((0, 0, 0, 1, 3)),
+                    int(rng.paretovariate(1.5) * 3), int(rng.paretovariate(1.5) * 2),
+                    ts(created), ts(last_seen), rng.choice(LANGUAGES),
+                    int(reachable), None if reachable else ts(last_seen),
+                )
+
+        for batch in batched(rows()):
+            conn.executemany("""
+                INSERT INTO users (id, username, first_name, is_premium, premium_until,
+                    referral_code, referred_by, bonus_downloads, searches, downloads,
+                    created_at, last_seen, language, reachable, blocked_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, batch)
+
+    def _downloads(self, conn: sqlite3.Connection):
+        rng = self.rng
+        start = self.now - timedelta(days=self.days)
+        # Traffic grows over time; weight of day d is proportional to d
+        total_weight = self.days * (self.days + 1) / 2
+        tracks = {}
+
+        def rows():
+            for day in range(self.days):
+                count = round(self.downloads * (day + 1) / total_weight)
+                if not count:
+                    continue
+                seconds = sorted(rng.random() * 86400 for _ in range(count))
+                users = self.sample_users(count)
+                ranks = self.sample_tracks(count)
+                day_start = start + timedelta(days=day)
+                for second, user_id, rank in zip(seconds, users, ranks):
+                    track = tracks.get(rank)
+                    if track is None:
+                        track = tracks[rank] = self.track(rank)
+                    yield (user_id, *track, ts(day_start + timedelta(seconds=second)))
+
+        for batch in batched(rows()):
+            conn.executemany("""
+                INSERT INTO downloads (user_id, track_id, title, artist, duration, downloaded_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, batch)
+
+    def _track_stats(self, conn: sqlite3.Connection):
+        conn.execute("""
+            INSERT OR REPLACE INTO track_stats (track_id, title, artist, download_count, last_downloaded)
+            SELECT track_id, MAX(title), MAX(artist), COUNT(*), MAX(downloaded_at)
+            FROM downloads GROUP BY track_id
+        """)
+
+    def _daily_downloads(self, conn: sqlite3.Connection):
+        today = self.now.date().isoformat()
+        users = set(self.sample_users(max(1, self.users // 20)))
+        conn.executemany(
+            "INSERT OR IGNORE INTO daily_downloads (user_id, download_date, count) VALUES (?, ?, ?)",
+            [(user_id, today, self.rng.randint(1, 10)) for user_id in users]
+        )
+
+    def _favorites(self, conn: sqlite3.Connection):
+        rng = self.rng
+        count = self.users * 3
+
+        def rows():
+            users = self.sample_users(count)
+            ranks = self.sample_tracks(count)
+            for user_id, rank in zip(users, ranks):
+                track_id, title, artist, duration = self.track(rank)
+                added = self.now - timedelta(seconds=rng.random() * self.days * 86400)
+                yield (user_id, track_id, title, artist, duration, ts(added))
+
+        for batch in batched(rows()):
+            conn.executemany("""
+                INSERT OR IGNORE INTO favorites (user_id, track_id, title, artist, duration, added_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, batch)
+
+    def _payments(self, conn: sqlite3.Connection):
+        rng = self.rng
+
+        def rows():
+            for user_id in self.user_ids:
+                if rng.random() >= 0.05:
+                    continue
+                for _ in range(rng.choice((1, 1, 1, 2, 3))):
+                    payment_type, amount = rng.choice(PAYMENT_TYPES)
+                    created = self.now - timedelta(seconds=rng.random() * self.days * 86400)
+                    status = "completed" if rng.random() < 0.9 else "pending"
+                    yield (
+                        user_id, amount, "RUB", payment_type, rng.choice(PAYMENT_SYSTEMS), status,
+                        f"op{user_id}{rng.getrandbits(32):x}", ts(created),
+                        ts(created + timedelta(seconds=30)) if status == "completed" else None,
+                    )
+
+        for batch in batched(rows()):
+            conn.executemany("""
+                INSERT INTO payments (user_id, amount, currency, payment_type, payment_system,
+                    status, external_id, created_at, completed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, batch)
+
+    def _referrals(self, conn: sqlite3.Connection):
+        # Referred users who downloaded are active
+        conn.execute("""
+            INSERT OR IGNORE INTO referrals (referrer_id, referred_id, is_active, created_at)
+            SELECT referred_by, id, downloads > 0, created_at
+            FROM users WHERE referred_by IS NOT NULL
+        """)
+
+    def sample_ids(self, k: int = 100) -> dict:
+        """Sample arguments for benchmarks: user IDs by activity, tracks by popularity."""
+        return {
+            "user_ids": self.sample_users(k),
+            "track_ids": [self.track(rank)[0] for rank in self.sample_tracks(k)],
+            "artists": [self.track(rank)[2] for rank in self.sample_tracks(k)],
+        }
+
+
+def parse_count(value: str) -> int:
+    """Parse counts like 1000, 100k, 1M, 50M."""
+    value = value.strip().lower().replace("_", "")
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    if multiplier > 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+def main(argv: Sequence[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Database file to create")
+    parser.add_argument("--users", type=parse_count, default=10_000)
+    parser.add_argument("--downloads", type=parse_count, default=0, help="Default: 50 per user")
+    parser.add_argument("--tracks", type=parse_count, default=0, help="Catalog size, default: users / 5")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="Overwrite existing file")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.path):
+        if not args.force:
+            parser.error(f"{args.path} exists, use --force to overwrite")
+        os.remove(args.path)
+
+    DataGenerator(
+        args.path,
+        users=args.users,
+        downloads=args.downloads or args.users * 50,
+        tracks=args.tracks,
+        days=args.days,
+        seed=args.seed,
+    ).generate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+"""
+Database scaling benchmark: repository methods and dashboard endpoints.
+
+For every scale a synthetic database is generated (benchmarks.datagen,
+cached in --data-dir) and each repository method and dashboard GET endpoint
+is timed with arguments sampled like production traffic (active users,
+popular tracks). Results go to JSON for comparison between versions:
+
+    python -m benchmarks.db_scaling --scales 10k,100k,1M --output before.json
+    python -m benchmarks.db_scaling --scales 10k,100k,1M --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+# Settings are read on import - configure a throwaway environment first
+_TMP_DIR = tempfile.mkdtemp(prefix="bench_db_")
+os.environ.setdefault("BOT_TOKEN", "123456:BENCHMARK")
+os.environ.setdefault("LOGS_DIR", os.path.join(_TMP_DIR, "logs"))
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+os.environ.setdefault("DATABASE_PATH", os.path.join(_TMP_DIR, "unused.db"))
+
+from benchmarks.datagen import DataGenerator, parse_count  # noqa: E402
+from benchmarks.webhook_load import percentile  # noqa: E402
+
+Case = Tuple[str, Callable[[Dict[str, Any], int], Awaitable[Any]]]
+
+
+def repository_cases() -> List[Case]:
+    """Repository calls to time; each gets sample args and iteration number."""
+    from src.database.repositories import (
+        broadcast_repo, download_repo, entitlements_repo, favorite_repo, stats_repo, user_repo
+    )
+
+    def user(ctx, i):
+        return ctx["user_ids"][i % len(ctx["user_ids"])]
+
+    def track(ctx, i):
+        return ctx["track_ids"][i % len(ctx["track_ids"])]
+
+    def artist(ctx, i):
+        return ctx["artists"][i % len(ctx["artists"])]
+
+    async def entitlements_miss(ctx, i):
+        entitlements_repo.invalidate(user(ctx, i))
+        return await entitlements_repo.get(user(ctx, i))
+
+    async def iter_reachable(ctx, i):
+        count = 0
+        async for _ in user_repo.iter_reachable_user_ids():
+            count += 1
+        return count
+
+    async def broadcast_create(ctx, i):
+        return await broadcast_repo.create(1, 1, 1)
+
+    return [
+        # Users
+        ("user_repo.get_user", lambda ctx, i: user_repo.get_user(user(ctx, i))),
+        ("user_repo.create_user (existing)", lambda ctx, i: user_repo.create_user(user(ctx, i), "u", "U")),
+        ("user_repo.create_user (new)", lambda ctx, i: user_repo.create_user(10 ** 12 + i, "u", "U")),
+        ("user_repo.update_last_seen", lambda ctx, i: user_repo.update_last_seen(user(ctx, i))),
+        ("user_repo.increment_searches", lambda ctx, i: user_repo.increment_searches(user(ctx, i))),
+        ("user_repo.is_premium", lambda ctx, i: user_repo.is_premium(user(ctx, i))),
+        ("user_repo.get_user_count", lambda ctx, i: user_repo.get_user_count()),
+        ("user_repo.get_reachable_count", lambda ctx, i: user_repo.get_reachable_count()),
+        ("user_repo.get_active_users", lambda ctx, i: user_repo.get_active_users(60)),
+        ("user_repo.get_top_users", lambda ctx, i: user_repo.get_top_users(10)),
+        ("user_repo.get_reachability_stats", lambda ctx, i: user_repo.get_reachability_stats()),
+        ("user_repo.get_all_user_ids", lambda ctx, i: user_repo.get_all_user_ids()),
+        ("user_repo.iter_reachable_user_ids", iter_reachable),
+        ("user_repo.get_by_referral_code", lambda ctx, i: user_repo.get_by_referral_code(f"ref{user(ctx, i):x}")),
+        ("user_repo.get_referral_count", lambda ctx, i: user_repo.get_referral_count(user(ctx, i))),
+        ("user_repo.get_active_referral_count", lambda ctx, i: user_repo.get_active_referral_count(user(ctx, i))),
+        ("user_repo.get_stats_summary", lambda ctx, i: user_repo.get_stats_summary()),
+        ("user_repo.payment_exists", lambda ctx, i: user_repo.payment_exists(f"missing{i}")),
+        ("user_repo.get_user_language", lambda ctx, i: user_repo.get_user_language(user(ctx, i))),
+        ("entitlements_repo.get (miss)", entitlements_miss),
+        # Downloads
+        ("download_repo.add_download", lambda ctx, i: download_repo.add_download(
+            user(ctx, i), track(ctx, i), "Song", artist(ctx, i), 200)),
+        ("download_repo.get_user_history", lambda ctx, i: download_repo.get_user_history(user(ctx, i))),
+        ("download_repo.get_today_count", lambda ctx, i: download_repo.get_today_count(user(ctx, i))),
+        ("download_repo.increment_daily_count", lambda ctx, i: download_repo.increment_daily_count(user(ctx, i))),
+        ("download_repo.get_user_download_count", lambda ctx, i: download_repo.get_user_download_count(user(ctx, i))),
+        ("download_repo.get_total_downloads", lambda ctx, i: download_repo.get_total_downloads()),
+        ("download_repo.user_has_downloaded", lambda ctx, i: download_repo.user_has_downloaded(user(ctx, i), track(ctx, i))),
+        ("download_repo.get_user_top_artists", lambda ctx, i: download_repo.get_user_top_artists(user(ctx, i))),
+        ("download_repo.get_user_total_duration", lambda ctx, i: download_repo.get_user_total_duration(user(ctx, i))),
+        # Favorites
+        ("favorite_repo.get_favorites", lambda ctx, i: favorite_repo.get_favorites(user(ctx, i))),
+        ("favorite_repo.is_favorite", lambda ctx, i: favorite_repo.is_favorite(user(ctx, i), track(ctx, i))),
+        ("favorite_repo.get_favorites_count", lambda ctx, i: favorite_repo.get_favorites_count(user(ctx, i))),
+        ("favorite_repo.toggle_favorite", lambda ctx, i: favorite_repo.toggle_favorite(
+            user(ctx, i), track(ctx, i), "Song", artist(ctx, i), 200)),
+        # Charts
+        ("stats_repo.record_download", lambda ctx, i: stats_repo.record_download(track(ctx, i), "Song", artist(ctx, i))),
+        ("stats_repo.get_top_tracks (all)", lambda ctx, i: stats_repo.get_top_tracks(20, "all")),
+        ("stats_repo.get_top_tracks (day)", lambda ctx, i: stats_repo.get_top_tracks(20, "day")),
+        ("stats_repo.get_top_tracks (week)", lambda ctx, i: stats_repo.get_top_tracks(20, "week")),
+        ("stats_repo.get_top_tracks (month)", lambda ctx, i: stats_repo.get_top_tracks(20, "month")),
+        ("stats_repo.get_track_stats", lambda ctx, i: stats_repo.get_track_stats(track(ctx, i))),
+        ("stats_repo.get_recommendations", lambda ctx, i: stats_repo.get_recommendations(user(ctx, i), track(ctx, i))),
+        ("stats_repo.get_total_unique_tracks", lambda ctx, i: stats_repo.get_total_unique_tracks()),
+        ("stats_repo.get_tracks_by_artist", lambda ctx, i: stats_repo.get_tracks_by_artist(artist(ctx, i))),
+        # Broadcasts (copies all reachable users)
+        ("broadcast_repo.create", broadcast_create),
+    ]
+
+
+DASHBOARD_ENDPOINTS = [
+    "/api/stats/overview",
+    "/api/stats/users/growth?days=30",
+    "/api/stats/users/list?page=1",
+    "/api/stats/users/list?page=100",
+    "/api/stats/users/list?search=user1000",
+    "/api/stats/users/{user_id}",
+    "/api/stats/downloads/daily?days=30",
+    "/api/stats/top-tracks?days=7",
+    "/api/stats/top-users?days=30",
+    "/api/stats/hourly",
+    "/api/stats/payments?days=30",
+    "/api/stats/payments/list?page=1",
+    "/api/stats/referrals",
+]
+
+
+async def asgi_get(app, url: str) -> Tuple[int, bytes]:
+    """Call ASGI app with a GET request (no HTTP server, no extra deps)."""
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "headers": [], "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 80), "root_path": "",
+    }
+    status = 0
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(body)
+
+
+def dashboard_cases() -> List[Case]:
+    """Dashboard endpoints (auth dependency overridden)."""
+    try:
+        from dashboard import api as dashboard_api
+        from dashboard.pool import ConnectionPool
+    except ImportError as e:
+        print(f"Dashboard skipped: {e}", file=sys.stderr)
+        return []
+
+    dashboard_api.app.dependency_overrides[dashboard_api.verify_token] = lambda: {"user_id": 0}
+
+    def case(template: str):
+        async def call(ctx, i):
+            if dashboard_api.db_pool.path != ctx["path"]:
+                await dashboard_api.db_pool.close()
+                dashboard_api.db_pool = ConnectionPool(ctx["path"])
+                dashboard_api.stats_snapshot.reset()
+            url = template.format(user_id=ctx["user_ids"][i % len(ctx["user_ids"])])
+            status, body = await asgi_get(dashboard_api.app, url)
+            if status != 200:
+                raise RuntimeError(f"{url} returned {status}: {body[:200]!r}")
+        return (f"dashboard {template}", call)
+
+    return [case(template) for template in DASHBOARD_ENDPOINTS]
+
+
+async def close_dashboard():
+    """Close dashboard connections to the work database."""
+    dashboard_api = sys.modules.get("dashboard.api")
+    if dashboard_api is not None:
+        await dashboard_api.db_pool.close()
+
+
+async def time_cases(
+    cases: List[Case], ctx: Dict[str, Any], repeat: int, budget: float = 10.0
+) -> Dict[str, Dict[str, float]]:
+    """
+    Time each case, return per-case stats in milliseconds.
+
+    A case stops repeating once its runs took more than ``budget`` seconds,
+    so a full scan at large scale doesn't hold up the whole report.
+    """
+    results = {}
+    for name, call in cases:
+        timings = []
+        error = None
+        for i in range(repeat):
+            if sum(timings) > budget:
+                break
+            started = time.perf_counter()
+            try:
+                await call(ctx, i)
+            except Exception as e:
+                error = str(e)
+                break
+            timings.append(time.perf_counter() - started)
+        if error:
+            results[name] = {"error": error}
+            continue
+        results[name] = {
+            "runs": len(timings),
+            "median_ms": percentile(timings, 50) * 1000,
+            "p95_ms": percentile(timings, 95) * 1000,
+            "max_ms": max(timings) * 1000,
+        }
+    return results
+
+
+async def bench_scale(
+    path: str, generator: DataGenerator, repeat: int, budget: float = 10.0, only: str = ""
+) -> Dict[str, Dict[str, float]]:
+    """Run all cases (or those with ``only`` in name) against a copy of generated database."""
+    from src.database import db
+
+    work_path = os.path.join(_TMP_DIR, "work.db")
+    shutil.copyfile(path, work_path)
+    ctx = {"path": work_path, **generator.sample_ids(100)}
+
+    db.db_path = work_path
+    await db.connect()
+    try:
+        cases = [case for case in repository_cases() if only in case[0]]
+        results = await time_cases(cases, ctx, repeat, budget)
+    finally:
+        await db.disconnect()
+    cases = [case for case in dashboard_cases() if only in case[0]]
+    results.update(await time_cases(cases, ctx, repeat, budget))
+    await close_dashboard()
+    os.remove(work_path)
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 1.2):
+    """Print cases that got slower (or faster) than baseline by more than threshold."""
+    for scale, cases in current["scales"].items():
+        base_cases = baseline.get("scales", {}).get(scale, {})
+        for name, stats in cases.items():
+            base = base_cases.get(name)
+            if not base or "median_ms" not in base or "median_ms" not in stats:
+                continue
+            ratio = stats["median_ms"] / max(base["median_ms"], 1e-6)
+            if ratio >= threshold or ratio <= 1 / threshold:
+                mark = "SLOWER" if ratio > 1 else "faster"
+                print(f"{mark:6} {scale:>8} {name}: {base['median_ms']:.2f} -> {stats['median_ms']:.2f} ms (x{ratio:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1k,10k,100k", help="Comma-separated user counts")
+    parser.add_argument("--downloads-per-user", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per case")
+    parser.add_argument("--budget", type=float, default=10.0, help="Max seconds of runs per case")
+    parser.add_argument("--only", default="", help="Run cases whose name contains this text")
+    parser.add_argument("--data-dir", default="data/bench", help="Where generated databases are cached")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to file")
+    parser.add_argument("--compare", help="Baseline JSON to compare medians with")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    report = {
+        "revision": git_revision(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "repeat": args.repeat,
+        "scales": {},
+    }
+
+    for scale in (parse_count(value) for value in args.scales.split(",")):
+        downloads = scale * args.downloads_per_user
+        path = os.path.join(args.data_dir, f"users{scale}_downloads{downloads}_seed{args.seed}.db")
+        generator = DataGenerator(path, users=scale, downloads=downloads, seed=args.seed)
+        if not os.path.exists(path):
+            generator.generate()
+        # Sampling must not depend on whether the file was cached
+        generator.rng.seed(args.seed + 1)
+
+        print(f"Benchmarking {scale} users...", file=sys.stderr)
+        report["scales"][str(scale)] = asyncio.run(
+            bench_scale(path, generator, args.repeat, args.budget, args.only)
+        )
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""
+End-to-end throughput benchmark without network.
+
+Runs the bot's dispatcher with all routers in polling mode against a fake
+Bot API and a temporary database. YouTube search and download are replaced
+by stubs with configurable latency and file size; the load generator
+replays user sessions: /start (first visit), search, sometimes a page
+flip, then a tap on a track that gets downloaded and uploaded.
+
+    python -m benchmarks.e2e_load --sessions 500 --users 200 \\
+        --search-latency 0.8 --download-latency 2.0 --file-size 4000000
+
+Reports updates/s, per-handler p50/p95/p99 and DB calls per update.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+# Settings are read on import - configure a throwaway environment first
+_TMP_DIR = tempfile.mkdtemp(prefix="bench_e2e_")
+os.environ.setdefault("BOT_TOKEN", "123456:BENCHMARK")
+os.environ.setdefault("DATABASE_PATH", os.path.join(_TMP_DIR, "bench.db"))
+os.environ.setdefault("TEMP_DIR", os.path.join(_TMP_DIR, "temp"))
+os.environ.setdefault("LOGS_DIR", os.path.join(_TMP_DIR, "logs"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("FSM_STORAGE", "memory")
+os.environ.setdefault("FREE_DAILY_LIMIT", "1000000")
+os.environ.setdefault("LOOP_MONITOR", "false")
+
+from benchmarks.fake_api import FakeBotAPI, make_callback_update, make_message_update  # noqa: E402
+from benchmarks.webhook_load import ProcessedCounter, percentile  # noqa: E402
+
+QUERIES = [
+    "imagine dragons believer", "the weeknd blinding lights", "miyagi minor",
+    "linkin park numb", "queen bohemian rhapsody", "billie eilish bad guy",
+    "zivert beverly hills", "eminem lose yourself", "dua lipa levitating",
+    "нервы кофе мой друг", "кино группа крови", "morgenshtern cadillac",
+]
+
+
+class StubSearcher:
+    """Replaces YouTubeSearcher.search: fixed latency, deterministic tracks."""
+
+    def __init__(self, latency: float, results: int = 20):
+        self.latency = latency
+        self.results = results
+
+    async def search(self, query: str):
+        from src.models import Track
+
+        await asyncio.sleep(self.latency)
+        base = abs(hash(query)) % 10 ** 8
+        return [
+            Track(
+                id=f"v{base + i:011d}"[-11:],
+                title=f"{query.title()} #{i}",
+                artist=f"Artist {base % 1000}",
+                duration=180 + i,
+                url="",
+            )
+            for i in range(self.results)
+        ]
+
+
+class StubDownloader:
+    """Replaces YouTubeDownloader.download: latency plus a file of given size."""
+
+    def __init__(self, latency: float, file_size: int, temp_dir: str):
+        self.latency = latency
+        self.temp_dir = temp_dir
+        self.payload = os.urandom(min(file_size, 1 << 20))
+        self.file_size = file_size
+
+    async def download(self, video_id: str) -> str:
+        await asyncio.sleep(self.latency)
+        path = os.path.join(self.temp_dir, f"{video_id}_{time.monotonic_ns()}.mp3")
+        await asyncio.to_thread(self._write, path)
+        return path
+
+    def _write(self, path: str):
+        with open(path, "wb") as f:
+            left = self.file_size
+            while left > 0:
+                chunk = self.payload[:left]
+                f.write(chunk)
+                left -= len(chunk)
+
+
+def build_sessions(sessions: int, users: int, page_ratio: float, download_ratio: float, seed: int) -> List[Dict[str, Any]]:
+    """Build updates of user sessions: /start, search, page flip, track tap."""
+    rng = random.Random(seed)
+    updates: List[Dict[str, Any]] = []
+    seen = set()
+    update_id = 0
+
+    def next_id() -> int:
+        nonlocal update_id
+        update_id += 1
+        return update_id
+
+    for _ in range(sessions):
+        user_id = 1000 + rng.randrange(users)
+        if user_id not in seen:
+            seen.add(user_id)
+            updates.append(make_message_update(next_id(), user_id, "/start"))
+        updates.append(make_message_update(next_id(), user_id, rng.choice(QUERIES)))
+        if rng.random() < page_ratio:
+            updates.append(make_callback_update(next_id(), user_id, "page:1"))
+        if rng.random() < download_ratio:
+            updates.append(make_callback_update(next_id(), user_id, f"track:{rng.randint(1, 10)}"))
+
+    return updates
+
+
+class HandlerTimer:
+    """Inner middleware timing each handler (runs only for matched handlers)."""
+
+    def __init__(self):
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+
+    async def __call__(self, handler, event, data):
+        name = data["handler"].callback.__name__
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.timings[name].append(time.perf_counter() - started)
+
+
+def db_call_count() -> int:
+    """Total database calls recorded by metrics."""
+    from src.utils.metrics import DB_QUERY_SECONDS
+
+    return sum(DB_QUERY_SECONDS.labels(op).count for op in ("execute", "executemany", "fetchone", "fetchall"))
+
+
+async def run(args) -> Dict[str, Any]:
+    """Run sessions through polling and collect results."""
+    from aiogram import Bot
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.enums import ParseMode
+
+    from src.bot import dp
+    from src.config import ensure_directories, settings
+    from src.database import db
+    from src.downloaders.youtube_dl import youtube_downloader
+    from src.locales import init_locales
+    from src.main import setup_routers
+    from src.middlewares import user_activity
+    from src.searchers.youtube import youtube_searcher
+    from src.utils.rate_limiter import rate_limiter
+
+    # Handlers import the singletons, so stubbing their methods reaches all of them
+    youtube_searcher.search = StubSearcher(args.search_latency).search
+    youtube_downloader.download = StubDownloader(args.download_latency, args.file_size, settings.TEMP_DIR).download
+    # Sessions of one user come faster than humans type
+    rate_limiter.max_requests = 10 ** 9
+
+    updates = build_sessions(args.sessions, args.users, args.page_ratio, args.download_ratio, args.seed)
+
+    # As main() does before startup: downloads are written to TEMP_DIR
+    ensure_directories()
+    await db.connect()
+    init_locales()
+    setup_routers()
+    user_activity.start()
+
+    counter = ProcessedCounter()
+    timer = HandlerTimer()
+    dp.update.outer_middleware(counter)
+    dp.message.middleware(timer)
+    dp.callback_query.middleware(timer)
+
+    api = FakeBotAPI(latency=args.api_latency)
+    api_url = await api.start()
+    bot = Bot(
+        token=os.environ["BOT_TOKEN"],
+        session=AiohttpSession(api=TelegramAPIServer.from_base(api_url)),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
+
+    try:
+        counter.reset(len(updates))
+        db_calls_before = db_call_count()
+        api.add_updates(updates)
+        started = time.perf_counter()
+        polling = asyncio.create_task(dp.start_polling(
+            bot, polling_timeout=1, handle_signals=False, close_bot_session=False
+        ))
+        await asyncio.wait_for(counter.done.wait(), args.timeout)
+        elapsed = time.perf_counter() - started
+        db_calls = db_call_count() - db_calls_before
+        await dp.stop_polling()
+        await polling
+    finally:
+        await user_activity.stop()
+        await bot.session.close()
+        await api.stop()
+        await db.disconnect()
+
+    handlers = {
+        name: {
+            "count": len(values),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+        }
+        for name, values in sorted(timer.timings.items())
+    }
+    return {
+        "updates": len(updates),
+        "seconds": elapsed,
+        "updates_per_sec": len(updates) / elapsed,
+        "db_calls_per_update": db_calls / len(updates),
+        "handlers": handlers,
+        "api_calls": dict(api.calls),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=300, help="User sessions to replay")
+    parser.add_argument("--users", type=int, default=100, help="Distinct users")
+    parser.add_argument("--page-ratio", type=float, default=0.3, help="Share of sessions flipping a page")
+    parser.add_argument("--download-ratio", type=float, default=0.8, help="Share of sessions downloading a track")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="Stub search delay, seconds")
+    parser.add_argument("--download-latency", type=float, default=0.0, help="Stub download delay, seconds")
+    parser.add_argument("--file-size", type=int, default=100_000, help="Stub MP3 size, bytes")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Fake Bot API delay, seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=600.0, help="Max seconds for the run")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(
+        f"updates: {results['updates']} in {results['seconds']:.1f}s, "
+        f"{results['updates_per_sec']:.1f} updates/s, "
+        f"{results['db_calls_per_update']:.1f} DB calls/update"
+    )
+    for name, values in results["handlers"].items():
+        print(
+            f"  {name}: n={values['count']}, p50={values['p50_ms']:.1f}ms, "
+            f"p95={values['p95_ms']:.1f}ms, p99={values['p99_ms']:.1f}ms"
+        )
+    print(f"api_calls: {results['api_calls']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
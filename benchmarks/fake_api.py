@@ -0,0 +1,166 @@
+"""Minimal fake Telegram Bot API server for local benchmarks."""
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+BOT_USER = {
+    "id": 123456,
+    "is_bot": True,
+    "first_name": "Bench",
+    "username": "bench_bot",
+}
+
+
+class FakeBotAPI:
+    """
+    Answers Bot API methods with plausible results.
+
+    getUpdates serves updates put into the queue; send*/edit* methods return
+    a message for the requested chat; everything else returns True.
+    ``latency`` adds a fixed delay to every call to imitate network round trips.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self._updates: List[Dict[str, Any]] = []
+        self._new_updates = asyncio.Event()
+        self._message_ids = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    def add_updates(self, updates: List[Dict[str, Any]]):
+        """Queue updates for getUpdates."""
+        self._updates.extend(updates)
+        self._new_updates.set()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start server and return its base URL."""
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host=host, port=port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        """Stop server."""
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        params = dict(await request.post())
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method.lower() == "getupdates":
+            result = await self._get_updates(params)
+        else:
+            result = self._result_for(method, params)
+
+        return web.json_response({"ok": True, "result": result})
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        # Confirmed updates are dropped, as Telegram does
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+
+        if not self._updates:
+            self._new_updates.clear()
+            timeout = min(float(params.get("timeout") or 0), 1.0)
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+
+        return self._updates[:limit]
+
+    def _result_for(self, method: str, params: Dict[str, Any]) -> Any:
+        name = method.lower()
+        chat_id = params.get("chat_id", 0)
+        try:
+            chat_id = int(chat_id)
+        except ValueError:
+            pass
+
+        if name == "getme":
+            return BOT_USER
+        if name == "getchat":
+            return {"id": chat_id, "type": "private"}
+        if name == "getchatmember":
+            return {"status": "member", "user": {"id": int(params.get("user_id", 0)), "is_bot": False, "first_name": "U"}}
+        if name == "copymessage":
+            return {"message_id": next(self._message_ids)}
+        if name == "sendmediagroup":
+            return [self._message(chat_id, params)]
+        if (name.startswith("send") and name != "sendchataction") or name.startswith("editmessage"):
+            return self._message(chat_id, params)
+        return True
+
+    def _message(self, chat_id: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": params.get("text") or "",
+        }
+
+
+def make_message_update(update_id: int, user_id: int, text: str) -> Dict[str, Any]:
+    """Build a private text message update."""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private", "first_name": f"user{user_id}"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}", "username": f"user{user_id}"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+            if text.startswith("/") else None,
+        },
+    }
+
+
+def make_callback_update(update_id: int, user_id: int, data: str, message_id: int = 1) -> Dict[str, Any]:
+    """Build an inline button tap on a bot message in a private chat."""
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}", "username": f"user{user_id}"},
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private", "first_name": f"user{user_id}"},
+                "from": BOT_USER,
+                "text": "results",
+            },
+        },
+    }
+
+
+def load_updates(path: str) -> List[Dict[str, Any]]:
+    """Load recorded updates (one JSON object per line), renumbering update_id."""
+    updates = []
+    with open(path, encoding="utf-8") as f:
+        for update_id, line in enumerate(filter(None, map(str.strip, f)), start=1):
+            update = json.loads(line)
+            update["update_id"] = update_id
+            updates.append(update)
+    return updates
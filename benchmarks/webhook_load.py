@@ -0,0 +1,219 @@
+"""
+Webhook vs polling throughput benchmark.
+
+In-process mode runs the bot's dispatcher with all routers against a fake
+Bot API and a temporary database, and feeds the same updates once through
+long polling and once through the webhook server:
+
+    python -m benchmarks.webhook_load --updates 2000 --users 200 --api-latency 0.05
+
+Replay mode posts recorded updates to an already running webhook:
+
+    python -m benchmarks.webhook_load --target http://127.0.0.1:8080/webhook \\
+        --secret $WEBHOOK_SECRET --file updates.jsonl --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import aiohttp
+
+# Settings are read on import - configure a throwaway environment first
+_TMP_DIR = tempfile.mkdtemp(prefix="bench_webhook_")
+os.environ.setdefault("BOT_TOKEN", "123456:BENCHMARK")
+os.environ.setdefault("DATABASE_PATH", os.path.join(_TMP_DIR, "bench.db"))
+os.environ.setdefault("LOGS_DIR", os.path.join(_TMP_DIR, "logs"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("FSM_STORAGE", "memory")
+
+from benchmarks.fake_api import FakeBotAPI, load_updates, make_message_update  # noqa: E402
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Get percentile of values (nearest rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def build_updates(count: int, users: int) -> List[Dict[str, Any]]:
+    """Synthesize /help commands from `users` distinct users."""
+    return [make_message_update(i, 1000 + i % users, "/help") for i in range(1, count + 1)]
+
+
+async def post_updates(
+    url: str,
+    updates: List[Dict[str, Any]],
+    concurrency: int,
+    secret: str = ""
+) -> List[float]:
+    """POST updates to webhook URL, return per-request latencies in seconds."""
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    headers = {SECRET_HEADER: secret} if secret else {}
+
+    async with aiohttp.ClientSession(headers=headers) as session:
+        async def send(update):
+            async with semaphore:
+                started = time.perf_counter()
+                async with session.post(url, json=update) as response:
+                    await response.read()
+                    if response.status != 200:
+                        raise RuntimeError(f"Webhook returned {response.status}")
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(send(update) for update in updates))
+    return latencies
+
+
+class ProcessedCounter:
+    """Outer middleware that signals when all expected updates are handled."""
+
+    def __init__(self):
+        self.expected = 0
+        self.processed = 0
+        self.done = asyncio.Event()
+
+    def reset(self, expected: int):
+        self.expected = expected
+        self.processed = 0
+        self.done.clear()
+
+    async def __call__(self, handler, event, data):
+        try:
+            return await handler(event, data)
+        finally:
+            self.processed += 1
+            if self.processed >= self.expected:
+                self.done.set()
+
+
+async def run_in_process(args) -> Dict[str, Dict[str, float]]:
+    """Feed the same updates via polling and via webhook."""
+    from aiogram import Bot
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.enums import ParseMode
+    from aiohttp import web
+
+    from src.bot import dp
+    from src.database import db
+    from src.locales import init_locales
+    from src.main import setup_routers
+    from src.webhook import create_app
+
+    updates = load_updates(args.file) if args.file else build_updates(args.updates, args.users)
+
+    await db.connect()
+    init_locales()
+    setup_routers()
+    counter = ProcessedCounter()
+    dp.update.outer_middleware(counter)
+
+    api = FakeBotAPI(latency=args.api_latency)
+    api_url = await api.start()
+    bot = Bot(
+        token=os.environ["BOT_TOKEN"],
+        session=AiohttpSession(api=TelegramAPIServer.from_base(api_url)),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
+    results = {}
+
+    try:
+        # Long polling
+        counter.reset(len(updates))
+        api.add_updates(updates)
+        started = time.perf_counter()
+        polling = asyncio.create_task(dp.start_polling(
+            bot, polling_timeout=1, handle_signals=False, close_bot_session=False
+        ))
+        await asyncio.wait_for(counter.done.wait(), args.timeout)
+        elapsed = time.perf_counter() - started
+        await dp.stop_polling()
+        await polling
+        results["polling"] = {"updates_per_sec": len(updates) / elapsed, "seconds": elapsed}
+
+        # Webhook
+        counter.reset(len(updates))
+        app = create_app(bot, dp)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        webhook_url = f"http://127.0.0.1:{port}{os.environ.get('WEBHOOK_PATH', '/webhook')}"
+
+        started = time.perf_counter()
+        latencies = await post_updates(
+            webhook_url, updates, args.concurrency, os.environ.get("WEBHOOK_SECRET", "")
+        )
+        await asyncio.wait_for(counter.done.wait(), args.timeout)
+        elapsed = time.perf_counter() - started
+        await runner.cleanup()
+        results["webhook"] = {
+            "updates_per_sec": len(updates) / elapsed,
+            "seconds": elapsed,
+            "ack_p50_ms": percentile(latencies, 50) * 1000,
+            "ack_p95_ms": percentile(latencies, 95) * 1000,
+            "ack_p99_ms": percentile(latencies, 99) * 1000,
+        }
+    finally:
+        await bot.session.close()
+        await api.stop()
+        await db.disconnect()
+
+    results["api_calls"] = dict(api.calls)
+    return results
+
+
+async def run_replay(args) -> Dict[str, Dict[str, float]]:
+    """Post updates to an external webhook."""
+    updates = load_updates(args.file) if args.file else build_updates(args.updates, args.users)
+    started = time.perf_counter()
+    latencies = await post_updates(args.target, updates, args.concurrency, args.secret)
+    elapsed = time.perf_counter() - started
+    return {"webhook": {
+        "updates_per_sec": len(updates) / elapsed,
+        "seconds": elapsed,
+        "ack_p50_ms": percentile(latencies, 50) * 1000,
+        "ack_p95_ms": percentile(latencies, 95) * 1000,
+        "ack_p99_ms": percentile(latencies, 99) * 1000,
+        "ack_mean_ms": statistics.mean(latencies) * 1000,
+    }}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="Webhook URL of a running bot (replay mode)")
+    parser.add_argument("--secret", default="", help="Webhook secret token")
+    parser.add_argument("--file", help="Recorded updates, one JSON object per line")
+    parser.add_argument("--updates", type=int, default=1000, help="Synthetic updates count")
+    parser.add_argument("--users", type=int, default=100, help="Distinct users in synthetic updates")
+    parser.add_argument("--concurrency", type=int, default=50, help="Parallel webhook requests")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Fake Bot API delay, seconds")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Max seconds per run")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_replay(args) if args.target else run_in_process(args))
+
+    for mode, values in results.items():
+        if mode == "api_calls":
+            print(f"{mode}: {values}")
+            continue
+        formatted = ", ".join(f"{key}={value:.1f}" for key, value in values.items())
+        print(f"{mode}: {formatted}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
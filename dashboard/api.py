@@ -1,9 +1,8 @@
 """Dashboard API for MusicFinder analytics and administration."""
+import asyncio
 import os
 import sys
-import json
 import secrets
-import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, List
@@ -14,9 +13,14 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from fastapi import FastAPI, HTTPException, Depends, Query, Body
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import aiosqlite
+
+from dashboard.events import EventBus, format_sse
+from dashboard.pagination import decode_cursor, iter_batches, keyset_page, stream_csv, stream_ndjson
+from dashboard.pool import ConnectionPool
+from dashboard.stats import StatsSnapshot
+from src.utils.auth_codes import invalidate_session, verify_auth_code, verify_session
 
 app = FastAPI(title="MusicFinder Admin Dashboard API", version="2.0.0")
 
@@ -35,97 +39,31 @@ security = HTTPBearer(auto_error=False)
 # Load from env or use default
 ENV_FILE = os.getenv("ENV_FILE", "/root/uspmusic-bot/.env")
 DATABASE_PATH = os.getenv("DATABASE_PATH", "/root/uspmusic-bot/data/database.db")
-AUTH_CODES_FILE = Path("/root/uspmusic-bot/data/auth_codes.json")
-
-
-# ============== Telegram Auth System ==============
-
-def _load_auth_codes() -> dict:
-    """Load auth codes from file."""
-    try:
-        if AUTH_CODES_FILE.exists():
-            with open(AUTH_CODES_FILE, 'r') as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return {}
-
-
-def _save_auth_codes(codes: dict):
-    """Save auth codes to file."""
-    try:
-        AUTH_CODES_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(AUTH_CODES_FILE, 'w') as f:
-            json.dump(codes, f)
-    except Exception as e:
-        print(f"Error saving auth codes: {e}")
-
-
-def verify_telegram_code(code: str) -> dict:
-    """Verify Telegram auth code and return session token if valid."""
-    codes = _load_auth_codes()
-
-    if code not in codes:
-        return None
+BOT_METRICS_URL = os.getenv("BOT_METRICS_URL", "http://127.0.0.1:9100")
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN", "")
 
-    auth_data = codes[code]
-    current_time = time.time()
+db_pool = ConnectionPool(DATABASE_PATH, size=int(os.getenv("DASHBOARD_DB_POOL_SIZE", "4")))
 
-    # Check if expired
-    if auth_data.get("expires", 0) < current_time:
-        del codes[code]
-        _save_auth_codes(codes)
-        return None
-
-    # Check if already used
-    if auth_data.get("used", False):
-        return None
-
-    # Mark as used
-    codes[code]["used"] = True
-
-    # Generate session token (valid for 24 hours)
-    session_token = secrets.token_urlsafe(48)
-    codes[f"session_{session_token}"] = {
-        "user_id": auth_data["user_id"],
-        "username": auth_data.get("username"),
-        "is_admin": True,
-        "expires": current_time + 86400,  # 24 hours
-        "type": "session"
-    }
-
-    _save_auth_codes(codes)
-
-    return {
-        "user_id": auth_data["user_id"],
-        "username": auth_data.get("username"),
-        "session_token": session_token
-    }
+# Overview stats: new rows are added every STATS_TTL seconds, full recompute every STATS_FULL_TTL
+stats_snapshot = StatsSnapshot(
+    ttl=float(os.getenv("STATS_TTL", "10")),
+    full_ttl=float(os.getenv("STATS_FULL_TTL", "300"))
+)
 
 
-def verify_session_token(token: str) -> dict:
-    """Verify session token."""
-    codes = _load_auth_codes()
-    session_key = f"session_{token}"
+async def _overview_stats():
+    async with db_pool.reader() as db:
+        return await stats_snapshot.get(db)
 
-    if session_key not in codes:
-        return None
 
-    session_data = codes[session_key]
-    current_time = time.time()
+# One poller for all open /api/stream connections, at the snapshot's refresh rate
+event_bus = EventBus(_overview_stats, interval=stats_snapshot.ttl)
 
-    # Check if expired
-    if session_data.get("expires", 0) < current_time:
-        del codes[session_key]
-        _save_auth_codes(codes)
-        return None
+# Comment line sent on idle streams so proxies don't close them
+STREAM_KEEPALIVE = 15
 
-    return {
-        "user_id": session_data["user_id"],
-        "username": session_data.get("username"),
-        "is_admin": session_data.get("is_admin", True)
-    }
 
+# ============== Telegram Auth System ==============
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify session token from Authorization header."""
@@ -133,7 +71,7 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     token = credentials.credentials
-    user_data = verify_session_token(token)
+    user_data = verify_session(token)
 
     if not user_data:
         raise HTTPException(status_code=401, detail="Invalid or expired session")
@@ -141,6 +79,18 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     return user_data
 
 
+def verify_stream_token(
+    token: str = Query(None),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Verify session token from header or ?token= (EventSource can't set headers)."""
+    if credentials:
+        return verify_token(credentials)
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+
+
 # ============== Auth Endpoints ==============
 
 class AuthRequest(BaseModel):
@@ -150,7 +100,7 @@ class AuthRequest(BaseModel):
 @app.post("/api/auth/telegram")
 async def auth_telegram(data: AuthRequest):
     """Authenticate with Telegram code."""
-    result = verify_telegram_code(data.code)
+    result = verify_auth_code(data.code)
 
     if not result:
         raise HTTPException(status_code=401, detail="Invalid or expired code. Get a new code from bot with /web_admin")
@@ -164,19 +114,15 @@ async def auth_telegram(data: AuthRequest):
 
 
 @app.post("/api/auth/logout")
-async def auth_logout(user: dict = Depends(verify_token)):
+async def auth_logout(
+    user: dict = Depends(verify_token),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
     """Logout and invalidate session."""
-    # Session will expire naturally
+    invalidate_session(credentials.credentials)
     return {"success": True}
 
 
-async def get_db():
-    """Get database connection."""
-    db = await aiosqlite.connect(DATABASE_PATH)
-    db.row_factory = aiosqlite.Row
-    return db
-
-
 def read_env_file():
     """Read .env file and return as dict."""
     env_vars = {}
@@ -214,95 +160,37 @@ def write_env_file(env_vars: dict):
 
 @app.get("/api/stats/overview")
 async def get_overview(admin: str = Depends(verify_token)):
-    """Get overview statistics."""
-    db = await get_db()
-    try:
-        today = datetime.now().strftime("%Y-%m-%d")
-        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-
-        # Total users
-        cursor = await db.execute("SELECT COUNT(*) as count FROM users")
-        total_users = (await cursor.fetchone())["count"]
-
-        # Premium users
-        cursor = await db.execute("SELECT COUNT(*) as count FROM users WHERE is_premium = 1")
-        premium_users = (await cursor.fetchone())["count"]
-
-        # Today's new users
-        cursor = await db.execute(
-            "SELECT COUNT(*) as count FROM users WHERE date(created_at) = ?", (today,)
-        )
-        new_users_today = (await cursor.fetchone())["count"]
-
-        # Yesterday's new users (for comparison)
-        cursor = await db.execute(
-            "SELECT COUNT(*) as count FROM users WHERE date(created_at) = ?", (yesterday,)
-        )
-        new_users_yesterday = (await cursor.fetchone())["count"]
-
-        # Total downloads
-        cursor = await db.execute("SELECT COUNT(*) as count FROM downloads")
-        total_downloads = (await cursor.fetchone())["count"]
-
-        # Today's downloads
-        cursor = await db.execute(
-            "SELECT COUNT(*) as count FROM downloads WHERE date(downloaded_at) = ?", (today,)
-        )
-        downloads_today = (await cursor.fetchone())["count"]
-
-        # Yesterday's downloads
-        cursor = await db.execute(
-            "SELECT COUNT(*) as count FROM downloads WHERE date(downloaded_at) = ?", (yesterday,)
-        )
-        downloads_yesterday = (await cursor.fetchone())["count"]
-
-        # Total searches
-        cursor = await db.execute("SELECT SUM(searches) as total FROM users")
-        result = await cursor.fetchone()
-        total_searches = result["total"] or 0
-
-        # Total revenue (payments)
-        cursor = await db.execute("SELECT SUM(amount) as total FROM payments WHERE currency = 'XTR'")
-        result = await cursor.fetchone()
-        total_revenue = result["total"] or 0
-
-        # Today's revenue
-        cursor = await db.execute(
-            "SELECT SUM(amount) as total FROM payments WHERE date(created_at) = ? AND currency = 'XTR'",
-            (today,)
-        )
-        result = await cursor.fetchone()
-        revenue_today = result["total"] or 0
-
-        # Active users (last 7 days)
-        week_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-        cursor = await db.execute(
-            "SELECT COUNT(DISTINCT user_id) as count FROM downloads WHERE date(downloaded_at) >= ?",
-            (week_ago,)
-        )
-        active_users_week = (await cursor.fetchone())["count"]
-
-        # Total referrals (count users with referred_by set)
-        cursor = await db.execute("SELECT COUNT(*) as total FROM users WHERE referred_by IS NOT NULL")
-        result = await cursor.fetchone()
-        total_referrals = result["total"] or 0
-
-        return {
-            "total_users": total_users,
-            "premium_users": premium_users,
-            "new_users_today": new_users_today,
-            "new_users_yesterday": new_users_yesterday,
-            "total_downloads": total_downloads,
-            "downloads_today": downloads_today,
-            "downloads_yesterday": downloads_yesterday,
-            "total_searches": total_searches,
-            "total_revenue": total_revenue,
-            "revenue_today": revenue_today,
-            "active_users_week": active_users_week,
-            "total_referrals": total_referrals
-        }
-    finally:
-        await db.close()
+    """Get overview statistics (cached snapshot, see dashboard/stats.py)."""
+    async with db_pool.reader() as db:
+        return await stats_snapshot.get(db)
+
+
+@app.get("/api/stream")
+async def stream_overview(admin: str = Depends(verify_stream_token)):
+    """
+    Server-Sent Events with overview stats.
+
+    Sends a "snapshot" event with all overview fields, then "delta" events
+    with the change of the fields that moved (new users, downloads,
+    revenue, active users...). Polling is shared by all connections, see
+    dashboard/events.py.
+    """
+    async def events():
+        async with event_bus.subscribe() as queue:
+            yield f"retry: {int(event_bus.interval * 1000)}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(*message)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 # ============== User Statistics ==============
@@ -313,21 +201,18 @@ async def get_users_growth(
     admin: str = Depends(verify_token)
 ):
     """Get user growth over time."""
-    db = await get_db()
-    try:
+    async with db_pool.reader() as db:
         start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
         cursor = await db.execute("""
             SELECT date(created_at) as date, COUNT(*) as count
             FROM users
-            WHERE date(created_at) >= ?
+            WHERE created_at >= ?
             GROUP BY date(created_at)
             ORDER BY date
         """, (start_date,))
 
         rows = await cursor.fetchall()
         return [{"date": row["date"], "count": row["count"]} for row in rows]
-    finally:
-        await db.close()
 
 
 @app.get("/api/stats/users/list")
@@ -336,12 +221,22 @@ async def get_users_list(
     limit: int = Query(50, ge=1, le=200),
     search: str = Query(None),
     filter_type: str = Query(None),  # premium, free, active, inactive
+    after: Optional[str] = Query(None, alias="cursor"),
     admin: str = Depends(verify_token)
 ):
-    """Get paginated users list."""
-    db = await get_db()
+    """
+    Get paginated users list, newest first.
+
+    Pass next_cursor of a response as cursor to get the next page; page
+    (OFFSET) is kept for old clients and gets slower the deeper it goes.
+    """
     try:
-        offset = (page - 1) * limit
+        position = decode_cursor(after) if after else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    async with db_pool.reader() as db:
+        offset = (page - 1) * limit if position is None else 0
         conditions = []
         params = []
 
@@ -356,11 +251,17 @@ async def get_users_list(
 
         where_clause = " AND ".join(conditions) if conditions else "1=1"
 
-        # Get total count
-        cursor = await db.execute(f"""
-            SELECT COUNT(*) as count FROM users u WHERE {where_clause}
-        """, params)
-        total = (await cursor.fetchone())["count"]
+        result = {}
+        if position is None:
+            # Get total count, once per listing rather than per page
+            cursor = await db.execute(f"""
+                SELECT COUNT(*) as count FROM users u WHERE {where_clause}
+            """, params)
+            total = (await cursor.fetchone())["count"]
+            result = {"total": total, "page": page, "pages": (total + limit - 1) // limit}
+        else:
+            where_clause += " AND (u.created_at, u.id) < (?, ?)"
+            params.extend(position)
 
         # Get users with stats
         cursor = await db.execute(f"""
@@ -380,25 +281,18 @@ async def get_users_list(
                 u.last_seen as last_download
             FROM users u
             WHERE {where_clause}
-            ORDER BY u.created_at DESC
+            ORDER BY u.created_at DESC, u.id DESC
             LIMIT ? OFFSET ?
-        """, params + [limit, offset])
+        """, params + [limit + 1, offset])
 
-        rows = await cursor.fetchall()
+        rows, next_cursor = keyset_page(await cursor.fetchall(), limit, ("created_at", "telegram_id"))
         users = []
         for row in rows:
             user = dict(row)
             user["is_premium"] = bool(user["is_premium"])
             users.append(user)
 
-        return {
-            "users": users,
-            "total": total,
-            "page": page,
-            "pages": (total + limit - 1) // limit
-        }
-    finally:
-        await db.close()
+        return {"users": users, "next_cursor": next_cursor, **result}
 
 
 @app.get("/api/stats/users/{telegram_id}")
@@ -407,8 +301,7 @@ async def get_user_detail(
     admin: str = Depends(verify_token)
 ):
     """Get detailed user info."""
-    db = await get_db()
-    try:
+    async with db_pool.reader() as db:
         # User info
         cursor = await db.execute("""
             SELECT id as telegram_id, username, first_name, is_premium, premium_until,
@@ -427,7 +320,7 @@ async def get_user_detail(
 
         # Downloads history
         cursor = await db.execute("""
-            SELECT video_id, title, artist, downloaded_at
+            SELECT track_id as video_id, title, artist, downloaded_at
             FROM downloads
             WHERE user_id = ?
             ORDER BY downloaded_at DESC
@@ -439,7 +332,7 @@ async def get_user_detail(
         favorites = []
         try:
             cursor = await db.execute("""
-                SELECT video_id, title, artist, added_at
+                SELECT track_id as video_id, title, artist, added_at
                 FROM favorites
                 WHERE user_id = ?
                 ORDER BY added_at DESC
@@ -477,8 +370,6 @@ async def get_user_detail(
             "payments": payments,
             "referrals": referrals
         }
-    finally:
-        await db.close()
 
 
 # ============== Downloads Statistics ==============
@@ -489,21 +380,18 @@ async def get_downloads_daily(
     admin: str = Depends(verify_token)
 ):
     """Get daily downloads."""
-    db = await get_db()
-    try:
+    async with db_pool.reader() as db:
         start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
         cursor = await db.execute("""
             SELECT date(downloaded_at) as date, COUNT(*) as count
             FROM downloads
-            WHERE date(downloaded_at) >= ?
+            WHERE downloaded_at >= ?
             GROUP BY date(downloaded_at)
             ORDER BY date
         """, (start_date,))
 
         rows = await cursor.fetchall()
         return [{"date": row["date"], "count": row["count"]} for row in rows]
-    finally:
-        await db.close()
 
 
 @app.get("/api/stats/top-tracks")
@@ -513,30 +401,29 @@ async def get_top_tracks(
     admin: str = Depends(verify_token)
 ):
     """Get top downloaded tracks."""
-    db = await get_db()
-    try:
+    async with db_pool.reader() as db:
         params = []
         where_clause = ""
 
         if days:
             start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-            where_clause = "WHERE date(downloaded_at) >= ?"
+            # Closed range: with a lower bound only the planner walks the
+            # whole track_id index to get groups in order
+            where_clause = "WHERE downloaded_at >= ? AND downloaded_at < date('now', '+1 day')"
             params.append(start_date)
 
         cursor = await db.execute(f"""
-            SELECT video_id, title, artist, COUNT(*) as downloads,
+            SELECT track_id as video_id, title, artist, COUNT(*) as downloads,
                    MAX(downloaded_at) as last_download
             FROM downloads
             {where_clause}
-            GROUP BY video_id
+            GROUP BY track_id
             ORDER BY downloads DESC
             LIMIT ?
         """, params + [limit])
 
         rows = await cursor.fetchall()
         return [dict(row) for row in rows]
-    finally:
-        await db.close()
 
 
 @app.get("/api/stats/top-users")
@@ -545,8 +432,7 @@ async def get_top_users(
     admin: str = Depends(verify_token)
 ):
     """Get most active users."""
-    db = await get_db()
-    try:
+    async with db_pool.reader() as db:
         cursor = await db.execute("""
             SELECT u.id as telegram_id, u.username, u.first_name, u.is_premium,
                    u.downloads, u.searches
@@ -562,27 +448,22 @@ async def get_top_users(
             user["is_premium"] = bool(user["is_premium"])
             result.append(user)
         return result
-    finally:
-        await db.close()
 
 
 @app.get("/api/stats/hourly")
 async def get_hourly_activity(admin: str = Depends(verify_token)):
     """Get hourly activity distribution."""
-    db = await get_db()
-    try:
+    async with db_pool.reader() as db:
         cursor = await db.execute("""
             SELECT strftime('%H', downloaded_at) as hour, COUNT(*) as count
             FROM downloads
-            WHERE date(downloaded_at) >= date('now', '-7 days')
+            WHERE downloaded_at >= date('now', '-7 days')
             GROUP BY hour
             ORDER BY hour
         """)
 
         rows = await cursor.fetchall()
         return [{"hour": int(row["hour"]), "count": row["count"]} for row in rows]
-    finally:
-        await db.close()
 
 
 # ============== Payments Statistics ==============
@@ -593,8 +474,7 @@ async def get_payments(
     admin: str = Depends(verify_token)
 ):
     """Get payment statistics."""
-    db = await get_db()
-    try:
+    async with db_pool.reader() as db:
         start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
         cursor = await db.execute("""
             SELECT date(created_at) as date,
@@ -602,49 +482,55 @@ async def get_payments(
                    COUNT(*) as count,
                    payment_type
             FROM payments
-            WHERE date(created_at) >= ?
+            WHERE created_at >= ?
             GROUP BY date(created_at), payment_type
             ORDER BY date
         """, (start_date,))
 
         rows = await cursor.fetchall()
         return [dict(row) for row in rows]
-    finally:
-        await db.close()
 
 
 @app.get("/api/stats/payments/list")
 async def get_payments_list(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=200),
+    after: Optional[str] = Query(None, alias="cursor"),
     admin: str = Depends(verify_token)
 ):
-    """Get paginated payments list."""
-    db = await get_db()
+    """Get paginated payments list, newest first; see get_users_list() for cursor."""
     try:
-        offset = (page - 1) * limit
+        position = decode_cursor(after) if after else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-        cursor = await db.execute("SELECT COUNT(*) as count FROM payments")
-        total = (await cursor.fetchone())["count"]
+    async with db_pool.reader() as db:
+        offset = (page - 1) * limit if position is None else 0
+        where_clause = "1=1"
+        params = []
 
-        cursor = await db.execute("""
+        result = {}
+        if position is None:
+            cursor = await db.execute("SELECT COUNT(*) as count FROM payments")
+            total = (await cursor.fetchone())["count"]
+            result = {"total": total, "page": page, "pages": (total + limit - 1) // limit}
+        else:
+            where_clause = "(p.created_at, p.id) < (?, ?)"
+            params.extend(position)
+
+        cursor = await db.execute(f"""
             SELECT p.*, u.username, u.first_name
             FROM payments p
             LEFT JOIN users u ON p.user_id = u.id
-            ORDER BY p.created_at DESC
+            WHERE {where_clause}
+            ORDER BY p.created_at DESC, p.id DESC
             LIMIT ? OFFSET ?
-        """, (limit, offset))
+        """, params + [limit + 1, offset])
 
-        payments = [dict(row) for row in await cursor.fetchall()]
+        rows, next_cursor = keyset_page(await cursor.fetchall(), limit, ("created_at", "id"))
+        payments = [dict(row) for row in rows]
 
-        return {
-            "payments": payments,
-            "total": total,
-            "page": page,
-            "pages": (total + limit - 1) // limit
-        }
-    finally:
-        await db.close()
+        return {"payments": payments, "next_cursor": next_cursor, **result}
 
 
 # ============== Referrals Statistics ==============
@@ -652,8 +538,7 @@ async def get_payments_list(
 @app.get("/api/stats/referrals")
 async def get_referrals_stats(admin: str = Depends(verify_token)):
     """Get referral statistics."""
-    db = await get_db()
-    try:
+    async with db_pool.reader() as db:
         # Top referrers
         cursor = await db.execute("""
             SELECT u.id as telegram_id, u.username, u.first_name,
@@ -670,7 +555,7 @@ async def get_referrals_stats(admin: str = Depends(verify_token)):
             SELECT date(created_at) as date, COUNT(*) as count
             FROM users
             WHERE referred_by IS NOT NULL
-            AND date(created_at) >= date('now', '-30 days')
+            AND created_at >= date('now', '-30 days')
             GROUP BY date(created_at)
             ORDER BY date
         """)
@@ -692,8 +577,6 @@ async def get_referrals_stats(admin: str = Depends(verify_token)):
             "total_referred": stats["total_referred"],
             "total_referrers": stats["total_referrers"]
         }
-    finally:
-        await db.close()
 
 
 # ============== API Keys Management ==============
@@ -701,8 +584,7 @@ async def get_referrals_stats(admin: str = Depends(verify_token)):
 @app.get("/api/keys/list")
 async def get_api_keys(admin: str = Depends(verify_token)):
     """Get all API keys with statistics."""
-    db = await get_db()
-    try:
+    async with db_pool.reader() as db:
         # Read current keys from .env
         env_vars = read_env_file()
         api_keys_str = env_vars.get("API_KEYS", "")
@@ -740,8 +622,6 @@ async def get_api_keys(admin: str = Depends(verify_token)):
                 key["last_request"] = None
 
         return {"keys": keys}
-    finally:
-        await db.close()
 
 
 class ApiKeyCreate(BaseModel):
@@ -800,23 +680,81 @@ async def delete_api_key(name: str, admin: str = Depends(verify_token)):
 async def get_api_key_requests(
     name: str,
     limit: int = Query(100, ge=1, le=500),
+    after: Optional[str] = Query(None, alias="cursor"),
     admin: str = Depends(verify_token)
 ):
-    """Get API key request history."""
-    db = await get_db()
+    """Get API key request history, newest first; see get_users_list() for cursor."""
     try:
-        cursor = await db.execute("""
-            SELECT * FROM api_requests
-            WHERE api_key_name = ?
-            ORDER BY created_at DESC
-            LIMIT ?
-        """, (name, limit))
-        requests = [dict(row) for row in await cursor.fetchall()]
-        return {"requests": requests}
-    except:
-        return {"requests": [], "error": "API requests table not found"}
-    finally:
-        await db.close()
+        position = decode_cursor(after) if after else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    async with db_pool.reader() as db:
+        where_clause = "api_key_name = ?"
+        params = [name]
+        if position is not None:
+            where_clause += " AND (created_at, id) < (?, ?)"
+            params.extend(position)
+        try:
+            cursor = await db.execute(f"""
+                SELECT * FROM api_requests
+                WHERE {where_clause}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            """, params + [limit + 1])
+            rows, next_cursor = keyset_page(await cursor.fetchall(), limit, ("created_at", "id"))
+            return {"requests": [dict(row) for row in rows], "next_cursor": next_cursor}
+        except:
+            return {"requests": [], "next_cursor": None, "error": "API requests table not found"}
+
+
+# ============== Export ==============
+
+# Columns written by /api/export/{table}, in file order
+EXPORT_COLUMNS = {
+    "users": (
+        "id", "username", "first_name", "is_premium", "premium_until",
+        "referred_by", "searches", "downloads", "bonus_downloads",
+        "language", "reachable", "created_at", "last_seen"
+    ),
+    "downloads": ("id", "user_id", "track_id", "title", "artist", "duration", "downloaded_at"),
+    "payments": (
+        "id", "user_id", "amount", "currency", "payment_type",
+        "payment_system", "status", "external_id", "created_at", "completed_at"
+    ),
+}
+
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv; charset=utf-8"),
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+}
+
+
+@app.get("/api/export/{table}")
+async def export_table(
+    table: str,
+    format: str = Query("csv"),
+    admin: str = Depends(verify_token)
+):
+    """
+    Download a whole table as CSV or NDJSON.
+
+    Rows are read in id order in keyset batches and sent as they are read,
+    so the export never holds more than one batch in memory.
+    """
+    if table not in EXPORT_COLUMNS:
+        raise HTTPException(status_code=404, detail="Unknown table")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Format must be csv or ndjson")
+
+    columns = EXPORT_COLUMNS[table]
+    encode, media_type = EXPORT_FORMATS[format]
+    filename = f"{table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        encode(iter_batches(db_pool, table, columns), columns),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 # ============== Environment Configuration ==============
@@ -874,8 +812,7 @@ class UserPremiumUpdate(BaseModel):
 @app.post("/api/users/set-premium")
 async def set_user_premium(data: UserPremiumUpdate, admin: str = Depends(verify_token)):
     """Set user premium status."""
-    db = await get_db()
-    try:
+    async with db_pool.writer() as db:
         if data.is_premium:
             premium_until = datetime.now() + timedelta(days=data.days)
             await db.execute("""
@@ -888,10 +825,7 @@ async def set_user_premium(data: UserPremiumUpdate, admin: str = Depends(verify_
                 WHERE id = ?
             """, (data.telegram_id,))
 
-        await db.commit()
         return {"success": True, "telegram_id": data.telegram_id}
-    finally:
-        await db.close()
 
 
 class UserBonusUpdate(BaseModel):
@@ -902,16 +836,12 @@ class UserBonusUpdate(BaseModel):
 @app.post("/api/users/set-bonus")
 async def set_user_bonus(data: UserBonusUpdate, admin: str = Depends(verify_token)):
     """Set user bonus downloads."""
-    db = await get_db()
-    try:
+    async with db_pool.writer() as db:
         await db.execute("""
             UPDATE users SET bonus_downloads = ?
             WHERE id = ?
         """, (data.bonus_downloads, data.telegram_id))
-        await db.commit()
         return {"success": True, "telegram_id": data.telegram_id}
-    finally:
-        await db.close()
 
 
 # ============== System Info ==============
@@ -932,6 +862,38 @@ async def get_system_info(admin: str = Depends(verify_token)):
     }
 
 
+@app.get("/api/system/profile")
+async def get_bot_profile(
+    seconds: int = Query(10, ge=1, le=120),
+    admin: str = Depends(verify_token)
+):
+    """Profile the running bot, return collapsed stacks (flamegraph input)."""
+    import asyncio
+    import urllib.error
+    import urllib.request
+
+    if not DEBUG_TOKEN:
+        raise HTTPException(status_code=503, detail="DEBUG_TOKEN is not configured")
+
+    def fetch() -> str:
+        request = urllib.request.Request(
+            f"{BOT_METRICS_URL}/debug/profile?seconds={seconds}",
+            headers={"X-Debug-Token": DEBUG_TOKEN}
+        )
+        with urllib.request.urlopen(request, timeout=seconds + 30) as response:
+            return response.read().decode()
+
+    try:
+        text = await asyncio.to_thread(fetch)
+    except urllib.error.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Bot profiler error: {e.code} {e.reason}")
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Bot is unreachable: {e}")
+
+    filename = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed.txt"
+    return PlainTextResponse(text, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint (no auth required)."""
@@ -942,32 +904,40 @@ async def health_check():
 
 async def init_db():
     """Initialize additional database tables."""
-    db = await get_db()
     try:
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS api_requests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                api_key_name TEXT NOT NULL,
-                endpoint TEXT,
-                query TEXT,
-                target_chat_id TEXT,
-                success INTEGER DEFAULT 1,
-                error TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        await db.commit()
+        async with db_pool.writer() as db:
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS api_requests (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    api_key_name TEXT NOT NULL,
+                    endpoint TEXT,
+                    query TEXT,
+                    target_chat_id TEXT,
+                    success INTEGER DEFAULT 1,
+                    error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_api_requests_key_created
+                ON api_requests(api_key_name, created_at)
+            """)
     except Exception as e:
         print(f"Error initializing db: {e}")
-    finally:
-        await db.close()
 
 
 @app.on_event("startup")
 async def startup():
+    await db_pool.open()
     await init_db()
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    await event_bus.stop()
+    await db_pool.close()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8085)
@@ -0,0 +1,111 @@
+"""Live overview updates pushed to open dashboards."""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+QUEUE_SIZE = 100
+
+
+def format_sse(event_id: int, event: str, data: dict) -> str:
+    """Encode one Server-Sent Events message."""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class EventBus:
+    """
+    Fan-out of overview changes to all connected dashboards.
+
+    A single poller calls ``source`` every ``interval`` seconds while at
+    least one client is subscribed - with the dashboard that is the stats
+    snapshot, which tails new rows by id - and publishes what changed since
+    the previous poll as a "delta" event. New subscribers first get the
+    latest stats as a "snapshot" event. So the database is read once per
+    interval however many dashboards are open, and not at all when none are.
+
+    Each subscriber has a bounded queue. Deltas only add up with every one
+    of them applied, so when a client falls behind its queue is emptied
+    and replaced by a snapshot of the current stats instead of growing.
+    """
+
+    def __init__(
+        self,
+        source: Callable[[], Awaitable[Dict[str, float]]],
+        interval: float = 10.0,
+        queue_size: int = QUEUE_SIZE
+    ):
+        self.source = source
+        self.interval = interval
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._stats: Optional[Dict[str, float]] = None
+        self._event_id = 0
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        """Queue of (id, event, data) tuples, starts the poller if needed."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._stats is not None:
+            queue.put_nowait((self._event_id, "snapshot", dict(self._stats)))
+        self._subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers:
+                await self.stop()
+
+    async def stop(self):
+        """Stop the poller; the next subscriber starts from a fresh snapshot."""
+        task, self._task = self._task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._stats = None
+
+    def publish(self, event: str, data: dict):
+        """Send an event to every subscriber, resyncing those that fell behind."""
+        self._event_id += 1
+        message = (self._event_id, event, data)
+        for queue in self._subscribers:
+            if queue.full():
+                while not queue.empty():
+                    queue.get_nowait()
+                # Stats already include this event
+                if self._stats is not None:
+                    queue.put_nowait((self._event_id, "snapshot", dict(self._stats)))
+                    continue
+            queue.put_nowait(message)
+
+    async def poll(self):
+        """Read the source once and publish the snapshot or the changes."""
+        stats = dict(await self.source())
+        previous, self._stats = self._stats, stats
+        if previous is None:
+            self.publish("snapshot", dict(stats))
+            return
+        delta = {
+            key: value - previous.get(key, 0)
+            for key, value in stats.items()
+            if value != previous.get(key)
+        }
+        if delta:
+            self.publish("delta", delta)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                print(f"Error polling stats: {e}")
+            await asyncio.sleep(self.interval)
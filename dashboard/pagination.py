@@ -0,0 +1,95 @@
+"""Keyset pagination and streaming export for dashboard lists."""
+import base64
+import csv
+import io
+import json
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from dashboard.pool import ConnectionPool
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Opaque cursor for the sort key of the last row on a page."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int = 2) -> list:
+    """Sort key from a cursor, ValueError if it was not made by encode_cursor()."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_page(rows: list, limit: int, key: Sequence[str]) -> Tuple[list, Optional[str]]:
+    """
+    Split limit + 1 fetched rows into the page and the cursor for the next one.
+
+    Fetching one extra row tells whether there is a next page without a
+    COUNT(*) over the rest of the table.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1][column] for column in key])
+
+
+async def iter_batches(
+    pool: ConnectionPool,
+    table: str,
+    columns: Sequence[str],
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[List[tuple]]:
+    """
+    Yield all rows of a table in id order, batch_size rows at a time.
+
+    Every batch is a separate keyset query (id > last id) on a borrowed
+    reader, so memory stays bounded by one batch, a slow client doesn't hold
+    a pool connection or an open read transaction between batches, and the
+    cost per batch doesn't grow with the position in the table.
+    """
+    query = (
+        f"SELECT {', '.join(columns)} FROM {table} "
+        f"WHERE id > ? ORDER BY id LIMIT ?"
+    )
+    id_index = list(columns).index("id")
+    last_id = -1
+    while True:
+        async with pool.reader() as db:
+            cursor = await db.execute(query, (last_id, batch_size))
+            rows = [tuple(row) for row in await cursor.fetchall()]
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1][id_index]
+
+
+async def stream_csv(batches: AsyncIterator[List[tuple]], columns: Sequence[str]) -> AsyncIterator[str]:
+    """Encode batches as CSV with a header row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+async def stream_ndjson(batches: AsyncIterator[List[tuple]], columns: Sequence[str]) -> AsyncIterator[str]:
+    """Encode batches as one JSON object per line."""
+    async for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n"
+            for row in rows
+        )
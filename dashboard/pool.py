@@ -0,0 +1,97 @@
+"""Shared SQLite connections for the dashboard API."""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+import aiosqlite
+
+BUSY_TIMEOUT_MS = 5000
+
+
+class ConnectionPool:
+    """
+    Read-only connections shared across requests plus a single writer.
+
+    Connections are opened on first use (or by open() at startup) and kept
+    until close(), so a request no longer pays for a new thread and file
+    open. The database is switched to WAL, where readers don't block the
+    bot's writes and see a consistent snapshot per statement. Readers are
+    opened with mode=ro and query_only, so a stray write in a read endpoint
+    fails instead of competing with the bot for the write lock.
+    """
+
+    def __init__(self, path: str, size: int = 4):
+        self.path = path
+        self.size = size
+        self._readers: Optional[asyncio.Queue] = None
+        self._connections: List[aiosqlite.Connection] = []
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._writer_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._readers is not None
+
+    async def _connect(self, read_only: bool) -> aiosqlite.Connection:
+        if read_only:
+            conn = await aiosqlite.connect(f"file:{self.path}?mode=ro", uri=True)
+            await conn.execute_fetchall("PRAGMA query_only = ON")
+        else:
+            conn = await aiosqlite.connect(self.path)
+        await conn.execute_fetchall(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.row_factory = aiosqlite.Row
+        return conn
+
+    async def open(self):
+        """Open writer and reader connections."""
+        async with self._open_lock:
+            if self.is_open:
+                return
+            self._writer = await self._connect(read_only=False)
+            # Persistent per database file, readers need it before they connect
+            await self._writer.execute_fetchall("PRAGMA journal_mode = WAL")
+            readers: asyncio.Queue = asyncio.Queue()
+            for _ in range(self.size):
+                conn = await self._connect(read_only=True)
+                self._connections.append(conn)
+                readers.put_nowait(conn)
+            self._readers = readers
+
+    async def close(self):
+        """Close all connections."""
+        async with self._open_lock:
+            for conn in self._connections:
+                await conn.close()
+            if self._writer is not None:
+                await self._writer.close()
+            self._connections = []
+            self._writer = None
+            self._readers = None
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection, waits while all are busy."""
+        if not self.is_open:
+            await self.open()
+        readers = self._readers
+        conn = await readers.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                await conn.rollback()
+            readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Use the writer connection; commits on success, rolls back on error."""
+        if not self.is_open:
+            await self.open()
+        async with self._writer_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            await self._writer.commit()
@@ -0,0 +1,163 @@
+"""Cached overview statistics for the dashboard homepage."""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Set
+
+import aiosqlite
+
+
+def day_range(day: datetime) -> tuple:
+    """
+    Half-open range [day, next day) for filtering timestamp columns.
+
+    Timestamps are stored as "YYYY-MM-DD HH:MM:SS" text, so comparing the
+    column itself with date strings uses its index; date(column) = ? has to
+    compute date() for every row.
+    """
+    return day.strftime("%Y-%m-%d"), (day + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+class StatsSnapshot:
+    """
+    Overview aggregates computed once and shared by all page loads.
+
+    A full recompute (one pass over users, one statement for downloads and
+    payments) runs every ``full_ttl`` seconds and when the day changes. In
+    between, every ``ttl`` seconds only rows added since the last refresh
+    are read - downloads and payments by id, users by created_at - and
+    added to the totals and today's counters. Premium users, searches and
+    weekly active users change in place, so they refresh with the full
+    recompute only.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 10.0,
+        full_ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+        now: Callable[[], datetime] = datetime.now
+    ):
+        self.ttl = ttl
+        self.full_ttl = full_ttl
+        self._clock = clock
+        self._now = now
+        self._lock = asyncio.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop the snapshot, next get() recomputes everything."""
+        self._stats: Optional[Dict[str, float]] = None
+        self._day = ""
+        self._refreshed_at = 0.0
+        self._computed_at = 0.0
+        # High-water marks for incremental refresh
+        self._last_download_id = 0
+        self._last_payment_id = 0
+        self._last_user_created = ""
+        # Users created exactly at _last_user_created, already counted
+        self._edge_user_ids: Set[int] = set()
+
+    async def get(self, db: aiosqlite.Connection) -> Dict[str, float]:
+        """Get overview stats, refreshing the snapshot if stale."""
+        async with self._lock:
+            now = self._clock()
+            day = self._now().strftime("%Y-%m-%d")
+            if self._stats is None or day != self._day or now - self._computed_at >= self.full_ttl:
+                await self._compute(db)
+                self._day = day
+                self._computed_at = self._refreshed_at = now
+            elif now - self._refreshed_at >= self.ttl:
+                await self._refresh(db)
+                self._refreshed_at = now
+            return dict(self._stats)
+
+    async def _compute(self, db: aiosqlite.Connection):
+        today = day_range(self._now())
+        yesterday = day_range(self._now() - timedelta(days=1))
+        week_ago = (self._now() - timedelta(days=7)).strftime("%Y-%m-%d")
+
+        cursor = await db.execute("""
+            SELECT
+                COUNT(*) as total_users,
+                COALESCE(SUM(is_premium = 1), 0) as premium_users,
+                COALESCE(SUM(searches), 0) as total_searches,
+                COUNT(referred_by) as total_referrals,
+                COALESCE(SUM(created_at >= ? AND created_at < ?), 0) as new_users_today,
+                COALESCE(SUM(created_at >= ? AND created_at < ?), 0) as new_users_yesterday,
+                MAX(created_at) as last_created
+            FROM users
+        """, today + yesterday)
+        users = dict(await cursor.fetchone())
+
+        cursor = await db.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM downloads) as total_downloads,
+                (SELECT COUNT(*) FROM downloads
+                 WHERE downloaded_at >= ? AND downloaded_at < ?) as downloads_today,
+                (SELECT COUNT(*) FROM downloads
+                 WHERE downloaded_at >= ? AND downloaded_at < ?) as downloads_yesterday,
+                (SELECT COUNT(DISTINCT user_id) FROM downloads
+                 WHERE downloaded_at >= ?) as active_users_week,
+                (SELECT COALESCE(MAX(id), 0) FROM downloads) as last_download_id,
+                (SELECT COALESCE(SUM(amount), 0) FROM payments WHERE currency = 'XTR') as total_revenue,
+                (SELECT COALESCE(SUM(amount), 0) FROM payments
+                 WHERE created_at >= ? AND created_at < ? AND currency = 'XTR') as revenue_today,
+                (SELECT COALESCE(MAX(id), 0) FROM payments) as last_payment_id
+        """, today + yesterday + (week_ago,) + today)
+        activity = dict(await cursor.fetchone())
+
+        self._last_download_id = activity.pop("last_download_id")
+        self._last_payment_id = activity.pop("last_payment_id")
+        self._last_user_created = users.pop("last_created") or ""
+        cursor = await db.execute(
+            "SELECT id FROM users WHERE created_at = ?", (self._last_user_created,)
+        )
+        self._edge_user_ids = {row[0] for row in await cursor.fetchall()}
+        self._stats = {**users, **activity}
+
+    async def _refresh(self, db: aiosqlite.Connection):
+        stats = self._stats
+        today_start, today_end = day_range(self._now())
+
+        cursor = await db.execute(
+            "SELECT id, created_at, referred_by FROM users WHERE created_at >= ?",
+            (self._last_user_created,)
+        )
+        new_users = [row for row in await cursor.fetchall() if row[0] not in self._edge_user_ids]
+        for user_id, created_at, referred_by in new_users:
+            stats["total_users"] += 1
+            stats["total_referrals"] += referred_by is not None
+            stats["new_users_today"] += today_start <= created_at < today_end
+            if created_at > self._last_user_created:
+                self._last_user_created = created_at
+                self._edge_user_ids = set()
+            if created_at == self._last_user_created:
+                self._edge_user_ids.add(user_id)
+
+        cursor = await db.execute("""
+            SELECT
+                COUNT(*) as count,
+                COALESCE(SUM(downloaded_at >= ? AND downloaded_at < ?), 0) as today,
+                MAX(id) as last_id
+            FROM downloads WHERE id > ?
+        """, (today_start, today_end, self._last_download_id))
+        row = await cursor.fetchone()
+        if row["count"]:
+            stats["total_downloads"] += row["count"]
+            stats["downloads_today"] += row["today"]
+            self._last_download_id = row["last_id"]
+
+        cursor = await db.execute("""
+            SELECT
+                COALESCE(SUM(CASE WHEN currency = 'XTR' THEN amount END), 0) as total,
+                COALESCE(SUM(CASE WHEN currency = 'XTR' AND created_at >= ? AND created_at < ?
+                                  THEN amount END), 0) as today,
+                MAX(id) as last_id
+            FROM payments WHERE id > ?
+        """, (today_start, today_end, self._last_payment_id))
+        row = await cursor.fetchone()
+        if row["last_id"] is not None:
+            stats["total_revenue"] += row["total"]
+            stats["revenue_today"] += row["today"]
+            self._last_payment_id = row["last_id"]
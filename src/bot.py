@@ -1,10 +1,14 @@
 """Bot initialization module."""
-from aiogram import Bot, Dispatcher
+from aiogram import Bot
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
 
 from src.config import settings
+from src.database.fsm_storage import create_fsm_storage
+from src.database.repositories import user_repo
+from src.dispatcher import OrderedDispatcher
+from src.middlewares import OutboundRateMiddleware, UserActivityMiddleware, outbound, user_activity
+from src.utils.metrics import registry
 
 # Initialize bot with default HTML parse mode
 bot = Bot(
@@ -12,6 +16,25 @@ bot = Bot(
     default=DefaultBotProperties(parse_mode=ParseMode.HTML)
 )
 
+# Pace outgoing messages to Telegram limits, retry on flood control,
+# remember users who blocked the bot
+bot.session.middleware(OutboundRateMiddleware(outbound, on_forbidden=user_repo.mark_unreachable))
+
 # Initialize FSM storage and dispatcher
-storage = MemoryStorage()
-dp = Dispatcher(storage=storage)
+# (updates run concurrently across chats, sequentially within a chat)
+storage = create_fsm_storage()
+dp = OrderedDispatcher(storage=storage, max_concurrency=settings.UPDATE_CONCURRENCY)
+
+# Record user identity/last_seen for every update (flushed in batches)
+dp.update.outer_middleware(UserActivityMiddleware(user_activity))
+
+# Queue depths, read at scrape time
+registry.gauge("musicbot_updates_in_flight", "Updates being processed").set_function(
+    lambda: dp.stats()["in_flight"]
+)
+registry.gauge("musicbot_updates_waiting", "Updates waiting for a slot or their chat").set_function(
+    lambda: dp.stats()["waiting"]
+)
+registry.gauge("musicbot_outbound_queued", "Sends waiting for the global rate limit").set_function(
+    lambda: sum(outbound.stats()[key] for key in ("queued_interactive", "queued_bulk"))
+)
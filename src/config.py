@@ -26,6 +26,9 @@ class Settings(BaseSettings):
 
     # Logging
     LOG_LEVEL: str = "INFO"
+    LOG_MAX_BYTES: int = 10485760  # Rotate bot.log at 10MB
+    LOG_BACKUP_COUNT: int = 5
+    LOG_SAMPLING: str = ""  # Keep share of DEBUG/INFO per logger: "cache=0.01,rate_limiter=0.1"
 
     # Rate limiting
     RATE_LIMIT_REQUESTS: int = 5
@@ -34,6 +37,58 @@ class Settings(BaseSettings):
     # Download limits
     FREE_DAILY_LIMIT: int = 10  # Free users: 10 downloads/day
 
+    # Entitlements cache (premium/limits lookups)
+    ENTITLEMENTS_TTL: int = 300  # Seconds before cached entitlements are reloaded
+    ENTITLEMENTS_CACHE_SIZE: int = 50000  # Max users kept in memory
+
+    # User activity tracking (batched upserts of username/last_seen)
+    USER_FLUSH_INTERVAL: float = 5.0  # Seconds between batched writes
+
+    # FSM storage: sqlite (default), redis or memory
+    FSM_STORAGE: str = "sqlite"
+    FSM_STATE_TTL: int = 86400  # Seconds before an abandoned state expires (0 = never)
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Max updates processed at once (per-chat order is always kept)
+    UPDATE_CONCURRENCY: int = 100
+
+    # Outgoing messages pacing (Telegram allows ~30 msg/s, ~1 msg/s per chat)
+    OUTBOUND_GLOBAL_RATE: float = 30.0
+    OUTBOUND_CHAT_RATE: float = 1.0
+    OUTBOUND_CHAT_BURST: int = 3  # Messages a chat may get at once before pacing
+    OUTBOUND_MAX_RETRIES: int = 3  # Retries after TelegramRetryAfter
+
+    # Broadcasts (/mailing)
+    BROADCAST_WORKERS: int = 20  # Concurrent sends; pacing is done by OUTBOUND_* limits
+    BROADCAST_PROGRESS_INTERVAL: float = 10.0  # Seconds between checkpoints/progress edits
+
+    # Seconds between reachable/blocked users reports in the log
+    REACHABILITY_REPORT_INTERVAL: int = 86400
+
+    # Update delivery: polling or webhook (see src/webhook.py)
+    BOT_MODE: str = "polling"
+    WEBHOOK_URL: str = ""  # Public base URL, e.g. https://bot.example.com
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: str = ""  # X-Telegram-Bot-Api-Secret-Token value
+    WEBHOOK_HOST: str = "127.0.0.1"
+    WEBHOOK_PORT: int = 8080  # Worker N listens on WEBHOOK_PORT + N
+    WEBHOOK_MAX_CONNECTIONS: int = 40
+    WORKER_ID: int = 0  # Only worker 0 registers the webhook
+    WEBHOOK_WORKERS: int = 1  # Worker processes behind the proxy; more than 1 requires FSM_STORAGE=redis
+
+    # Prometheus metrics at /metrics, on an internal address (not the webhook app)
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 0  # 0 = disabled; worker N listens on METRICS_PORT + N
+    DEBUG_TOKEN: str = ""  # Enables GET /debug/profile on the metrics server (X-Debug-Token header)
+
+    # Event loop lag monitor (toggle at runtime with /loop_monitor)
+    LOOP_MONITOR: bool = True
+    LOOP_LAG_THRESHOLD_MS: int = 100  # Stalls longer than this are logged with a stack
+
+    # Per-statement DB timing (toggle at runtime with /db_stats on|off)
+    DB_QUERY_STATS: bool = False
+    DB_SLOW_QUERY_MS: int = 100  # Slower statements are logged with EXPLAIN QUERY PLAN
+
     # Features
     ENABLE_CACHE: bool = True
     ENABLE_STATS: bool = True
@@ -69,6 +124,12 @@ class Settings(BaseSettings):
             return []
         return [int(x.strip()) for x in str(self.ADMIN_IDS).split(',') if x.strip()]
 
+    def get_worker_count(self) -> int:
+        """Bot processes sharing the load (webhook workers), 1 in polling mode."""
+        if self.BOT_MODE != "webhook":
+            return 1
+        return max(self.WEBHOOK_WORKERS, 1)
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -76,7 +137,8 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
-# Create necessary directories
-Path(settings.TEMP_DIR).mkdir(parents=True, exist_ok=True)
-Path(settings.CACHE_DIR).mkdir(parents=True, exist_ok=True)
-Path(settings.LOGS_DIR).mkdir(parents=True, exist_ok=True)
+
+def ensure_directories():
+    """Create working directories (called on bot startup, not on import)."""
+    for path in (settings.TEMP_DIR, settings.CACHE_DIR, settings.LOGS_DIR):
+        Path(path).mkdir(parents=True, exist_ok=True)
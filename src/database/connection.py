@@ -1,8 +1,18 @@
 """Database connection and initialization."""
+import time
 import aiosqlite
 from pathlib import Path
 from src.config import settings
+from src.database.migrations import migrate
+from src.database.query_stats import QueryStats, is_explainable
 from src.utils.logger import logger
+from src.utils.metrics import DB_QUERY_SECONDS
+
+_EXECUTE = DB_QUERY_SECONDS.labels("execute")
+_EXECUTEMANY = DB_QUERY_SECONDS.labels("executemany")
+_FETCHONE = DB_QUERY_SECONDS.labels("fetchone")
+_FETCHALL = DB_QUERY_SECONDS.labels("fetchall")
+_COMMIT = DB_QUERY_SECONDS.labels("commit")
 
 
 class Database:
@@ -11,13 +21,17 @@ class Database:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.connection: aiosqlite.Connection = None
+        # Per-statement timings, None when disabled (see enable_query_stats)
+        self.query_stats: QueryStats = None
 
     async def connect(self):
-        """Connect to database and create tables."""
+        """Connect to database and apply pending migrations."""
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
         self.connection = await aiosqlite.connect(self.db_path)
         self.connection.row_factory = aiosqlite.Row
-        await self._create_tables()
+        if settings.DB_QUERY_STATS:
+            self.enable_query_stats(settings.DB_SLOW_QUERY_MS / 1000)
+        await migrate(self.connection)
         logger.info(f"Database connected: {self.db_path}")
 
     async def disconnect(self):
@@ -26,175 +40,85 @@ class Database:
             await self.connection.close()
             logger.info("Database disconnected")
 
-    async def _create_tables(self):
-        """Create all tables if not exist."""
-        await self.connection.executescript("""
-            -- Users table
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY,
-                username TEXT,
-                first_name TEXT,
-                is_premium INTEGER DEFAULT 0,
-                premium_until TIMESTAMP,
-                referral_code TEXT UNIQUE,
-                referred_by INTEGER,
-                bonus_downloads INTEGER DEFAULT 0,
-                searches INTEGER DEFAULT 0,
-                downloads INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-
-            -- Downloads history
-            CREATE TABLE IF NOT EXISTS downloads (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                track_id TEXT NOT NULL,
-                title TEXT NOT NULL,
-                artist TEXT,
-                duration INTEGER,
-                downloaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            );
-
-            -- Favorites
-            CREATE TABLE IF NOT EXISTS favorites (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                track_id TEXT NOT NULL,
-                title TEXT NOT NULL,
-                artist TEXT,
-                duration INTEGER,
-                added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id),
-                UNIQUE(user_id, track_id)
-            );
-
-            -- Track statistics (for top charts)
-            CREATE TABLE IF NOT EXISTS track_stats (
-                track_id TEXT PRIMARY KEY,
-                title TEXT NOT NULL,
-                artist TEXT,
-                download_count INTEGER DEFAULT 0,
-                last_downloaded TIMESTAMP
-            );
-
-            -- Daily downloads (for limits)
-            CREATE TABLE IF NOT EXISTS daily_downloads (
-                user_id INTEGER NOT NULL,
-                download_date DATE NOT NULL,
-                count INTEGER DEFAULT 1,
-                UNIQUE(user_id, download_date)
-            );
-
-            -- Payments
-            CREATE TABLE IF NOT EXISTS payments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                amount REAL NOT NULL,
-                currency TEXT DEFAULT 'RUB',
-                payment_type TEXT,
-                payment_system TEXT,
-                status TEXT DEFAULT 'pending',
-                external_id TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                completed_at TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            );
-
-            -- Referrals (detailed tracking)
-            CREATE TABLE IF NOT EXISTS referrals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                referrer_id INTEGER NOT NULL,
-                referred_id INTEGER NOT NULL,
-                is_active INTEGER DEFAULT 0,
-                first_download_at TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (referrer_id) REFERENCES users(id),
-                FOREIGN KEY (referred_id) REFERENCES users(id),
-                UNIQUE(referrer_id, referred_id)
-            );
-
-            -- Indexes for performance
-            CREATE INDEX IF NOT EXISTS idx_downloads_user_id ON downloads(user_id);
-            CREATE INDEX IF NOT EXISTS idx_downloads_date ON downloads(downloaded_at);
-            CREATE INDEX IF NOT EXISTS idx_favorites_user_id ON favorites(user_id);
-            CREATE INDEX IF NOT EXISTS idx_daily_downloads_user_date
-                ON daily_downloads(user_id, download_date);
-            CREATE INDEX IF NOT EXISTS idx_track_stats_count
-                ON track_stats(download_count DESC);
-            CREATE INDEX IF NOT EXISTS idx_users_referral ON users(referral_code);
-            CREATE INDEX IF NOT EXISTS idx_referrals_referrer ON referrals(referrer_id);
-            CREATE INDEX IF NOT EXISTS idx_referrals_referred ON referrals(referred_id);
-        """)
-        await self.connection.commit()
-
-        # Add new columns if not exist (migrations)
-        await self._run_migrations()
-
-    async def _run_migrations(self):
-        """Run database migrations for new columns."""
-        # Check and add recognize_count column
-        try:
-            await self.connection.execute(
-                "ALTER TABLE users ADD COLUMN recognize_count INTEGER DEFAULT 0"
-            )
-            await self.connection.commit()
-            logger.info("Added recognize_count column")
-        except Exception:
-            pass  # Column already exists
-
-        # Check and add last_recognize_date column
-        try:
-            await self.connection.execute(
-                "ALTER TABLE users ADD COLUMN last_recognize_date TEXT"
-            )
-            await self.connection.commit()
-            logger.info("Added last_recognize_date column")
-        except Exception:
-            pass  # Column already exists
-
-        # Add payload column to payments if not exists
-        try:
-            await self.connection.execute(
-                "ALTER TABLE payments ADD COLUMN payload TEXT"
-            )
-            await self.connection.commit()
-            logger.info("Added payload column to payments")
-        except Exception:
-            pass
-
-        # Add language column to users if not exists
-        try:
-            await self.connection.execute(
-                "ALTER TABLE users ADD COLUMN language TEXT DEFAULT 'ru'"
-            )
-            await self.connection.commit()
-            logger.info("Added language column to users")
-        except Exception:
-            pass
+    def enable_query_stats(self, slow_threshold: float = 0.1):
+        """Start aggregating statement timings and logging slow queries."""
+        if self.query_stats is None:
+            self.query_stats = QueryStats(slow_threshold=slow_threshold)
+        self.query_stats.slow_threshold = slow_threshold
+
+    def disable_query_stats(self):
+        """Stop statement timing (collected stats are dropped)."""
+        self.query_stats = None
+
+    async def _record(self, query: str, params, elapsed: float):
+        """Add statement timing, log slow statements with their plan."""
+        if not self.query_stats.record(query, elapsed):
+            return
+
+        plan = self.query_stats.get_plan(query)
+        if plan is None and is_explainable(query) and isinstance(params, (tuple, list, dict)):
+            try:
+                cursor = await self.connection.execute(f"EXPLAIN QUERY PLAN {query}", params)
+                plan = [row[3] for row in await cursor.fetchall()]
+            except Exception as e:
+                plan = [f"(no plan: {e})"]
+            self.query_stats.set_plan(query, plan)
+
+        logger.warning(
+            "Slow query (%.0f ms): %s\n  plan: %s",
+            elapsed * 1000, " ".join(query.split()), "; ".join(plan or ["-"])
+        )
 
     async def execute(self, query: str, params: tuple = ()):
         """Execute a query and return cursor."""
-        return await self.connection.execute(query, params)
+        started = time.perf_counter()
+        cursor = await self.connection.execute(query, params)
+        elapsed = time.perf_counter() - started
+        _EXECUTE.observe(elapsed)
+        if self.query_stats is not None:
+            await self._record(query, params, elapsed)
+        return cursor
 
     async def executemany(self, query: str, params_list: list):
         """Execute query for multiple parameter sets."""
-        return await self.connection.executemany(query, params_list)
+        started = time.perf_counter()
+        cursor = await self.connection.executemany(query, params_list)
+        elapsed = time.perf_counter() - started
+        _EXECUTEMANY.observe(elapsed)
+        if self.query_stats is not None:
+            await self._record(query, None, elapsed)
+        return cursor
 
     async def fetchone(self, query: str, params: tuple = ()):
         """Execute query and fetch one row."""
+        started = time.perf_counter()
         cursor = await self.connection.execute(query, params)
-        return await cursor.fetchone()
+        row = await cursor.fetchone()
+        elapsed = time.perf_counter() - started
+        _FETCHONE.observe(elapsed)
+        if self.query_stats is not None:
+            await self._record(query, params, elapsed)
+        return row
 
     async def fetchall(self, query: str, params: tuple = ()):
         """Execute query and fetch all rows."""
+        started = time.perf_counter()
         cursor = await self.connection.execute(query, params)
-        return await cursor.fetchall()
+        rows = await cursor.fetchall()
+        elapsed = time.perf_counter() - started
+        _FETCHALL.observe(elapsed)
+        if self.query_stats is not None:
+            await self._record(query, params, elapsed)
+        return rows
 
     async def commit(self):
         """Commit transaction."""
-        await self.connection.commit()
+        with _COMMIT.time():
+            await self.connection.commit()
+
+    async def rollback(self):
+        """Roll back transaction."""
+        await self.connection.rollback()
 
 
 # Global database instance
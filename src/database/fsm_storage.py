@@ -0,0 +1,187 @@
+"""Persistent FSM storage backends."""
+import json
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from src.config import settings
+from src.database.connection import Database, db
+from src.utils.logger import logger
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM storage in the bot's SQLite database.
+
+    State and data of one key live in a single row of ``fsm_storage``.
+    Rows are mirrored in an in-memory cache, so the state lookup done for
+    every update is a dict hit; only changes go to disk. Cached records
+    keep their expiry and are not served past it. The cache assumes this
+    process is the only writer: cache_size=0 turns it off, and with
+    several webhook workers Redis is required.
+    """
+
+    def __init__(
+        self,
+        database: Database = db,
+        key_builder: Optional[KeyBuilder] = None,
+        state_ttl: int = 0,
+        cache_size: int = 10000,
+        cleanup_interval: int = 3600,
+    ):
+        self.database = database
+        self.key_builder = key_builder or DefaultKeyBuilder()
+        self.state_ttl = state_ttl  # Seconds of inactivity before a record expires (0 = never)
+        self.cache_size = cache_size
+        self.cleanup_interval = cleanup_interval
+        # key -> (state, data, expires_at unix time or None)
+        self._cache: Dict[str, Tuple[Optional[str], Dict[str, Any], Optional[float]]] = {}
+        self._last_cleanup = time.monotonic()
+
+    async def _read(self, key: StorageKey) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Get (state, data) for key, from cache or database."""
+        storage_key = self.key_builder.build(key)
+        now = time.time()
+        cached = self._cache.get(storage_key)
+        if cached is not None:
+            state, data, expires_at = cached
+            if expires_at is None or expires_at > now:
+                return state, data
+            del self._cache[storage_key]
+
+        row = await self.database.fetchone(
+            "SELECT state, data, expires_at FROM fsm_storage "
+            "WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (storage_key, now)
+        )
+        if row:
+            record = (row["state"], json.loads(row["data"]) if row["data"] else {})
+            self._remember(storage_key, record, row["expires_at"])
+        else:
+            record = (None, {})
+            self._remember(storage_key, record, None)
+        return record
+
+    async def _write(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]):
+        """Replace (state, data) for key. Empty records are deleted."""
+        storage_key = self.key_builder.build(key)
+
+        expires_at = None
+        if state is None and not data:
+            await self.database.execute("DELETE FROM fsm_storage WHERE key = ?", (storage_key,))
+        else:
+            expires_at = time.time() + self.state_ttl if self.state_ttl else None
+            await self.database.execute("""
+                INSERT INTO fsm_storage (key, state, data, expires_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    state = excluded.state,
+                    data = excluded.data,
+                    expires_at = excluded.expires_at
+            """, (storage_key, state, json.dumps(data, ensure_ascii=False) if data else None, expires_at))
+        await self.database.commit()
+
+        self._remember(storage_key, (state, data), expires_at)
+        await self._maybe_cleanup()
+
+    def _remember(
+        self,
+        storage_key: str,
+        record: Tuple[Optional[str], Dict[str, Any]],
+        expires_at: Optional[float]
+    ):
+        """Cache record until expires_at, evicting the oldest entries on overflow."""
+        if not self.cache_size:
+            return
+        if len(self._cache) >= self.cache_size and storage_key not in self._cache:
+            # Dicts keep insertion order - drop the oldest tenth
+            for old_key in list(self._cache)[:max(1, self.cache_size // 10)]:
+                del self._cache[old_key]
+        self._cache[storage_key] = (*record, expires_at)
+
+    async def _maybe_cleanup(self):
+        """Run expired records cleanup at most once per interval."""
+        if not self.state_ttl:
+            return
+        if time.monotonic() - self._last_cleanup < self.cleanup_interval:
+            return
+        self._last_cleanup = time.monotonic()
+        await self.cleanup()
+
+    async def cleanup(self) -> int:
+        """
+        Delete expired records.
+
+        Returns:
+            Number of deleted records
+        """
+        cursor = await self.database.execute(
+            "DELETE FROM fsm_storage WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (time.time(),)
+        )
+        await self.database.commit()
+        # Expired entries may still be cached
+        self._cache.clear()
+
+        if cursor.rowcount:
+            logger.info(f"FSM storage cleanup: deleted {cursor.rowcount} expired records")
+        return cursor.rowcount
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        """Set state for key."""
+        if isinstance(state, State):
+            state = state.state
+        _, data = await self._read(key)
+        await self._write(key, state, data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        """Get state for key."""
+        state, _ = await self._read(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        """Replace data for key."""
+        if not isinstance(data, dict):
+            raise TypeError(f"Data must be a dict, not {type(data).__name__}")
+        state, _ = await self._read(key)
+        await self._write(key, state, data.copy())
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        """Get a copy of data for key."""
+        _, data = await self._read(key)
+        return data.copy()
+
+    async def close(self) -> None:
+        """Drop cache. The database connection is owned by ``db``."""
+        self._cache.clear()
+
+
+def create_fsm_storage() -> BaseStorage:
+    """Create FSM storage selected by FSM_STORAGE setting."""
+    backend = settings.FSM_STORAGE.lower()
+
+    if backend == "redis":
+        # Requires the optional redis package
+        from aiogram.fsm.storage.redis import RedisStorage
+
+        ttl = settings.FSM_STATE_TTL or None
+        logger.info("FSM storage: Redis")
+        return RedisStorage.from_url(settings.REDIS_URL, state_ttl=ttl, data_ttl=ttl)
+
+    if backend == "memory":
+        logger.info("FSM storage: memory (states are lost on restart)")
+        return MemoryStorage()
+
+    if backend != "sqlite":
+        logger.warning(f"Unknown FSM_STORAGE '{settings.FSM_STORAGE}', using sqlite")
+
+    if settings.get_worker_count() > 1:
+        # Each worker would serve its own cached states for the same chat
+        logger.warning("FSM storage: SQLite without cache - use FSM_STORAGE=redis with several workers")
+        return SQLiteStorage(state_ttl=settings.FSM_STATE_TTL, cache_size=0)
+
+    logger.info("FSM storage: SQLite")
+    return SQLiteStorage(state_ttl=settings.FSM_STATE_TTL)
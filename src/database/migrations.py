@@ -0,0 +1,342 @@
+"""
+Versioned schema migrations.
+
+The schema version is stored in ``PRAGMA user_version``. On startup
+pending migrations are applied in order: consecutive schema migrations in
+one transaction together with the version bump, backfills in small
+batches, each committed on its own, so other connections are never
+locked out for long. An up to date database costs a single PRAGMA read.
+
+To change the schema append a step with the next version number. Never
+edit or renumber a released step.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple, Union
+
+import aiosqlite
+
+from src.utils.logger import logger
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+@dataclass(frozen=True)
+class Migration:
+    """Schema change applied atomically with the version bump."""
+
+    version: int
+    description: str
+    statements: Tuple[str, ...] = ()
+    # (table, column, definition) - added unless present, databases created
+    # before versioning already have some of these columns
+    columns: Tuple[Tuple[str, str, str], ...] = ()
+
+
+@dataclass(frozen=True)
+class Backfill:
+    """
+    Data update run in batches.
+
+    ``statement`` must update at most ``?`` rows (batch size) per run and
+    skip rows already updated, so it can be repeated until nothing changes
+    and resumed after an interrupted start.
+    """
+
+    version: int
+    description: str
+    statement: str
+
+
+Step = Union[Migration, Backfill]
+
+
+MIGRATIONS: List[Step] = [
+    Migration(1, "initial schema", statements=(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            is_premium INTEGER DEFAULT 0,
+            premium_until TIMESTAMP,
+            referral_code TEXT UNIQUE,
+            referred_by INTEGER,
+            bonus_downloads INTEGER DEFAULT 0,
+            searches INTEGER DEFAULT 0,
+            downloads INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS downloads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            track_id TEXT NOT NULL,
+            title TEXT NOT NULL,
+            artist TEXT,
+            duration INTEGER,
+            downloaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS favorites (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            track_id TEXT NOT NULL,
+            title TEXT NOT NULL,
+            artist TEXT,
+            duration INTEGER,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            UNIQUE(user_id, track_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS track_stats (
+            track_id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            artist TEXT,
+            download_count INTEGER DEFAULT 0,
+            last_downloaded TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS daily_downloads (
+            user_id INTEGER NOT NULL,
+            download_date DATE NOT NULL,
+            count INTEGER DEFAULT 1,
+            UNIQUE(user_id, download_date)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            currency TEXT DEFAULT 'RUB',
+            payment_type TEXT,
+            payment_system TEXT,
+            status TEXT DEFAULT 'pending',
+            external_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS referrals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            referrer_id INTEGER NOT NULL,
+            referred_id INTEGER NOT NULL,
+            is_active INTEGER DEFAULT 0,
+            first_download_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (referrer_id) REFERENCES users(id),
+            FOREIGN KEY (referred_id) REFERENCES users(id),
+            UNIQUE(referrer_id, referred_id)
+        )
+        """,
+        # FSM states and data (see src/database/fsm_storage.py)
+        """
+        CREATE TABLE IF NOT EXISTS fsm_storage (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT,
+            expires_at REAL
+        ) WITHOUT ROWID
+        """,
+        # Admin mailing campaigns (see src/services/broadcast.py)
+        """
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            admin_id INTEGER NOT NULL,
+            from_chat_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            status TEXT DEFAULT 'running',
+            total INTEGER DEFAULT 0,
+            sent INTEGER DEFAULT 0,
+            failed INTEGER DEFAULT 0,
+            blocked INTEGER DEFAULT 0,
+            progress_chat_id INTEGER,
+            progress_message_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS broadcast_recipients (
+            broadcast_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            status TEXT DEFAULT 'pending',
+            error TEXT,
+            PRIMARY KEY (broadcast_id, user_id)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_downloads_user_id ON downloads(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_downloads_date ON downloads(downloaded_at)",
+        "CREATE INDEX IF NOT EXISTS idx_favorites_user_id ON favorites(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_daily_downloads_user_date ON daily_downloads(user_id, download_date)",
+        "CREATE INDEX IF NOT EXISTS idx_track_stats_count ON track_stats(download_count DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_users_referral ON users(referral_code)",
+        "CREATE INDEX IF NOT EXISTS idx_referrals_referrer ON referrals(referrer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_referrals_referred ON referrals(referred_id)",
+        "CREATE INDEX IF NOT EXISTS idx_fsm_storage_expires ON fsm_storage(expires_at) WHERE expires_at IS NOT NULL",
+    )),
+    Migration(2, "music recognition limits", columns=(
+        ("users", "recognize_count", "INTEGER DEFAULT 0"),
+        ("users", "last_recognize_date", "TEXT"),
+    )),
+    Migration(3, "payment payload", columns=(
+        ("payments", "payload", "TEXT"),
+    )),
+    Migration(4, "user language", columns=(
+        ("users", "language", "TEXT DEFAULT 'ru'"),
+    )),
+    Migration(5, "user reachability", columns=(
+        ("users", "blocked_at", "TIMESTAMP"),
+        ("users", "reachable", "INTEGER DEFAULT 1"),
+    ), statements=(
+        # Broadcasts stream reachable users in ID order
+        "CREATE INDEX IF NOT EXISTS idx_users_reachable ON users(reachable, id)",
+    )),
+    Backfill(6, "activate referrals of users who downloaded", """
+        UPDATE referrals SET
+            is_active = 1,
+            first_download_at = (
+                SELECT MIN(downloaded_at) FROM downloads WHERE downloads.user_id = referrals.referred_id
+            )
+        WHERE id IN (
+            SELECT id FROM referrals
+            WHERE is_active = 0
+                AND EXISTS (SELECT 1 FROM downloads WHERE downloads.user_id = referrals.referred_id)
+            LIMIT ?
+        )
+    """),
+    Migration(7, "indexes for repository and dashboard queries", statements=(
+        # Recommendations (users who downloaded a track), user_has_downloaded
+        "CREATE INDEX IF NOT EXISTS idx_downloads_track_user ON downloads(track_id, user_id)",
+        # History page; also serves every user_id lookup
+        "CREATE INDEX IF NOT EXISTS idx_downloads_user_date ON downloads(user_id, downloaded_at)",
+        # Covering for top artists and total listening time
+        "CREATE INDEX IF NOT EXISTS idx_downloads_user_artist ON downloads(user_id, artist, duration)",
+        # Date ranges and distinct active users without table lookups
+        "CREATE INDEX IF NOT EXISTS idx_downloads_date_user ON downloads(downloaded_at, user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_favorites_user_added ON favorites(user_id, added_at)",
+        "CREATE INDEX IF NOT EXISTS idx_users_last_seen ON users(last_seen)",
+        "CREATE INDEX IF NOT EXISTS idx_users_created ON users(created_at)",
+        # Referral counts per user and referral lists
+        "CREATE INDEX IF NOT EXISTS idx_users_referred_by ON users(referred_by, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_user_created ON payments(user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_created ON payments(created_at)",
+        # Duplicate payment check on every provider callback
+        "CREATE INDEX IF NOT EXISTS idx_payments_external_id ON payments(external_id) WHERE external_id IS NOT NULL",
+        # Prefixes of the indexes above or of UNIQUE constraints: cost writes, serve nothing
+        "DROP INDEX IF EXISTS idx_downloads_user_id",
+        "DROP INDEX IF EXISTS idx_downloads_date",
+        "DROP INDEX IF EXISTS idx_favorites_user_id",
+        "DROP INDEX IF EXISTS idx_users_referral",
+        "DROP INDEX IF EXISTS idx_daily_downloads_user_date",
+        "DROP INDEX IF EXISTS idx_referrals_referrer",
+    )),
+    Migration(8, "unique payment external id", statements=(
+        # Keep the first row of duplicates logged before the index was unique
+        """
+        UPDATE payments SET external_id = NULL
+        WHERE external_id IS NOT NULL AND id NOT IN (
+            SELECT MIN(id) FROM payments WHERE external_id IS NOT NULL GROUP BY external_id
+        )
+        """,
+        # Provider callbacks are deduplicated by the insert itself
+        "DROP INDEX IF EXISTS idx_payments_external_id",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_external_id ON payments(external_id) WHERE external_id IS NOT NULL",
+    )),
+    Migration(9, "broadcast lease", columns=(
+        # Process sending the broadcast and until when (unix time) it holds it
+        ("broadcasts", "lease_owner", "TEXT"),
+        ("broadcasts", "lease_until", "REAL"),
+    )),
+]
+
+
+async def get_version(connection: aiosqlite.Connection) -> int:
+    cursor = await connection.execute("PRAGMA user_version")
+    row = await cursor.fetchone()
+    return row[0]
+
+
+async def _columns(connection: aiosqlite.Connection, table: str) -> List[str]:
+    cursor = await connection.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in await cursor.fetchall()]
+
+
+async def _apply(connection: aiosqlite.Connection, migration: Migration):
+    for table, column, definition in migration.columns:
+        if column not in await _columns(connection, table):
+            await connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    for statement in migration.statements:
+        await connection.execute(statement)
+
+
+async def _backfill(connection: aiosqlite.Connection, backfill: Backfill, batch_size: int):
+    total = 0
+    while True:
+        cursor = await connection.execute(backfill.statement, (batch_size,))
+        total += cursor.rowcount
+        # Version is bumped with the last (empty) batch
+        if cursor.rowcount < batch_size:
+            await connection.execute(f"PRAGMA user_version = {backfill.version}")
+        await connection.commit()
+        if cursor.rowcount < batch_size:
+            break
+        # Let other connections take the write lock between batches
+        await asyncio.sleep(0)
+
+    logger.info(f"Migration {backfill.version} ({backfill.description}): {total} rows updated")
+
+
+async def migrate(
+    connection: aiosqlite.Connection,
+    migrations: Sequence[Step] = MIGRATIONS,
+    batch_size: int = BACKFILL_BATCH_SIZE
+) -> int:
+    """
+    Bring the database schema up to date.
+
+    Returns:
+        Schema version after migration
+    """
+    current = await get_version(connection)
+    pending = [step for step in migrations if step.version > current]
+    if not pending:
+        if migrations and current > migrations[-1].version:
+            logger.warning(f"Database schema version {current} is newer than this code knows ({migrations[-1].version})")
+        return current
+
+    logger.info(f"Migrating database schema from version {current} to {pending[-1].version}")
+    index = 0
+    while index < len(pending):
+        if isinstance(pending[index], Backfill):
+            await _backfill(connection, pending[index], batch_size)
+            index += 1
+            continue
+
+        group = []
+        while index < len(pending) and isinstance(pending[index], Migration):
+            group.append(pending[index])
+            index += 1
+
+        await connection.execute("BEGIN")
+        try:
+            for migration in group:
+                await _apply(connection, migration)
+                logger.info(f"Migration {migration.version}: {migration.description}")
+            await connection.execute(f"PRAGMA user_version = {group[-1].version}")
+            await connection.commit()
+        except Exception:
+            await connection.rollback()
+            raise
+
+    return pending[-1].version
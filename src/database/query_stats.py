@@ -0,0 +1,104 @@
+"""Per-statement query timing (slow query log)."""
+import re
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+# Statements that EXPLAIN QUERY PLAN can't describe or which are not worth it
+_NOT_EXPLAINABLE = ("BEGIN", "COMMIT", "ROLLBACK", "PRAGMA", "CREATE", "DROP", "ALTER", "VACUUM", "ANALYZE", "EXPLAIN")
+
+
+def normalize_sql(query: str) -> str:
+    """Collapse whitespace and literals, so equal statements aggregate together."""
+    query = _STRING.sub("?", query)
+    query = _NUMBER.sub("?", query)
+    query = _WHITESPACE.sub(" ", query).strip()
+    return _IN_LIST.sub("(...)", query)
+
+
+def is_explainable(query: str) -> bool:
+    return not query.lstrip().upper().startswith(_NOT_EXPLAINABLE)
+
+
+class _Entry:
+    __slots__ = ("count", "total", "max", "recent", "plan")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+        self.plan: Optional[List[str]] = None
+
+
+class QueryStats:
+    """
+    Aggregates statement timings by normalized SQL.
+
+    Percentiles are computed over the last ``window`` executions of each
+    statement. ``record`` returns True for statements slower than
+    ``slow_threshold`` - the caller then logs them with their query plan.
+    """
+
+    def __init__(self, slow_threshold: float = 0.1, window: int = 200, max_statements: int = 1000):
+        self.slow_threshold = slow_threshold
+        self.window = window
+        self.max_statements = max_statements
+        self._entries: Dict[str, _Entry] = {}
+        self.slow_count = 0
+
+    def record(self, query: str, elapsed: float) -> bool:
+        """Add execution time of statement, return True if it was slow."""
+        key = normalize_sql(query)
+        entry = self._entries.get(key)
+        if entry is None:
+            if len(self._entries) >= self.max_statements:
+                return elapsed >= self.slow_threshold
+            entry = self._entries[key] = _Entry(self.window)
+        entry.count += 1
+        entry.total += elapsed
+        entry.recent.append(elapsed)
+        if elapsed > entry.max:
+            entry.max = elapsed
+        if elapsed >= self.slow_threshold:
+            self.slow_count += 1
+            return True
+        return False
+
+    def get_plan(self, query: str) -> Optional[List[str]]:
+        """Get cached query plan of statement."""
+        entry = self._entries.get(normalize_sql(query))
+        return entry.plan if entry else None
+
+    def set_plan(self, query: str, plan: List[str]):
+        """Cache query plan of statement (plans are captured once)."""
+        entry = self._entries.get(normalize_sql(query))
+        if entry:
+            entry.plan = plan
+
+    def top(self, limit: int = 10, order_by: str = "total") -> List[dict]:
+        """Get statements ordered by total time (or count, p95, max), times in ms."""
+        rows = []
+        for sql, entry in self._entries.items():
+            recent = sorted(entry.recent)
+            p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+            rows.append({
+                "sql": sql,
+                "count": entry.count,
+                "total_ms": entry.total * 1000,
+                "avg_ms": entry.total / entry.count * 1000,
+                "p95_ms": p95 * 1000,
+                "max_ms": entry.max * 1000,
+                "plan": entry.plan,
+            })
+        key = {"total": "total_ms", "count": "count", "p95": "p95_ms", "max": "max_ms"}[order_by]
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return rows[:limit]
+
+    def reset(self):
+        self._entries.clear()
+        self.slow_count = 0
@@ -0,0 +1,150 @@
+"""Broadcast (mailing campaign) repository."""
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from src.database.connection import db
+from src.middlewares.user_activity import user_activity
+
+
+class BroadcastRepository:
+    """Repository for broadcasts and their recipients."""
+
+    async def create(self, admin_id: int, from_chat_id: int, message_id: int) -> int:
+        """
+        Create broadcast with all reachable users as pending recipients.
+
+        Returns:
+            Broadcast ID
+        """
+        cursor = await db.execute("""
+            INSERT INTO broadcasts (admin_id, from_chat_id, message_id, status, created_at)
+            VALUES (?, ?, ?, 'running', ?)
+        """, (admin_id, from_chat_id, message_id, datetime.now()))
+        broadcast_id = cursor.lastrowid
+
+        # Recipients are copied in SQL, user IDs never go through Python
+        cursor = await db.execute("""
+            INSERT INTO broadcast_recipients (broadcast_id, user_id)
+            SELECT ?, id FROM users WHERE reachable = 1
+        """, (broadcast_id,))
+
+        await db.execute(
+            "UPDATE broadcasts SET total = ? WHERE id = ?",
+            (cursor.rowcount, broadcast_id)
+        )
+        await db.commit()
+        return broadcast_id
+
+    async def get(self, broadcast_id: int) -> Optional[Dict[str, Any]]:
+        """Get broadcast by ID."""
+        row = await db.fetchone("SELECT * FROM broadcasts WHERE id = ?", (broadcast_id,))
+        return dict(row) if row else None
+
+    async def get_by_status(self, status: str) -> List[Dict[str, Any]]:
+        """Get broadcasts with given status, oldest first."""
+        rows = await db.fetchall(
+            "SELECT * FROM broadcasts WHERE status = ? ORDER BY id",
+            (status,)
+        )
+        return [dict(row) for row in rows]
+
+    async def set_status(self, broadcast_id: int, status: str):
+        """Set broadcast status. Final statuses also set finished_at."""
+        finished_at = datetime.now() if status in ("completed", "cancelled") else None
+        await db.execute(
+            "UPDATE broadcasts SET status = ?, finished_at = ? WHERE id = ?",
+            (status, finished_at, broadcast_id)
+        )
+        await db.commit()
+
+    async def claim(self, broadcast_id: int, owner: str, ttl: float) -> bool:
+        """
+        Take or renew the lease on a running broadcast.
+
+        Only the lease holder sends the broadcast, so workers resuming on
+        startup don't deliver it twice. A lease not renewed within ttl
+        seconds (holder crashed) can be taken over.
+
+        Returns:
+            True if owner holds the lease, False if another process does
+            or the broadcast is no longer running
+        """
+        now = time.time()
+        cursor = await db.execute("""
+            UPDATE broadcasts SET lease_owner = ?, lease_until = ?
+            WHERE id = ? AND status = 'running'
+                AND (lease_owner IS NULL OR lease_owner = ? OR lease_until < ?)
+        """, (owner, now + ttl, broadcast_id, owner, now))
+        await db.commit()
+        return cursor.rowcount > 0
+
+    async def release(self, broadcast_id: int, owner: str):
+        """Give up the lease so the next startup can resume the broadcast at once."""
+        await db.execute("""
+            UPDATE broadcasts SET lease_owner = NULL, lease_until = NULL
+            WHERE id = ? AND lease_owner = ?
+        """, (broadcast_id, owner))
+        await db.commit()
+
+    async def set_progress_message(self, broadcast_id: int, chat_id: int, message_id: int):
+        """Remember message that shows broadcast progress."""
+        await db.execute(
+            "UPDATE broadcasts SET progress_chat_id = ?, progress_message_id = ? WHERE id = ?",
+            (chat_id, message_id, broadcast_id)
+        )
+        await db.commit()
+
+    async def get_pending_recipients(self, broadcast_id: int, after_user_id: int = 0, limit: int = 500) -> List[int]:
+        """Get next batch of pending recipients (keyset pagination by user ID)."""
+        rows = await db.fetchall("""
+            SELECT user_id FROM broadcast_recipients
+            WHERE broadcast_id = ? AND status = 'pending' AND user_id > ?
+            ORDER BY user_id
+            LIMIT ?
+        """, (broadcast_id, after_user_id, limit))
+        return [row["user_id"] for row in rows]
+
+    async def save_results(self, broadcast_id: int, results: List[Tuple[int, str, Optional[str]]]):
+        """
+        Checkpoint delivery results in one transaction.
+
+        Args:
+            broadcast_id: Broadcast ID
+            results: List of (user_id, status, error), status is sent/failed/blocked
+        """
+        if not results:
+            return
+
+        try:
+            await db.executemany("""
+                UPDATE broadcast_recipients SET status = ?, error = ?
+                WHERE broadcast_id = ? AND user_id = ?
+            """, [(status, error, broadcast_id, user_id) for user_id, status, error in results])
+
+            counts = {"sent": 0, "failed": 0, "blocked": 0}
+            for _, status, _ in results:
+                counts[status] += 1
+
+            await db.execute("""
+                UPDATE broadcasts SET sent = sent + ?, failed = failed + ?, blocked = blocked + ?
+                WHERE id = ?
+            """, (counts["sent"], counts["failed"], counts["blocked"], broadcast_id))
+
+            blocked = [(user_id,) for user_id, status, _ in results if status == "blocked"]
+            for (user_id,) in blocked:
+                user_activity.discard(user_id)
+            if blocked:
+                await db.executemany("""
+                    UPDATE users SET reachable = 0, blocked_at = COALESCE(blocked_at, CURRENT_TIMESTAMP)
+                    WHERE id = ? AND reachable = 1
+                """, blocked)
+
+            await db.commit()
+        except Exception:
+            # Nothing half-written may go out with a later commit: results are saved again
+            await db.rollback()
+            raise
+
+
+# Global instance
+broadcast_repo = BroadcastRepository()
@@ -2,6 +2,7 @@
 from datetime import datetime, date
 from typing import List, Dict, Any, Optional
 from src.database.connection import db
+from src.database.repositories.entitlements_repo import entitlements_repo
 from src.utils.logger import logger
 
 
@@ -22,6 +23,11 @@ class DownloadRepository:
                 INSERT INTO downloads (user_id, track_id, title, artist, duration)
                 VALUES (?, ?, ?, ?, ?)
             """, (user_id, track_id, title, artist, duration))
+            # A referral counts as active from the referred user's first download
+            await db.execute("""
+                UPDATE referrals SET is_active = 1, first_download_at = CURRENT_TIMESTAMP
+                WHERE referred_id = ? AND is_active = 0
+            """, (user_id,))
             await db.commit()
             return True
         except Exception as e:
@@ -46,12 +52,8 @@ class DownloadRepository:
 
     async def get_today_count(self, user_id: int) -> int:
         """Get user's download count for today."""
-        today = date.today().isoformat()
-        row = await db.fetchone("""
-            SELECT count FROM daily_downloads
-            WHERE user_id = ? AND download_date = ?
-        """, (user_id, today))
-        return row["count"] if row else 0
+        entitlements = await entitlements_repo.get(user_id)
+        return entitlements.today_downloads
 
     async def increment_daily_count(self, user_id: int) -> int:
         """Increment daily download count and return new value."""
@@ -68,7 +70,9 @@ class DownloadRepository:
             SELECT count FROM daily_downloads
             WHERE user_id = ? AND download_date = ?
         """, (user_id, today))
-        return row["count"] if row else 1
+        count = row["count"] if row else 1
+        entitlements_repo.update(user_id, today_downloads=count)
+        return count
 
     async def get_user_download_count(self, user_id: int) -> int:
         """Get total download count for user."""
@@ -0,0 +1,141 @@
+"""Per-user entitlements cache for hot limit checks."""
+import time
+from dataclasses import dataclass
+from datetime import datetime, date
+from typing import Dict, Optional, Tuple
+from src.config import settings
+from src.database.connection import db
+from src.utils.logger import logger
+
+
+@dataclass
+class Entitlements:
+    """Everything a limit check needs to know about a user."""
+
+    user_id: int
+    premium_flag: bool = False
+    premium_until: Optional[datetime] = None
+    bonus_downloads: int = 0
+    today_downloads: int = 0
+    today_recognitions: int = 0
+    language: str = "ru"
+    day: str = ""  # Date the daily counters refer to
+
+    @property
+    def is_premium(self) -> bool:
+        """Check if premium is active right now."""
+        if not self.premium_flag:
+            return False
+        if self.premium_until:
+            return self.premium_until > datetime.now()
+        return True
+
+
+class EntitlementsRepository:
+    """
+    In-memory cache of user entitlements with TTL.
+
+    A single query loads premium status, bonus downloads, today's counters
+    and language. Writes in other repositories either patch the cached entry
+    (write-through) or drop it, so the common limit check is a dict lookup.
+    """
+
+    def __init__(self, ttl: int = 300, max_size: int = 50000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._cache: Dict[int, Tuple[float, Entitlements]] = {}
+
+    async def get(self, user_id: int) -> Entitlements:
+        """Get user entitlements, loading them from the database on miss."""
+        today = date.today().isoformat()
+        item = self._cache.get(user_id)
+        if item:
+            expire_at, entitlements = item
+            if expire_at > time.monotonic() and entitlements.day == today:
+                return entitlements
+
+        entitlements = await self._load(user_id, today)
+        self._store(entitlements)
+        return entitlements
+
+    async def _load(self, user_id: int, today: str) -> Entitlements:
+        """Load entitlements with one round trip."""
+        row = await db.fetchone("""
+            SELECT
+                u.is_premium,
+                u.premium_until,
+                u.bonus_downloads,
+                u.language,
+                u.recognize_count,
+                u.last_recognize_date,
+                (SELECT count FROM daily_downloads
+                 WHERE user_id = u.id AND download_date = ?) as today_downloads
+            FROM users u
+            WHERE u.id = ?
+        """, (today, user_id))
+
+        if not row:
+            return Entitlements(user_id=user_id, day=today)
+
+        premium_until = row["premium_until"]
+        if isinstance(premium_until, str):
+            try:
+                premium_until = datetime.fromisoformat(premium_until)
+            except ValueError:
+                logger.warning(f"Bad premium_until for user {user_id}: {premium_until}")
+                premium_until = None
+
+        today_recognitions = 0
+        if row["last_recognize_date"] == today:
+            today_recognitions = row["recognize_count"] or 0
+
+        return Entitlements(
+            user_id=user_id,
+            premium_flag=bool(row["is_premium"]),
+            premium_until=premium_until,
+            bonus_downloads=row["bonus_downloads"] or 0,
+            today_downloads=row["today_downloads"] or 0,
+            today_recognitions=today_recognitions,
+            language=row["language"] or "ru",
+            day=today,
+        )
+
+    def _store(self, entitlements: Entitlements):
+        """Put entry into cache, evicting the oldest entries on overflow."""
+        if len(self._cache) >= self.max_size and entitlements.user_id not in self._cache:
+            # Dicts keep insertion order - drop the oldest tenth
+            for key in list(self._cache)[:max(1, self.max_size // 10)]:
+                del self._cache[key]
+        self._cache[entitlements.user_id] = (time.monotonic() + self.ttl, entitlements)
+
+    def update(self, user_id: int, **changes):
+        """Write-through: patch cached entry in place if it is present and fresh."""
+        item = self._cache.get(user_id)
+        if not item:
+            return
+        entitlements = item[1]
+        if entitlements.day != date.today().isoformat():
+            self.invalidate(user_id)
+            return
+        for field_name, value in changes.items():
+            setattr(entitlements, field_name, value)
+
+    def invalidate(self, user_id: int):
+        """Drop cached entry for user."""
+        self._cache.pop(user_id, None)
+
+    def clear(self):
+        """Drop all cached entries."""
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        """Get cache statistics."""
+        return {"items": len(self._cache), "ttl": self.ttl, "max_size": self.max_size}
+
+
+# Global instance
+# Not cached with several workers: a change made by one would stay stale in the others
+entitlements_repo = EntitlementsRepository(
+    ttl=settings.ENTITLEMENTS_TTL if settings.get_worker_count() == 1 else 0,
+    max_size=settings.ENTITLEMENTS_CACHE_SIZE
+)
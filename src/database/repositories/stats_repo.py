@@ -68,6 +68,9 @@ class StatsRepository:
                     MAX(downloaded_at) as last_downloaded
                 FROM downloads
                 WHERE downloaded_at > {date_filter}
+                    -- Bounded range: otherwise the planner scans the whole
+                    -- track_id index to avoid sorting groups
+                    AND downloaded_at <= datetime('now')
                 GROUP BY track_id
                 ORDER BY download_count DESC
                 LIMIT ?
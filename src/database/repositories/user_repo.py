@@ -1,8 +1,10 @@
 """User repository for database operations."""
 import secrets
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+from datetime import datetime, date, timedelta
+from typing import Optional, List, Dict, Any, AsyncIterator
 from src.database.connection import db
+from src.database.repositories.entitlements_repo import entitlements_repo
+from src.middlewares.user_activity import user_activity
 from src.utils.logger import logger
 
 
@@ -26,20 +28,22 @@ class UserRepository:
     ) -> bool:
         """Create new user or update existing. Returns True if user is new."""
         referral_code = secrets.token_urlsafe(8)
+        now = datetime.now()
 
         try:
-            # Check if user exists
-            existing = await self.get_user(user_id)
-            is_new = existing is None
-
-            await db.execute("""
+            # Insert only if missing - rowcount tells whether the user is new
+            result = await db.execute("""
                 INSERT INTO users (id, username, first_name, referral_code, referred_by, last_seen)
                 VALUES (?, ?, ?, ?, ?, ?)
-                ON CONFLICT(id) DO UPDATE SET
-                    username = excluded.username,
-                    first_name = excluded.first_name,
-                    last_seen = excluded.last_seen
-            """, (user_id, username, first_name, referral_code, referrer_id, datetime.now()))
+                ON CONFLICT(id) DO NOTHING
+            """, (user_id, username, first_name, referral_code, referrer_id, now))
+            is_new = result.rowcount > 0
+
+            if not is_new:
+                await db.execute("""
+                    UPDATE users SET username = ?, first_name = ?, last_seen = ?, reachable = 1, blocked_at = NULL
+                    WHERE id = ?
+                """, (username, first_name, now, user_id))
 
             # Create referral relationship if new user and has referrer
             if is_new and referrer_id and referrer_id != user_id:
@@ -49,6 +53,8 @@ class UserRepository:
                 """, (referrer_id, user_id))
 
             await db.commit()
+            if is_new:
+                entitlements_repo.invalidate(user_id)
             return is_new
         except Exception as e:
             logger.error(f"Error creating user {user_id}: {e}")
@@ -83,11 +89,59 @@ class UserRepository:
         row = await db.fetchone("SELECT COUNT(*) as cnt FROM users")
         return row["cnt"] if row else 0
 
+    async def get_reachable_count(self) -> int:
+        """Get count of users the bot can message."""
+        row = await db.fetchone("SELECT COUNT(*) as cnt FROM users WHERE reachable = 1")
+        return row["cnt"] if row else 0
+
     async def get_all_user_ids(self) -> List[int]:
         """Get all user IDs for mailing."""
         rows = await db.fetchall("SELECT id FROM users")
         return [row["id"] for row in rows]
 
+    async def iter_reachable_user_ids(self, batch_size: int = 1000) -> AsyncIterator[int]:
+        """Stream IDs of users the bot can message, in ID order."""
+        last_id = 0
+        while True:
+            rows = await db.fetchall("""
+                SELECT id FROM users
+                WHERE reachable = 1 AND id > ?
+                ORDER BY id
+                LIMIT ?
+            """, (last_id, batch_size))
+            if not rows:
+                return
+            for row in rows:
+                yield row["id"]
+            last_id = rows[-1]["id"]
+
+    async def mark_unreachable(self, user_id: int):
+        """Mark user as unreachable (blocked the bot or deactivated)."""
+        # Activity recorded before the 403 must not mark the user reachable again
+        user_activity.discard(user_id)
+        result = await db.execute("""
+            UPDATE users SET reachable = 0, blocked_at = COALESCE(blocked_at, CURRENT_TIMESTAMP)
+            WHERE id = ? AND reachable = 1
+        """, (user_id,))
+        await db.commit()
+        if result.rowcount:
+            logger.info(f"User {user_id} marked unreachable")
+
+    async def get_reachability_stats(self) -> Dict[str, int]:
+        """Get counts of reachable/unreachable users."""
+        row = await db.fetchone("""
+            SELECT
+                COUNT(*) as total,
+                SUM(CASE WHEN reachable = 1 THEN 1 ELSE 0 END) as reachable,
+                SUM(CASE WHEN reachable = 0 THEN 1 ELSE 0 END) as unreachable,
+                SUM(CASE WHEN blocked_at >= datetime('now', '-1 day') THEN 1 ELSE 0 END) as blocked_day,
+                SUM(CASE WHEN blocked_at >= datetime('now', '-7 days') THEN 1 ELSE 0 END) as blocked_week
+            FROM users
+        """)
+        return {key: (row[key] or 0) if row else 0 for key in (
+            "total", "reachable", "unreachable", "blocked_day", "blocked_week"
+        )}
+
     async def get_active_users(self, minutes: int = 60) -> int:
         """Get count of users active in last N minutes."""
         row = await db.fetchone("""
@@ -108,16 +162,8 @@ class UserRepository:
 
     async def is_premium(self, user_id: int) -> bool:
         """Check if user has active premium."""
-        row = await db.fetchone("""
-            SELECT is_premium, premium_until FROM users WHERE id = ?
-        """, (user_id,))
-        if not row:
-            return False
-        if not row["is_premium"]:
-            return False
-        if row["premium_until"]:
-            return datetime.fromisoformat(row["premium_until"]) > datetime.now()
-        return True
+        entitlements = await entitlements_repo.get(user_id)
+        return entitlements.is_premium
 
     async def set_premium(self, user_id: int, is_premium: bool = True, premium_until: datetime = None):
         """Set user premium status."""
@@ -125,6 +171,30 @@ class UserRepository:
             UPDATE users SET is_premium = ?, premium_until = ? WHERE id = ?
         """, (1 if is_premium else 0, premium_until, user_id))
         await db.commit()
+        entitlements_repo.invalidate(user_id)
+
+    async def extend_premium(self, user_id: int, days: int) -> datetime:
+        """
+        Grant premium for given days, extending an active subscription.
+
+        Returns:
+            New premium expiry date
+        """
+        user = await self.get_user(user_id)
+        current_until = None
+
+        if user and user.get("is_premium") and user.get("premium_until"):
+            current_until = user["premium_until"]
+            if isinstance(current_until, str):
+                current_until = datetime.fromisoformat(current_until)
+
+        if current_until and current_until > datetime.now():
+            new_until = current_until + timedelta(days=days)
+        else:
+            new_until = datetime.now() + timedelta(days=days)
+
+        await self.set_premium(user_id, True, new_until)
+        return new_until
 
     async def log_payment(
         self,
@@ -132,19 +202,50 @@ class UserRepository:
         amount: int,
         currency: str,
         payment_type: str,
-        payload: str
+        payload: str,
+        payment_system: str = None,
+        external_id: str = None
     ):
         """Log a payment to database."""
         try:
-            await db.execute("""
-                INSERT INTO payments (user_id, amount, currency, payment_type, payload, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (user_id, amount, currency, payment_type, payload, datetime.now()))
-            await db.commit()
-            logger.info(f"Payment logged: user={user_id}, amount={amount}, type={payment_type}")
+            await self.insert_payment(
+                user_id, amount, currency, payment_type, payload, payment_system, external_id
+            )
         except Exception as e:
             logger.error(f"Error logging payment: {e}")
 
+    async def insert_payment(
+        self,
+        user_id: int,
+        amount: float,
+        currency: str,
+        payment_type: str,
+        payload: str,
+        payment_system: str = None,
+        external_id: str = None
+    ) -> bool:
+        """
+        Insert a payment, ignoring one whose external (provider) ID is already logged.
+
+        Returns:
+            True if the payment was inserted, False for a duplicate
+        """
+        cursor = await db.execute("""
+            INSERT OR IGNORE INTO payments (
+                user_id, amount, currency, payment_type, payment_system,
+                external_id, payload, created_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            user_id, amount, currency, payment_type, payment_system,
+            external_id, payload, datetime.now()
+        ))
+        await db.commit()
+        if cursor.rowcount == 0:
+            return False
+        logger.info(f"Payment logged: user={user_id}, amount={amount}, type={payment_type}")
+        return True
+
     async def get_by_referral_code(self, code: str) -> Optional[Dict[str, Any]]:
         """Get user by referral code."""
         row = await db.fetchone(
@@ -168,14 +269,12 @@ class UserRepository:
             (count, user_id)
         )
         await db.commit()
+        entitlements_repo.invalidate(user_id)
 
     async def get_bonus_downloads(self, user_id: int) -> int:
         """Get user's bonus downloads."""
-        row = await db.fetchone(
-            "SELECT bonus_downloads FROM users WHERE id = ?",
-            (user_id,)
-        )
-        return row["bonus_downloads"] if row else 0
+        entitlements = await entitlements_repo.get(user_id)
+        return entitlements.bonus_downloads
 
     async def use_bonus_download(self, user_id: int) -> bool:
         """Use one bonus download. Returns True if successful."""
@@ -184,8 +283,24 @@ class UserRepository:
             WHERE id = ? AND bonus_downloads > 0
         """, (user_id,))
         await db.commit()
+        entitlements_repo.invalidate(user_id)
         return result.rowcount > 0
 
+    async def increment_recognize_count(self, user_id: int):
+        """Increment user's recognition count for today (resets on a new day)."""
+        today = date.today().isoformat()
+        await db.execute("""
+            UPDATE users SET
+                recognize_count = CASE
+                    WHEN last_recognize_date = ? THEN COALESCE(recognize_count, 0) + 1
+                    ELSE 1
+                END,
+                last_recognize_date = ?
+            WHERE id = ?
+        """, (today, today, user_id))
+        await db.commit()
+        entitlements_repo.invalidate(user_id)
+
     async def get_referral_count(self, user_id: int) -> int:
         """Get count of users referred by this user."""
         row = await db.fetchone(
@@ -215,11 +330,8 @@ class UserRepository:
 
     async def get_user_language(self, user_id: int) -> str:
         """Get user's preferred language."""
-        row = await db.fetchone(
-            "SELECT language FROM users WHERE id = ?",
-            (user_id,)
-        )
-        return row["language"] if row and row["language"] else "ru"
+        entitlements = await entitlements_repo.get(user_id)
+        return entitlements.language
 
     async def set_user_language(self, user_id: int, language: str):
         """Set user's preferred language."""
@@ -228,6 +340,7 @@ class UserRepository:
             (language, user_id)
         )
         await db.commit()
+        entitlements_repo.update(user_id, language=language)
         logger.info(f"User {user_id} set language to {language}")
 
 
@@ -0,0 +1,108 @@
+"""Dispatcher with concurrent processing and per-chat ordering."""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import Update
+
+
+class _ChatQueue:
+    """Updates of one chat waiting for (or holding) its turn."""
+
+    __slots__ = ("lock", "depth")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()  # Wakes waiters in FIFO order
+        self.depth = 0
+
+
+class OrderedDispatcher(Dispatcher):
+    """
+    Dispatcher that processes updates of different chats concurrently
+    while keeping updates of the same chat strictly sequential.
+
+    Polling and webhook both spawn a task per update and call feed_update,
+    so the ordering is enforced here: an update first waits for the previous
+    update of its chat, then for a free slot out of ``max_concurrency``.
+    Updates queued behind their own chat don't occupy global slots, so one
+    slow download never blocks other users.
+    """
+
+    def __init__(self, *args: Any, max_concurrency: int = 100, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._chat_queues: Dict[int, _ChatQueue] = {}
+        self._wait_times: Deque[float] = deque(maxlen=1000)
+        self._in_flight = 0
+        self._processed = 0
+        self._max_depth = 0
+
+    @staticmethod
+    def _ordering_key(update: Update) -> Optional[int]:
+        """Get chat (or user) ID that update must be ordered by."""
+        context = UserContextMiddleware.resolve_event_context(update)
+        if context.chat:
+            return context.chat.id
+        if context.user:
+            return context.user.id
+        return None
+
+    async def feed_update(self, bot: Bot, update: Update, **kwargs: Any) -> Any:
+        """Process update after previous updates of the same chat."""
+        enqueued_at = time.monotonic()
+        key = self._ordering_key(update)
+
+        if key is None:
+            return await self._feed_with_slot(bot, update, enqueued_at, **kwargs)
+
+        queue = self._chat_queues.get(key)
+        if queue is None:
+            queue = self._chat_queues[key] = _ChatQueue()
+        queue.depth += 1
+        if queue.depth > self._max_depth:
+            self._max_depth = queue.depth
+
+        try:
+            async with queue.lock:
+                return await self._feed_with_slot(bot, update, enqueued_at, **kwargs)
+        finally:
+            queue.depth -= 1
+            if not queue.depth:
+                del self._chat_queues[key]
+
+    async def _feed_with_slot(self, bot: Bot, update: Update, enqueued_at: float, **kwargs: Any) -> Any:
+        """Wait for a global slot and process update."""
+        async with self._semaphore:
+            self._wait_times.append(time.monotonic() - enqueued_at)
+            self._in_flight += 1
+            try:
+                return await super().feed_update(bot, update, **kwargs)
+            finally:
+                self._in_flight -= 1
+                self._processed += 1
+
+    def stats(self) -> dict:
+        """Get queue statistics (wait times in milliseconds)."""
+        waits = sorted(self._wait_times)
+        queued = sum(queue.depth for queue in self._chat_queues.values())
+
+        def pct(value: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(len(waits) * value))] * 1000
+
+        return {
+            "in_flight": self._in_flight,
+            "waiting": max(0, queued - self._in_flight),
+            "active_chats": len(self._chat_queues),
+            "max_chat_depth": self._max_depth,
+            "max_concurrency": self.max_concurrency,
+            "processed": self._processed,
+            "wait_p50_ms": pct(0.5),
+            "wait_p95_ms": pct(0.95),
+            "wait_max_ms": waits[-1] * 1000 if waits else 0.0,
+        }
@@ -1,10 +1,13 @@
 """YouTube downloader module for MP3 files."""
 import os
 import asyncio
-from pathlib import Path
-from yt_dlp import YoutubeDL
+import time
 from src.config import settings
 from src.utils.logger import logger
+from src.utils.metrics import DOWNLOAD_ERRORS, DOWNLOAD_SECONDS
+
+_FETCH = DOWNLOAD_SECONDS.labels("fetch")
+_TRANSCODE = DOWNLOAD_SECONDS.labels("transcode")
 
 
 class YouTubeDownloader:
@@ -12,8 +15,6 @@ class YouTubeDownloader:
 
     def __init__(self):
         """Initialize YouTubeDownloader."""
-        Path(settings.TEMP_DIR).mkdir(parents=True, exist_ok=True)
-
         self.ydl_opts = {
             'format': 'bestaudio/best',
             'outtmpl': f'{settings.TEMP_DIR}/%(id)s.%(ext)s',
@@ -40,7 +41,7 @@ class YouTubeDownloader:
             Exception: If download fails or file too large
         """
         try:
-            logger.info(f"Starting download for video: {video_id}")
+            logger.info("Starting download for video: %s", video_id)
 
             # Run in executor to avoid blocking
             loop = asyncio.get_event_loop()
@@ -48,10 +49,11 @@ class YouTubeDownloader:
                 None, self._download_sync, video_id
             )
 
-            logger.info(f"Successfully downloaded: {file_path}")
+            logger.info("Successfully downloaded: %s", file_path)
             return file_path
 
         except Exception as e:
+            DOWNLOAD_ERRORS.inc()
             logger.error(f"Download error for {video_id}: {e}")
             raise
 
@@ -59,11 +61,28 @@ class YouTubeDownloader:
         """Synchronous download (runs in executor)."""
         try:
             url = f"https://youtube.com/watch?v={video_id}"
-            logger.info(f"Downloading from: {url}")
+            logger.info("Downloading from: %s", url)
+
+            # Time fetch and transcode separately: the progress hook reports
+            # the end of the download, FFmpeg runs after it
+            started = time.perf_counter()
+            fetched_at = []
 
-            with YoutubeDL(self.ydl_opts) as ydl:
+            def on_progress(progress: dict):
+                if progress.get("status") == "finished" and not fetched_at:
+                    fetched_at.append(time.perf_counter())
+
+            # Slow to import, loaded on first use (see src/utils/startup.py)
+            from yt_dlp import YoutubeDL
+
+            with YoutubeDL({**self.ydl_opts, 'progress_hooks': [on_progress]}) as ydl:
                 info = ydl.extract_info(url, download=True)
 
+                finished = time.perf_counter()
+                fetched = fetched_at[0] if fetched_at else finished
+                _FETCH.observe(fetched - started)
+                _TRANSCODE.observe(finished - fetched)
+
                 # Get filename
                 filename = ydl.prepare_filename(info)
                 mp3_file = filename.rsplit('.', 1)[0] + '.mp3'
@@ -74,7 +93,7 @@ class YouTubeDownloader:
 
                 # Check file size
                 file_size = os.path.getsize(mp3_file)
-                logger.info(f"Downloaded file size: {file_size} bytes")
+                logger.info("Downloaded file size: %s bytes", file_size)
 
                 if file_size > settings.MAX_FILE_SIZE:
                     os.remove(mp3_file)
@@ -83,7 +102,7 @@ class YouTubeDownloader:
                         f"(limit: {settings.MAX_FILE_SIZE})"
                     )
 
-                logger.info(f"Download complete: {mp3_file}")
+                logger.info("Download complete: %s", mp3_file)
                 return mp3_file
 
         except Exception as e:
@@ -1,15 +1,22 @@
 """Admin panel and commands."""
+import html
 from datetime import datetime, timedelta
 from aiogram import Router, F
-from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, BufferedInputFile
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from src.config import settings
 from src.utils.logger import logger
+from src.database import db
 from src.database.repositories import user_repo, download_repo, stats_repo
-from src.bot import bot
+from src.bot import bot, dp
+from src.middlewares import outbound
+from src.services.broadcast import broadcast_service
+from src.utils.reachability import format_reachability
+from src.utils.loop_monitor import loop_monitor
+from src.utils.profiler import profiler, parse_duration, top_functions
 
 # Track bot start time
 BOT_START_TIME = datetime.now()
@@ -103,10 +110,154 @@ async def stats_command(message: Message):
         f"  • Скачиваний: {total_downloads}\n"
     )
 
+    queue = dp.stats()
+    text += (
+        f"\n⚙️ <b>Обработка апдейтов:</b>\n"
+        f"  • В работе: {queue['in_flight']}/{queue['max_concurrency']}\n"
+        f"  • В очереди: {queue['waiting']} (чатов: {queue['active_chats']})\n"
+        f"  • Ожидание p50/p95: {queue['wait_p50_ms']:.0f}/{queue['wait_p95_ms']:.0f} мс\n"
+    )
+
+    sends = outbound.stats()
+    text += (
+        f"\n📤 <b>Исходящие сообщения:</b>\n"
+        f"  • Отправлено: {sends['sent']} (с ожиданием: {sends['delayed']}, "
+        f"в среднем {sends['avg_delay_ms']:.0f} мс)\n"
+        f"  • В очереди: {sends['queued_interactive']} ответов, {sends['queued_bulk']} рассылки\n"
+        f"  • Flood control (429): {sends['retry_after']}\n"
+    )
+
     await message.answer(text)
     logger.info(f"Stats viewed by admin {message.from_user.id}")
 
 
+@router.message(Command("reachability"))
+async def reachability_command(message: Message):
+    """Show how many users the bot can still message."""
+    if not is_admin(message.from_user.id):
+        await message.answer("❌ Доступ запрещён")
+        return
+
+    stats = await user_repo.get_reachability_stats()
+    await message.answer(format_reachability(stats))
+
+
+@router.message(Command("loop_monitor"))
+async def loop_monitor_command(message: Message):
+    """Show event loop lag, turn the monitor on/off."""
+    if not is_admin(message.from_user.id):
+        await message.answer("❌ Доступ запрещён")
+        return
+
+    args = message.text.split()
+    if len(args) > 1 and args[1] in ("on", "off"):
+        if args[1] == "on":
+            loop_monitor.start()
+        else:
+            await loop_monitor.stop()
+        logger.info(f"Loop monitor turned {args[1]} by admin {message.from_user.id}")
+
+    stats = loop_monitor.stats()
+    text = (
+        "🩺 <b>EVENT LOOP</b>\n\n"
+        f"Монитор: {'включён' if stats['enabled'] else 'выключен'} "
+        f"(порог {stats['threshold_ms']:.0f} мс)\n"
+        f"Задержка p50/p99: {stats['lag_p50_ms']:.1f}/{stats['lag_p99_ms']:.1f} мс\n"
+        f"Максимум: {stats['lag_max_ms']:.0f} мс\n"
+        f"Блокировок: {stats['stalls']}\n"
+    )
+    if stats["top_sites"]:
+        text += "\n<b>Где блокируется:</b>\n"
+        for site, count in stats["top_sites"]:
+            text += f"  • <code>{html.escape(site)}</code> - {count}\n"
+    text += "\n<code>/loop_monitor on|off</code>"
+
+    await message.answer(text)
+
+
+@router.message(Command("db_stats"))
+async def db_stats_command(message: Message):
+    """Show slowest DB statements, turn query timing on/off."""
+    if not is_admin(message.from_user.id):
+        await message.answer("❌ Доступ запрещён")
+        return
+
+    args = message.text.split()
+    action = args[1] if len(args) > 1 else "total"
+    if action == "on":
+        db.enable_query_stats(settings.DB_SLOW_QUERY_MS / 1000)
+    elif action == "off":
+        db.disable_query_stats()
+    elif action == "reset" and db.query_stats:
+        db.query_stats.reset()
+    if action in ("on", "off", "reset"):
+        logger.info(f"DB stats {action} by admin {message.from_user.id}")
+
+    if db.query_stats is None:
+        await message.answer(
+            "🗄 <b>ЗАПРОСЫ К БД</b>\n\n"
+            "Сбор статистики выключен.\n"
+            "<code>/db_stats on</code> - включить"
+        )
+        return
+
+    order_by = action if action in ("count", "p95", "max") else "total"
+    top = db.query_stats.top(limit=8, order_by=order_by)
+    text = (
+        f"🗄 <b>ЗАПРОСЫ К БД</b> (по {order_by})\n"
+        f"Медленных (&gt;{db.query_stats.slow_threshold * 1000:.0f} мс): {db.query_stats.slow_count}\n\n"
+    )
+    for row in top:
+        sql = row["sql"] if len(row["sql"]) <= 160 else row["sql"][:157] + "..."
+        text += (
+            f"<code>{html.escape(sql)}</code>\n"
+            f"  {row['count']}× | всего {row['total_ms']:.0f} мс | "
+            f"p95 {row['p95_ms']:.1f} мс | max {row['max_ms']:.1f} мс\n"
+        )
+        if row["plan"]:
+            text += f"  📋 {html.escape('; '.join(row['plan']))[:200]}\n"
+        text += "\n"
+    if not top:
+        text += "Пока нет данных\n\n"
+    text += "<code>/db_stats count|p95|max|reset|off</code>"
+
+    await message.answer(text)
+
+
+@router.message(Command("profile"))
+async def profile_command(message: Message):
+    """Profile the running bot and send collapsed stacks."""
+    if not is_admin(message.from_user.id):
+        await message.answer("❌ Доступ запрещён")
+        return
+
+    args = message.text.split()
+    seconds = parse_duration(args[1] if len(args) > 1 else None)
+    if profiler.running:
+        await message.answer("⏳ Профилирование уже идёт")
+        return
+
+    await message.answer(f"⏳ Профилирование {seconds} с...")
+    logger.info(f"Profiling for {seconds}s started by admin {message.from_user.id}")
+    try:
+        text, samples = await profiler.profile(seconds)
+    except RuntimeError:
+        # Started by another admin or /debug/profile while we answered
+        await message.answer("⏳ Профилирование уже идёт")
+        return
+
+    caption = f"🔬 <b>Профиль за {seconds} с</b> ({samples} замеров)\n\n"
+    for function, count in top_functions(text, limit=5):
+        caption += f"<code>{html.escape(function)}</code> - {count}\n"
+    caption += "\nFlamegraph: speedscope.app или flamegraph.pl"
+
+    filename = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed.txt"
+    await message.answer_document(
+        BufferedInputFile(text.encode() or b"\n", filename=filename),
+        caption=caption[:1024]
+    )
+
+
 @router.message(Command("users"))
 async def users_command(message: Message):
     """Show user count."""
@@ -296,13 +447,19 @@ async def help_admin_command(message: Message):
         "  • Всего пользователей\n"
         "  • Активных последний час\n\n"
         "<b>/top</b> - ТОП 10 пользователей по скачиваниям\n\n"
+        "<b>/reachability</b> - Сколько пользователей не заблокировали бота\n\n"
+        "<b>/loop_monitor [on|off]</b> - Задержки event loop и блокирующие вызовы\n\n"
+        "<b>/db_stats [on|off|reset]</b> - Самые долгие запросы к БД и их планы\n\n"
+        "<b>/profile [секунды]</b> - Профиль работающего бота (collapsed stacks)\n\n"
         "<b>/user_stats &lt;ID&gt;</b> - Статистика пользователя:\n"
         "  /user_stats 123456789\n\n"
         "<b>/setpremium &lt;ID&gt; [дни]</b> - Выдать премиум:\n"
         "  /setpremium 123456789 - 30 дней (по умолчанию)\n"
         "  /setpremium 123456789 90 - на 90 дней\n"
         "  /setpremium 123456789 0 - забрать премиум\n\n"
-        "<b>/mailing</b> - Массовая рассылка сообщений всем пользователям\n\n"
+        "<b>/mailing</b> - Массовая рассылка сообщений всем пользователям\n"
+        "  (идёт в фоне, продолжается после перезапуска)\n\n"
+        "<b>/mailing_stop &lt;ID&gt;</b> - Остановить рассылку\n\n"
         "<b>/reset_stats</b> - Сбросить всю статистику\n\n"
         "<b>/help_admin</b> - Эта справка\n"
     )
@@ -318,7 +475,7 @@ async def mailing_command(message: Message, state: FSMContext):
         await message.answer("❌ Доступ запрещён")
         return
 
-    user_count = await user_repo.get_user_count()
+    user_count = await user_repo.get_reachable_count()
 
     text = (
         f"📢 <b>МАССОВАЯ РАССЫЛКА</b>\n\n"
@@ -350,49 +507,39 @@ async def mailing_message_handler(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    # Get all users
-    users = await user_repo.get_all_user_ids()
-    total = len(users)
-
-    if total == 0:
-        await message.answer("❌ Нет пользователей для рассылки")
-        await state.clear()
-        return
-
-    # Send message to all users
-    sent = 0
-    failed = 0
+    await state.clear()
 
-    await message.answer(
-        f"⏳ Отправляю сообщение {total} пользователям...\n\n"
-        f"Пожалуйста, дождись завершения рассылки."
+    # Sending runs in background - the handler returns immediately
+    broadcast_id = await broadcast_service.start(
+        bot,
+        admin_id=message.from_user.id,
+        from_chat_id=message.chat.id,
+        message_id=message.message_id
     )
+    logger.info(f"Mailing #{broadcast_id} started by admin {message.from_user.id}")
 
-    for user_id in users:
-        try:
-            # Copy message to all users
-            await bot.copy_message(
-                chat_id=user_id,
-                from_chat_id=message.chat.id,
-                message_id=message.message_id
-            )
-            sent += 1
-        except Exception as e:
-            logger.warning(f"Failed to send message to {user_id}: {e}")
-            failed += 1
-
-    # Report results
-    result_text = (
-        f"✅ <b>РАССЫЛКА ЗАВЕРШЕНА</b>\n\n"
-        f"✅ Отправлено: {sent}/{total}\n"
-        f"❌ Ошибок: {failed}\n\n"
-        f"Успешность: {(sent/total*100):.1f}%"
-    )
 
-    await message.answer(result_text)
-    logger.info(f"Mailing completed: sent {sent}/{total} by admin {message.from_user.id}")
+@router.message(Command("mailing_stop"))
+async def mailing_stop_command(message: Message):
+    """Stop running broadcast."""
+    if not is_admin(message.from_user.id):
+        await message.answer("❌ Доступ запрещён")
+        return
+
+    args = message.text.split()
+    if len(args) < 2 or not args[1].isdigit():
+        running = broadcast_service.running_ids()
+        await message.answer(
+            "Использование: <code>/mailing_stop ID</code>\n\n"
+            f"Активные рассылки: {', '.join(f'#{i}' for i in running) or 'нет'}"
+        )
+        return
 
-    await state.clear()
+    broadcast_id = int(args[1])
+    if await broadcast_service.cancel(broadcast_id):
+        await message.answer(f"⛔ Рассылка #{broadcast_id} остановлена")
+    else:
+        await message.answer(f"❌ Рассылка #{broadcast_id} не найдена или уже завершена")
 
 
 @router.message(Command("setpremium"))
@@ -724,7 +871,7 @@ async def admin_callback_handler(callback: CallbackQuery, state: FSMContext):
 
     elif action == "mailing":
         # Start mailing
-        user_count = await user_repo.get_user_count()
+        user_count = await user_repo.get_reachable_count()
 
         text = (
             f"📢 <b>МАССОВАЯ РАССЫЛКА</b>\n\n"
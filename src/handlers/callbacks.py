@@ -7,8 +7,9 @@ from src.downloaders.youtube_dl import youtube_downloader
 from src.keyboards import create_track_keyboard, create_video_keyboard
 from src.utils.cache import cache
 from src.utils.logger import logger
+from src.utils.metrics import UPLOAD_SECONDS
 from src.config import settings
-from src.database.repositories import user_repo, download_repo, stats_repo
+from src.database.repositories import user_repo, download_repo, stats_repo, entitlements_repo
 
 
 def create_after_download_keyboard(query: str = None, track_id: str = None) -> InlineKeyboardMarkup:
@@ -45,20 +46,21 @@ async def check_download_limit(user_id: int) -> tuple[bool, int, int]:
     Returns:
         (can_download, remaining, used_bonus)
     """
+    # One cached lookup covers premium, daily count and bonus
+    entitlements = await entitlements_repo.get(user_id)
+
     # Check if premium
-    is_premium = await user_repo.is_premium(user_id)
-    if is_premium:
+    if entitlements.is_premium:
         return True, -1, 0  # -1 = unlimited
 
     # Check daily limit
-    today_count = await download_repo.get_today_count(user_id)
-    remaining = settings.FREE_DAILY_LIMIT - today_count
+    remaining = settings.FREE_DAILY_LIMIT - entitlements.today_downloads
 
     if remaining > 0:
         return True, remaining, 0
 
     # Check bonus downloads
-    bonus = await user_repo.get_bonus_downloads(user_id)
+    bonus = entitlements.bonus_downloads
     if bonus > 0:
         return True, 0, bonus
 
@@ -84,12 +86,12 @@ async def download_and_send_track(callback: CallbackQuery, track):
             f"⭐ /premium - безлимитный доступ",
             show_alert=True
         )
-        logger.info(f"User {user_id} hit download limit")
+        logger.info("User %s hit download limit", user_id)
         return
 
     logger.info(
-        f"Downloading track for user {user_id}: "
-        f"{track.artist} - {track.title}"
+        "Downloading track for user %s: %s - %s",
+        user_id, track.artist, track.title
     )
 
     # Show loading message (as separate message, not editing original)
@@ -185,21 +187,22 @@ async def download_and_send_track(callback: CallbackQuery, track):
 
     # Send audio to user
     try:
-        logger.info(f"Sending audio to user {user_id}: {file_path}")
+        logger.info("Sending audio to user %s: %s", user_id, file_path)
 
         audio_file = FSInputFile(file_path)
 
         # Get search query for "search again" button
         query = cache.get(f"query:{user_id}")
 
-        await callback.message.answer_audio(
-            audio=audio_file,
-            performer=track.artist,
-            title=track.title,
-            duration=track.duration,
-            caption="🎵 Любая музыка за секунды @UspMusicFinder_bot",
-            reply_markup=create_after_download_keyboard(query, track.id)
-        )
+        with UPLOAD_SECONDS.time():
+            await callback.message.answer_audio(
+                audio=audio_file,
+                performer=track.artist,
+                title=track.title,
+                duration=track.duration,
+                caption="🎵 Любая музыка за секунды @UspMusicFinder_bot",
+                reply_markup=create_after_download_keyboard(query, track.id)
+            )
 
         # Record download in database
         await download_repo.add_download(
@@ -220,7 +223,7 @@ async def download_and_send_track(callback: CallbackQuery, track):
         # Use bonus if needed
         if bonus > 0:
             await user_repo.use_bonus_download(user_id)
-            logger.info(f"Used bonus download for user {user_id}")
+            logger.info("Used bonus download for user %s", user_id)
 
         # Delete loading message (not the original track list)
         try:
@@ -229,7 +232,7 @@ async def download_and_send_track(callback: CallbackQuery, track):
             pass
 
         await callback.answer("✅ Готово!")
-        logger.info(f"Audio sent successfully to user {user_id}")
+        logger.info("Audio sent successfully to user %s", user_id)
 
     except Exception as e:
         logger.error(f"Error sending audio: {e}")
@@ -248,7 +251,7 @@ async def download_and_send_track(callback: CallbackQuery, track):
         if 'file_path' in locals() and os.path.exists(file_path):
             try:
                 os.remove(file_path)
-                logger.debug(f"Cleaned up file: {file_path}")
+                logger.debug("Cleaned up file: %s", file_path)
             except:
                 pass
 
@@ -298,7 +301,7 @@ async def pagination_callback_handler(callback: CallbackQuery):
 
         await callback.message.edit_text(text, reply_markup=keyboard)
         await callback.answer()
-        logger.info(f"User {user_id} switched to page {page + 1}")
+        logger.info("User %s switched to page %s", user_id, page + 1)
 
     except Exception as e:
         logger.error(f"Pagination error: {e}")
@@ -318,7 +321,7 @@ async def track_callback_handler(callback: CallbackQuery):
         user_id = callback.from_user.id
         username = callback.from_user.username or ""
 
-        logger.info(f"User {user_id} selected track #{track_num}")
+        logger.info("User %s selected track #%s", user_id, track_num)
 
         # Get search results from cache
         cache_key = f"search:{user_id}"
@@ -358,12 +361,12 @@ async def track_callback_handler(callback: CallbackQuery):
                 f"⭐ /premium - безлимитный доступ",
                 show_alert=True
             )
-            logger.info(f"User {user_id} hit download limit")
+            logger.info("User %s hit download limit", user_id)
             return
 
         logger.info(
-            f"Downloading track for user {user_id}: "
-            f"{track.artist} - {track.title}"
+            "Downloading track for user %s: %s - %s",
+            user_id, track.artist, track.title
         )
 
         # Show loading message as new message (don't edit track list)
@@ -457,21 +460,22 @@ async def track_callback_handler(callback: CallbackQuery):
 
         # Send audio to user
         try:
-            logger.info(f"Sending audio to user {user_id}: {file_path}")
+            logger.info("Sending audio to user %s: %s", user_id, file_path)
 
             audio_file = FSInputFile(file_path)
 
             # Get search query for "search again" button
             query = cache.get(f"query:{user_id}")
 
-            await callback.message.answer_audio(
-                audio=audio_file,
-                performer=track.artist,
-                title=track.title,
-                duration=track.duration,
-                caption="🎵 Любая музыка за секунды @UspMusicFinder_bot",
-                reply_markup=create_after_download_keyboard(query, track.id)
-            )
+            with UPLOAD_SECONDS.time():
+                await callback.message.answer_audio(
+                    audio=audio_file,
+                    performer=track.artist,
+                    title=track.title,
+                    duration=track.duration,
+                    caption="🎵 Любая музыка за секунды @UspMusicFinder_bot",
+                    reply_markup=create_after_download_keyboard(query, track.id)
+                )
 
             # Record download in database
             await download_repo.add_download(
@@ -494,16 +498,16 @@ async def track_callback_handler(callback: CallbackQuery):
             try:
                 await loading_msg.delete()
             except Exception as e:
-                logger.debug(f"Could not delete loading message: {e}")
+                logger.debug("Could not delete loading message: %s", e)
 
-            logger.info(f"Audio sent successfully to user {user_id}")
+            logger.info("Audio sent successfully to user %s", user_id)
 
         finally:
             # Clean up temporary file
             if os.path.exists(file_path):
                 try:
                     os.remove(file_path)
-                    logger.debug(f"Cleaned up temp file: {file_path}")
+                    logger.debug("Cleaned up temp file: %s", file_path)
                 except Exception as e:
                     logger.warning(f"Could not delete temp file {file_path}: {e}")
 
@@ -555,7 +559,7 @@ async def search_again_callback(callback: CallbackQuery):
 
     await callback.message.answer(text, reply_markup=keyboard)
     await callback.answer()
-    logger.info(f"User {user_id} used 'search again' button")
+    logger.info("User %s used 'search again' button", user_id)
 
 
 @router.callback_query(F.data.startswith("quick:"))
@@ -574,7 +578,7 @@ async def quick_command_callback(callback: CallbackQuery):
         keyboard = create_period_keyboard()
         await callback.message.answer(text, reply_markup=keyboard)
         await callback.answer()
-        logger.info(f"User {user_id} clicked quick:top")
+        logger.info("User %s clicked quick:top", user_id)
 
     elif command == "favorites":
         # Show favorites
@@ -592,7 +596,7 @@ async def quick_command_callback(callback: CallbackQuery):
         text += "\n/favorites - показать всё"
         await callback.message.answer(text)
         await callback.answer()
-        logger.info(f"User {user_id} clicked quick:favorites")
+        logger.info("User %s clicked quick:favorites", user_id)
 
     elif command == "history":
         # Show history
@@ -610,4 +614,4 @@ async def quick_command_callback(callback: CallbackQuery):
         text += "\n/history - показать всё"
         await callback.message.answer(text)
         await callback.answer()
-        logger.info(f"User {user_id} clicked quick:history")
+        logger.info("User %s clicked quick:history", user_id)
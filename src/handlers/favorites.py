@@ -6,6 +6,7 @@ from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKe
 from src.database.repositories import favorite_repo
 from src.utils.cache import cache
 from src.utils.logger import logger
+from src.utils.metrics import UPLOAD_SECONDS
 
 router = Router()
 
@@ -163,13 +164,14 @@ async def download_from_favorites_callback(callback: CallbackQuery):
         file_path = await youtube_downloader.download(track_id)
 
         audio_file = FSInputFile(file_path)
-        await callback.message.answer_audio(
-            audio=audio_file,
-            performer=artist,
-            title=title,
-            duration=duration,
-            caption="🎵 Любая музыка за секунды @UspMusicFinder_bot"
-        )
+        with UPLOAD_SECONDS.time():
+            await callback.message.answer_audio(
+                audio=audio_file,
+                performer=artist,
+                title=title,
+                duration=duration,
+                caption="🎵 Любая музыка за секунды @UspMusicFinder_bot"
+            )
 
         # Record download
         await download_repo.add_download(user_id, track_id, title, artist, duration)
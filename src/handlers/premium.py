@@ -1,5 +1,5 @@
 """Premium subscription and payments handler."""
-from datetime import datetime, timedelta
+from datetime import datetime
 from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.types import (
@@ -265,25 +265,8 @@ async def successful_payment_handler(message: Message):
         tariff = StarsPayment.get_tariff(tariff_id)
 
         if tariff:
-            days = tariff["days"]
-
-            # Check if user already has premium - extend it
-            user = await user_repo.get_user(user_id)
-            current_until = None
-
-            if user and user.get("is_premium") and user.get("premium_until"):
-                current_until = user["premium_until"]
-                if isinstance(current_until, str):
-                    current_until = datetime.fromisoformat(current_until)
-
-            # Calculate new expiry date
-            if current_until and current_until > datetime.now():
-                new_until = current_until + timedelta(days=days)
-            else:
-                new_until = datetime.now() + timedelta(days=days)
-
-            # Grant premium
-            await user_repo.set_premium(user_id, True, new_until)
+            # Grant premium (extends an active subscription)
+            new_until = await user_repo.extend_premium(user_id, tariff["days"])
 
             # Log payment
             await user_repo.log_payment(
@@ -1,5 +1,4 @@
 """Music recognition handler."""
-from datetime import datetime, date
 from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, ContentType
@@ -8,7 +7,7 @@ from aiogram.fsm.state import State, StatesGroup
 
 from src.bot import bot
 from src.services.music_recognition import music_recognition
-from src.database.repositories import user_repo
+from src.database.repositories import user_repo, entitlements_repo
 from src.utils.logger import logger
 
 router = Router()
@@ -61,50 +60,20 @@ async def check_recognize_limit(user_id: int) -> tuple[bool, int]:
     Check if user can use recognition.
     Returns (can_use, remaining_count).
     """
+    entitlements = await entitlements_repo.get(user_id)
+
     # Check if premium
-    is_premium = await user_repo.is_premium(user_id)
-    if is_premium:
+    if entitlements.is_premium:
         return True, -1  # Unlimited
 
-    # Get today's recognition count
-    user = await user_repo.get_user(user_id)
-    if not user:
-        return True, FREE_RECOGNIZE_LIMIT
-
-    # Check daily limit
-    today = date.today().isoformat()
-    last_recognize_date = user.get('last_recognize_date', '')
-    recognize_count = user.get('recognize_count', 0)
-
-    if last_recognize_date != today:
-        # New day - reset counter
-        recognize_count = 0
-
-    remaining = FREE_RECOGNIZE_LIMIT - recognize_count
+    # Daily counter is already reset for a new day by the entitlements loader
+    remaining = FREE_RECOGNIZE_LIMIT - entitlements.today_recognitions
     return remaining > 0, remaining
 
 
 async def increment_recognize_count(user_id: int):
     """Increment user's recognize count for today."""
-    from src.database.connection import db
-
-    today = date.today().isoformat()
-    user = await user_repo.get_user(user_id)
-
-    if not user:
-        return
-
-    last_date = user.get('last_recognize_date', '')
-    if last_date != today:
-        # New day - reset
-        count = 1
-    else:
-        count = user.get('recognize_count', 0) + 1
-
-    await db.execute("""
-        UPDATE users SET recognize_count = ?, last_recognize_date = ? WHERE id = ?
-    """, (count, today, user_id))
-    await db.commit()
+    await user_repo.increment_recognize_count(user_id)
 
 
 @router.message(Command("recognize"))
@@ -124,8 +93,8 @@ async def recognize_command(message: Message, state: FSMContext):
         )
         return
 
-    # Check if premium
-    is_premium = await user_repo.is_premium(user_id)
+    # Unlimited users get remaining == -1
+    is_premium = remaining < 0
     limit_text = "" if is_premium else f"\n📊 Осталось сегодня: {remaining}/{FREE_RECOGNIZE_LIMIT}"
 
     text = (
@@ -152,7 +121,7 @@ async def recognize_more_callback(callback: CallbackQuery, state: FSMContext):
         await callback.answer("Лимит распознаваний исчерпан. Купи Премиум!", show_alert=True)
         return
 
-    is_premium = await user_repo.is_premium(user_id)
+    is_premium = remaining < 0
     limit_text = "" if is_premium else f"\n📊 Осталось сегодня: {remaining}/{FREE_RECOGNIZE_LIMIT}"
 
     text = (
@@ -26,7 +26,7 @@ async def text_search_handler(message: Message):
 
     user_id = message.from_user.id
     username = message.from_user.username or ""
-    logger.info(f"User {user_id} searched: {query}")
+    logger.info("User %s searched: %s", user_id, query)
 
     # Check rate limit
     allowed, wait_seconds = rate_limiter.is_allowed(user_id)
@@ -64,7 +64,7 @@ async def text_search_handler(message: Message):
     cache.set(cache_key, tracks, ttl=600)
     # Also cache query for display
     cache.set(f"query:{user_id}", query, ttl=600)
-    logger.debug(f"Cached {len(tracks)} results for user {user_id}")
+    logger.debug("Cached %s results for user %s", len(tracks), user_id)
 
     # Show first page (tracks 1-10)
     page_tracks = tracks[:10]
@@ -91,4 +91,4 @@ async def text_search_handler(message: Message):
     keyboard = create_track_keyboard(page_tracks, page=0, total_tracks=total_tracks)
 
     await message.answer(text, reply_markup=keyboard)
-    logger.info(f"Shown {len(page_tracks)}/{total_tracks} results to user {user_id}")
+    logger.info("Shown %s/%s results to user %s", len(page_tracks), total_tracks, user_id)
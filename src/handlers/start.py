@@ -5,7 +5,9 @@ from aiogram.filters import Command, CommandObject, CommandStart
 from aiogram.types import Message, ReplyKeyboardMarkup, KeyboardButton, FSInputFile, InlineKeyboardMarkup, InlineKeyboardButton
 
 from src.database.repositories import user_repo, download_repo, stats_repo
+from src.handlers.callbacks import check_download_limit
 from src.utils.logger import logger
+from src.utils.metrics import UPLOAD_SECONDS
 from src.searchers.youtube import youtube_searcher
 from src.downloaders.youtube_dl import youtube_downloader
 from src.config import settings
@@ -35,28 +37,6 @@ def get_main_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
-async def check_download_limit(user_id: int) -> tuple[bool, int, int]:
-    """
-    Check if user can download.
-    Returns: (can_download, remaining, used_bonus)
-    """
-    is_premium = await user_repo.is_premium(user_id)
-    if is_premium:
-        return True, -1, 0
-
-    today_count = await download_repo.get_today_count(user_id)
-    remaining = settings.FREE_DAILY_LIMIT - today_count
-
-    if remaining > 0:
-        return True, remaining, 0
-
-    bonus = await user_repo.get_bonus_downloads(user_id)
-    if bonus > 0:
-        return True, 0, bonus
-
-    return False, 0, 0
-
-
 async def auto_search_and_download(message: Message, query: str, source: str = "deep_link"):
     """
     Автоматический поиск и скачивание первого трека.
@@ -146,15 +126,16 @@ async def auto_search_and_download(message: Message, query: str, source: str = "
         ])
 
         caption_text = "⚡ Быстрое скачивание /get" if source == "get_command" else "🎵 Найдено через интеграцию"
-        await message.answer_audio(
-            audio=audio_file,
-            performer=track.artist,
-            title=track.title,
-            duration=track.duration,
-            caption=f"{caption_text}\n\n"
-                    f"Любая музыка за секунды @UspMusicFinder_bot",
-            reply_markup=keyboard
-        )
+        with UPLOAD_SECONDS.time():
+            await message.answer_audio(
+                audio=audio_file,
+                performer=track.artist,
+                title=track.title,
+                duration=track.duration,
+                caption=f"{caption_text}\n\n"
+                        f"Любая музыка за секунды @UspMusicFinder_bot",
+                reply_markup=keyboard
+            )
 
         # Record download
         await download_repo.add_download(
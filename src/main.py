@@ -1,69 +1,136 @@
 ﻿"""Main application entry point."""
+# First, so that the timer covers the imports below
+from src.utils.startup import startup_timer, preload
+
 import asyncio
-from aiogram.fsm.storage.memory import MemoryStorage
 
-from src.bot import bot, dp
-from src.handlers import start, search, callbacks, admin, history, favorites, top, referral, recommendations, premium, recognize, api, language, stats
-from src.utils.logger import logger
-from src.utils.cleanup import create_cleanup_task
-from src.utils.sentry import init_sentry, capture_exception
-from src.utils.channel_poster import channel_poster
-from src.database import db
+with startup_timer.phase("import aiogram"):
+    from src.bot import bot, dp
+    from src.config import settings, ensure_directories
+    from src.utils.logger import logger
+
+with startup_timer.phase("import handlers"):
+    from src.handlers import start, search, callbacks, admin, history, favorites, top, referral, recommendations, premium, recognize, api, language, stats
+
+with startup_timer.phase("import services"):
+    from src.utils.cleanup import create_cleanup_task
+    from src.utils.reachability import create_reachability_task
+    from src.utils.sentry import init_sentry, capture_exception
+    from src.utils.metrics import start_metrics_server, STARTUP_SECONDS
+    from src.utils.loop_monitor import loop_monitor
+    from src.utils.channel_poster import channel_poster
+    from src.database import db
+    from src.middlewares import user_activity
+    from src.services.broadcast import broadcast_service
+
+
+def setup_routers():
+    """Include all routers into dispatcher (order matters!)."""
+    dp.include_router(admin.router)  # Admin first (higher priority)
+    dp.include_router(premium.router)  # Premium/payments (before start for pre_checkout)
+    dp.include_router(recognize.router)  # Music recognition
+    dp.include_router(language.router)  # Language selection
+    dp.include_router(start.router)
+    dp.include_router(top.router)  # TOP command
+    dp.include_router(referral.router)  # Referral system
+    dp.include_router(recommendations.router)  # Recommendations
+    dp.include_router(stats.router)  # User statistics
+    dp.include_router(history.router)
+    dp.include_router(favorites.router)
+    dp.include_router(search.router)
+    dp.include_router(api.router)
+    dp.include_router(callbacks.router)
+
+
+def startup_ready():
+    """Report startup time once updates can be received, then load heavy modules."""
+    logger.info(startup_timer.report())
+    for name, seconds in startup_timer.phases:
+        STARTUP_SECONDS.labels(name).set(seconds)
+    STARTUP_SECONDS.labels("total").set(startup_timer.total())
+    preload_task = asyncio.create_task(preload())
+    preload_task.add_done_callback(_preload_done)
+
+
+def _preload_done(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        logger.warning(f"Preloading modules failed: {task.exception()}")
 
 
 async def main():
     """Main function - startup the bot."""
     cleanup_task = None
+    reachability_task = None
     channel_task = None
+    metrics_runner = None
+
+    if settings.BOT_MODE == "webhook":
+        # Before anything starts: a bad worker setup must not resume broadcasts
+        from src.webhook import check_workers
+        check_workers()
+
+    ensure_directories()
 
     # Initialize Sentry error tracking
-    init_sentry()
+    with startup_timer.phase("sentry"):
+        init_sentry()
 
     try:
         # Connect to database
-        await db.connect()
-
-        # Setup FSM storage (in-memory)
-        storage = MemoryStorage()
-        dp.fsm.storage = storage
+        with startup_timer.phase("database"):
+            await db.connect()
 
         # Initialize localization
-        from src.locales import init_locales
-        init_locales()
-
-        # Include all routers (order matters!)
-        dp.include_router(admin.router)  # Admin first (higher priority)
-        dp.include_router(premium.router)  # Premium/payments (before start for pre_checkout)
-        dp.include_router(recognize.router)  # Music recognition
-        dp.include_router(language.router)  # Language selection
-        dp.include_router(start.router)
-        dp.include_router(top.router)  # TOP command
-        dp.include_router(referral.router)  # Referral system
-        dp.include_router(recommendations.router)  # Recommendations
-        dp.include_router(stats.router)  # User statistics
-        dp.include_router(history.router)
-        dp.include_router(favorites.router)
-        dp.include_router(search.router)
-        dp.include_router(api.router)
-        dp.include_router(callbacks.router)
-
-        # Delete webhook for polling mode
-        await bot.delete_webhook(drop_pending_updates=True)
+        with startup_timer.phase("locales"):
+            from src.locales import init_locales
+            init_locales()
+
+        with startup_timer.phase("routers"):
+            setup_routers()
 
         # Get bot info
-        bot_info = await bot.me()
+        with startup_timer.phase("telegram getMe"):
+            bot_info = await bot.me()
         logger.info(f"Bot started: @{bot_info.username}")
-        logger.info("Polling mode activated")
+
+        # Serve /metrics for Prometheus
+        if settings.METRICS_PORT:
+            metrics_runner = await start_metrics_server(
+                settings.METRICS_HOST, settings.METRICS_PORT + settings.WORKER_ID
+            )
+
+        # Watch for code blocking the event loop
+        if settings.LOOP_MONITOR:
+            loop_monitor.start()
 
         # Start cleanup task
         cleanup_task = create_cleanup_task(interval_seconds=3600, max_age_seconds=3600)
         logger.info("Cleanup task started (1 hour interval)")
 
-        # Start channel poster task
-        channel_task = asyncio.create_task(channel_poster.start())
+        # Start daily reachability report
+        reachability_task = create_reachability_task(settings.REACHABILITY_REPORT_INTERVAL)
+
+        # Start batched user activity writes
+        user_activity.start()
 
-        # Start polling
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        # Continue broadcasts interrupted by restart (those no other worker holds)
+        await broadcast_service.resume(bot)
+
+        # Daily channel post: one worker is enough
+        if settings.WORKER_ID == 0:
+            channel_task = asyncio.create_task(channel_poster.start())
+
+        if settings.BOT_MODE == "webhook":
+            from src.webhook import run_webhook
+            await run_webhook(bot, dp, on_ready=startup_ready)
+        else:
+            # Delete webhook for polling mode
+            with startup_timer.phase("telegram deleteWebhook"):
+                await bot.delete_webhook(drop_pending_updates=True)
+            logger.info("Polling mode activated")
+            startup_ready()
+
+            await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
 
     except Exception as e:
         logger.error(f"Startup error: {e}", exc_info=True)
@@ -78,10 +145,24 @@ async def main():
             except asyncio.CancelledError:
                 pass
 
+        if reachability_task:
+            reachability_task.cancel()
+
         # Stop channel poster
         if channel_task:
             await channel_poster.stop()
 
+        # Checkpoint running broadcasts (resumed on next start)
+        await broadcast_service.shutdown()
+
+        # Flush pending user activity before closing database
+        await user_activity.stop()
+
+        if metrics_runner:
+            await metrics_runner.cleanup()
+
+        await loop_monitor.stop()
+
         # Close database connection
         await db.disconnect()
 
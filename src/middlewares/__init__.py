@@ -0,0 +1,5 @@
+"""Aiogram middlewares."""
+from .user_activity import UserActivityMiddleware, user_activity
+from .outbound import OutboundRateMiddleware, bulk_traffic, outbound
+
+__all__ = ["UserActivityMiddleware", "user_activity", "OutboundRateMiddleware", "bulk_traffic", "outbound"]
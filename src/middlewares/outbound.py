@@ -0,0 +1,261 @@
+"""Outbound Telegram API pacing with global and per-chat budgets."""
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+from src.config import settings
+from src.utils.logger import logger
+
+INTERACTIVE = 0
+BULK = 1
+
+# Priority of sends made from the current task (replies are interactive)
+outbound_priority: ContextVar[int] = ContextVar("outbound_priority", default=INTERACTIVE)
+
+ChatId = Union[int, str]
+
+
+@contextmanager
+def bulk_traffic():
+    """Mark sends inside the block as bulk (mailing, channel posts)."""
+    token = outbound_priority.set(BULK)
+    try:
+        yield
+    finally:
+        outbound_priority.reset(token)
+
+
+class TokenBucket:
+    """Token bucket where tokens can be reserved ahead (goes negative)."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token, return seconds to wait until it is valid."""
+        self._refill(time.monotonic())
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def wait_time(self) -> float:
+        """Seconds until a whole token is available."""
+        self._refill(time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def pause(self, seconds: float):
+        """Make the next token available not earlier than in `seconds`."""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+    @property
+    def idle(self) -> bool:
+        """Bucket is full again - no need to keep it."""
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class OutboundScheduler:
+    """
+    Paces message sends to stay within Telegram limits.
+
+    Every send first takes a token from its chat bucket (1 msg/s with a
+    small burst by default), then waits for the global bucket (~30 msg/s).
+    Global tokens are handed out to interactive sends before bulk ones,
+    so replies don't queue behind a mailing.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        max_retries: int = 3,
+        max_retry_after: int = 60,
+    ):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: Dict[ChatId, TokenBucket] = {}
+        self._waiters: Tuple[Deque[asyncio.Future], Deque[asyncio.Future]] = (deque(), deque())
+        self._bulk_paused_until = 0.0
+        self._pump_task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stats = {"sent": 0, "delayed": 0, "wait_total": 0.0, "retry_after": 0}
+
+    def _chat_bucket(self, chat_id: ChatId) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= 10000:
+                self._chats = {key: b for key, b in self._chats.items() if not b.idle}
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def acquire(self, chat_id: Optional[ChatId], priority: int = INTERACTIVE):
+        """Wait until a message to chat may be sent."""
+        started = time.monotonic()
+
+        if chat_id is not None:
+            delay = self._chat_bucket(chat_id).reserve()
+            if delay:
+                await asyncio.sleep(delay)
+
+        bulk_blocked = priority == BULK and (self._waiters[INTERACTIVE] or self._bulk_paused_until > time.monotonic())
+        if not self._waiters[priority] and not bulk_blocked and self._global.wait_time() == 0:
+            self._global.reserve()
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._waiters[priority].append(future)
+            self._wakeup.set()
+            if self._pump_task is None or self._pump_task.done():
+                self._pump_task = asyncio.create_task(self._pump())
+            await future
+
+        waited = time.monotonic() - started
+        self._stats["sent"] += 1
+        if waited > 0.001:
+            self._stats["delayed"] += 1
+            self._stats["wait_total"] += waited
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        """Pop next waiting send, interactive first."""
+        for priority in (INTERACTIVE, BULK):
+            if priority == BULK and self._bulk_paused_until > time.monotonic():
+                return None
+            queue = self._waiters[priority]
+            while queue:
+                future = queue.popleft()
+                if not future.done():
+                    return future
+        return None
+
+    async def _pump(self):
+        """Hand out global tokens to waiting sends."""
+        while self._waiters[INTERACTIVE] or self._waiters[BULK]:
+            delay = self._global.wait_time()
+            if not delay:
+                future = self._next_waiter()
+                if future is not None:
+                    self._global.reserve()
+                    future.set_result(None)
+                    continue
+                # Only paused bulk sends left
+                delay = max(0.0, self._bulk_paused_until - time.monotonic())
+                if not (self._waiters[INTERACTIVE] or self._waiters[BULK]):
+                    break
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def retry_after(self, chat_id: Optional[ChatId], seconds: int):
+        """Back off after flood control: pause the chat and all bulk traffic."""
+        self._stats["retry_after"] += 1
+        if chat_id is not None:
+            self._chat_bucket(chat_id).pause(seconds)
+        self._bulk_paused_until = max(self._bulk_paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> dict:
+        """Get scheduler statistics."""
+        delayed = self._stats["delayed"]
+        return {
+            "queued_interactive": len(self._waiters[INTERACTIVE]),
+            "queued_bulk": len(self._waiters[BULK]),
+            "tracked_chats": len(self._chats),
+            "sent": self._stats["sent"],
+            "delayed": delayed,
+            "avg_delay_ms": self._stats["wait_total"] / delayed * 1000 if delayed else 0.0,
+            "retry_after": self._stats["retry_after"],
+            "bulk_paused": self._bulk_paused_until > time.monotonic(),
+        }
+
+
+def is_message_send(method: TelegramMethod) -> bool:
+    """Check if method creates a new message (counts toward send limits)."""
+    name = type(method).__name__
+    return name.startswith(("Send", "Copy", "Forward")) and name != "SendChatAction"
+
+
+class OutboundRateMiddleware(BaseRequestMiddleware):
+    """
+    Bot session middleware pacing sends and retrying on flood control.
+
+    ``on_forbidden`` is awaited with the user ID when an interactive send
+    to a private chat fails with 403 (bot blocked, user deactivated).
+    Bulk senders handle 403 themselves in batches.
+    """
+
+    def __init__(
+        self,
+        scheduler: OutboundScheduler,
+        on_forbidden: Optional[Callable[[int], Awaitable[None]]] = None
+    ):
+        self.scheduler = scheduler
+        self.on_forbidden = on_forbidden
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        paced = is_message_send(method)
+        chat_id = getattr(method, "chat_id", None)
+        priority = outbound_priority.get()
+        attempt = 0
+
+        while True:
+            if paced:
+                await self.scheduler.acquire(chat_id, priority)
+            try:
+                return await make_request(bot, method)
+            except TelegramForbiddenError:
+                # Positive chat IDs are private chats, i.e. users
+                if self.on_forbidden and priority == INTERACTIVE and isinstance(chat_id, int) and chat_id > 0:
+                    try:
+                        await self.on_forbidden(chat_id)
+                    except Exception as e:
+                        logger.error(f"Failed to mark user {chat_id} unreachable: {e}")
+                raise
+            except TelegramRetryAfter as e:
+                self.scheduler.retry_after(chat_id, e.retry_after)
+                attempt += 1
+                if attempt > self.scheduler.max_retries or e.retry_after > self.scheduler.max_retry_after:
+                    raise
+                logger.warning(
+                    f"Flood control on {type(method).__name__} to {chat_id}: "
+                    f"retry in {e.retry_after}s (attempt {attempt})"
+                )
+                if not paced:
+                    await asyncio.sleep(e.retry_after)
+
+
+# Global instance
+# Every worker paces its own sends: they share the bot's global limit
+outbound = OutboundScheduler(
+    global_rate=settings.OUTBOUND_GLOBAL_RATE / settings.get_worker_count(),
+    chat_rate=settings.OUTBOUND_CHAT_RATE,
+    chat_burst=settings.OUTBOUND_CHAT_BURST,
+    max_retries=settings.OUTBOUND_MAX_RETRIES,
+)
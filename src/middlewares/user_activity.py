@@ -0,0 +1,138 @@
+"""Batched user registration and last_seen tracking."""
+import asyncio
+import secrets
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update, User
+
+from src.config import settings
+from src.database.connection import db
+from src.utils.logger import logger
+
+
+class UserActivityTracker:
+    """
+    Collect user identity and last_seen in memory and flush in batches.
+
+    Every update marks its user as dirty; a background task writes all dirty
+    users with one executemany UPSERT every few seconds, creating rows for
+    users seen for the first time.
+    """
+
+    UPSERT_QUERY = """
+        INSERT INTO users (id, username, first_name, referral_code, last_seen)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            username = excluded.username,
+            first_name = excluded.first_name,
+            last_seen = excluded.last_seen,
+            reachable = 1,
+            blocked_at = NULL
+    """
+
+    def __init__(self, flush_interval: float = 5.0):
+        self.flush_interval = flush_interval
+        self._pending: Dict[int, Tuple[Optional[str], Optional[str], datetime]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def touch(self, user_id: int, username: str = None, first_name: str = None):
+        """Mark user as seen now."""
+        self._pending[user_id] = (username, first_name, datetime.now())
+
+    def discard(self, user_id: int):
+        """
+        Drop the user's pending update.
+
+        A flush marks the user reachable again, so an update that is still
+        pending when the reply to it fails with 403 would undo the block.
+        """
+        self._pending.pop(user_id, None)
+
+    @property
+    def pending_count(self) -> int:
+        """Number of users waiting to be flushed."""
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """Write all pending users to database. Returns number of rows written."""
+        if not self._pending:
+            return 0
+
+        batch, self._pending = self._pending, {}
+        rows = [
+            (user_id, username, first_name, secrets.token_urlsafe(8), last_seen)
+            for user_id, (username, first_name, last_seen) in batch.items()
+        ]
+
+        try:
+            await db.executemany(self.UPSERT_QUERY, rows)
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to flush {len(rows)} user updates: {e}")
+            # Put the batch back unless a newer touch already replaced it
+            for user_id, value in batch.items():
+                self._pending.setdefault(user_id, value)
+            return 0
+
+        logger.debug(f"Flushed {len(rows)} user updates")
+        return len(rows)
+
+    async def _flush_loop(self):
+        """Periodically flush pending users."""
+        while True:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"User activity flush loop error: {e}")
+
+    def start(self):
+        """Start background flushing."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+            logger.info(f"User activity tracker started ({self.flush_interval}s interval)")
+
+    async def stop(self):
+        """Stop background flushing and write what is left."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+class UserActivityMiddleware(BaseMiddleware):
+    """Outer update middleware recording who we hear from."""
+
+    def __init__(self, tracker: UserActivityTracker):
+        self.tracker = tracker
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user: Optional[User] = data.get("event_from_user")
+        if user and not user.is_bot and not self._is_start_command(event):
+            self.tracker.touch(user.id, user.username, user.first_name)
+        return await handler(event, data)
+
+    @staticmethod
+    def _is_start_command(event: TelegramObject) -> bool:
+        """/start registers users itself - it has to know whether they are new."""
+        if not isinstance(event, Update) or not event.message:
+            return False
+        text = event.message.text
+        return bool(text) and text.startswith("/start")
+
+
+# Global tracker instance
+user_activity = UserActivityTracker(flush_interval=settings.USER_FLUSH_INTERVAL)
@@ -1,25 +1,95 @@
 """Models module - data classes for music tracks."""
-from dataclasses import dataclass
+import struct
+import sys
+from dataclasses import dataclass, field
+from typing import List, Sequence
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Track:
-    """Represents a music track."""
+    """
+    Represents a music track.
+
+    Immutable and without a per-instance __dict__: cached result pages hold
+    up to 20 tracks per user. Artist names repeat across pages and are
+    interned, formatted_duration is computed once.
+    """
 
     id: str  # YouTube video ID
     title: str  # Song title
     artist: str = "Unknown"  # Artist name
     duration: int = 0  # Duration in seconds
     url: str = ""  # Track URL
+    formatted_duration: str = field(init=False, repr=False, compare=False)  # MM:SS
 
-    @property
-    def formatted_duration(self) -> str:
-        """Format duration as MM:SS."""
-        duration = int(self.duration)  # Convert to int
-        minutes = duration // 60
-        seconds = duration % 60
-        return f"{minutes}:{seconds:02d}"
+    def __post_init__(self):
+        duration = int(self.duration or 0)
+        minutes, seconds = divmod(duration, 60)
+        object.__setattr__(self, "duration", duration)
+        object.__setattr__(self, "artist", sys.intern(self.artist if self.artist is not None else "Unknown"))
+        object.__setattr__(self, "formatted_duration", sys.intern(f"{minutes}:{seconds:02d}"))
 
     def __str__(self) -> str:
         """String representation."""
         return f"{self.artist} - {self.title} ({self.formatted_duration})"
+
+
+# Packed page layout (little endian):
+#   header   version B, track count H, artist count H
+#   artists  per distinct artist: length H + UTF-8
+#   tracks   per track: artist index H, duration I, url flag B,
+#            id, title (and url when flag is 1) as length H + UTF-8
+# The url is left out when it is the usual watch URL of the id.
+PACK_VERSION = 1
+_HEADER = struct.Struct("<BHH")
+_TRACK = struct.Struct("<HIB")
+_LENGTH = struct.Struct("<H")
+
+
+def _watch_url(video_id: str) -> str:
+    return f"https://youtube.com/watch?v={video_id}"
+
+
+def pack_tracks(tracks: Sequence[Track]) -> bytes:
+    """Serialize a result page into a compact byte string."""
+    artists = {}
+    for track in tracks:
+        artists.setdefault(track.artist, len(artists))
+
+    parts = [_HEADER.pack(PACK_VERSION, len(tracks), len(artists))]
+    for artist in artists:
+        encoded = artist.encode()
+        parts += (_LENGTH.pack(len(encoded)), encoded)
+    for track in tracks:
+        explicit_url = track.url != _watch_url(track.id)
+        parts.append(_TRACK.pack(artists[track.artist], track.duration, explicit_url))
+        for text in (track.id, track.title, track.url) if explicit_url else (track.id, track.title):
+            encoded = text.encode()
+            parts += (_LENGTH.pack(len(encoded)), encoded)
+    return b"".join(parts)
+
+
+def unpack_tracks(data: bytes) -> List[Track]:
+    """Restore a page serialized by pack_tracks()."""
+    view = memoryview(data)
+    version, count, artist_count = _HEADER.unpack_from(view, 0)
+    if version != PACK_VERSION:
+        raise ValueError(f"Unsupported track page version {version}")
+    offset = _HEADER.size
+
+    def text() -> str:
+        nonlocal offset
+        (length,) = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size + length
+        return str(view[offset - length:offset], "utf-8")
+
+    artists = [text() for _ in range(artist_count)]
+    tracks = []
+    for _ in range(count):
+        artist_index, duration, explicit_url = _TRACK.unpack_from(view, offset)
+        offset += _TRACK.size
+        video_id = text()
+        title = text()
+        url = text() if explicit_url else _watch_url(video_id)
+        tracks.append(Track(id=video_id, title=title, artist=artists[artist_index], duration=duration, url=url))
+    return tracks
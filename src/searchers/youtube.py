@@ -1,9 +1,9 @@
 """YouTube Music searcher module."""
 import asyncio
 from typing import List
-from yt_dlp import YoutubeDL
 from src.models import Track
 from src.utils.logger import logger
+from src.utils.metrics import SEARCH_ERRORS, SEARCH_SECONDS
 from src.config import settings
 
 
@@ -30,23 +30,28 @@ class YouTubeSearcher:
             List of Track objects (up to 10 results)
         """
         try:
-            logger.info(f"Searching YouTube for: {query}")
+            logger.info("Searching YouTube for: %s", query)
 
             # Run in executor to avoid blocking
             loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None, self._search_sync, query
-            )
+            with SEARCH_SECONDS.time():
+                result = await loop.run_in_executor(
+                    None, self._search_sync, query
+                )
 
             return result
 
         except Exception as e:
+            SEARCH_ERRORS.inc()
             logger.error(f"YouTube search error for '{query}': {e}")
             return []
 
     def _search_sync(self, query: str) -> List[Track]:
         """Synchronous YouTube search (runs in executor)."""
         try:
+            # Slow to import, loaded on first use (see src/utils/startup.py)
+            from yt_dlp import YoutubeDL
+
             with YoutubeDL(self.ydl_opts) as ydl:
                 result = ydl.extract_info(f"ytsearch20:{query}", download=False)
 
@@ -82,10 +87,11 @@ class YouTubeSearcher:
                     )
                     tracks.append(track)
 
-                logger.info(f"Found {len(tracks)} tracks for: {query}")
+                logger.info("Found %s tracks for: %s", len(tracks), query)
                 return tracks[:20]  # Return up to 20 for pagination
 
         except Exception as e:
+            SEARCH_ERRORS.inc()
             logger.error(f"YouTube search sync error: {e}")
             return []
 
@@ -0,0 +1,262 @@
+"""Resumable broadcast (mailing) engine."""
+import asyncio
+import os
+import socket
+import time
+from typing import Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from src.config import settings
+from src.database.repositories.broadcast_repo import broadcast_repo
+from src.middlewares.outbound import bulk_traffic
+from src.utils.logger import logger
+
+
+class BroadcastService:
+    """
+    Sends a copy of a message to all users in the background.
+
+    Recipients are stored per broadcast, so a job survives restarts:
+    results are checkpointed every few seconds and running broadcasts are
+    resumed on startup with their pending recipients. Delivery is
+    at-least-once - sends made after the last checkpoint may repeat after
+    a crash. Sends are bulk traffic, paced by the outbound scheduler.
+
+    With several worker processes a broadcast is sent by the one holding
+    its lease in the database, renewed at every checkpoint. A job that
+    loses the lease (cancelled from another worker, or taken over after
+    lease_seconds without renewal) stops.
+    """
+
+    def __init__(
+        self,
+        workers: int = 20,
+        batch_size: int = 500,
+        progress_interval: float = 10.0,
+        lease_seconds: float = 60.0
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.progress_interval = progress_interval
+        self.lease_seconds = max(lease_seconds, progress_interval * 3)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._jobs: Dict[int, asyncio.Task] = {}
+
+    async def start(self, bot: Bot, admin_id: int, from_chat_id: int, message_id: int) -> int:
+        """
+        Create broadcast and start sending.
+
+        Returns:
+            Broadcast ID
+        """
+        broadcast_id = await broadcast_repo.create(admin_id, from_chat_id, message_id)
+        broadcast = await broadcast_repo.get(broadcast_id)
+
+        progress = await bot.send_message(admin_id, self._progress_text(broadcast))
+        await broadcast_repo.set_progress_message(broadcast_id, progress.chat.id, progress.message_id)
+
+        if await broadcast_repo.claim(broadcast_id, self.owner, self.lease_seconds):
+            self._launch(bot, broadcast_id)
+        logger.info(f"Broadcast #{broadcast_id} started by {admin_id}: {broadcast['total']} recipients")
+        return broadcast_id
+
+    async def resume(self, bot: Bot) -> int:
+        """Resume broadcasts interrupted by restart and not sent by another worker."""
+        resumed = 0
+        for broadcast in await broadcast_repo.get_by_status("running"):
+            if broadcast["id"] in self._jobs:
+                continue
+            if not await broadcast_repo.claim(broadcast["id"], self.owner, self.lease_seconds):
+                logger.info(f"Broadcast #{broadcast['id']} is sent by {broadcast['lease_owner']}")
+                continue
+            self._launch(bot, broadcast["id"])
+            resumed += 1
+            logger.info(f"Broadcast #{broadcast['id']} resumed")
+        return resumed
+
+    async def cancel(self, broadcast_id: int) -> bool:
+        """Stop broadcast for good."""
+        broadcast = await broadcast_repo.get(broadcast_id)
+        if not broadcast or broadcast["status"] != "running":
+            return False
+
+        await broadcast_repo.set_status(broadcast_id, "cancelled")
+        task = self._jobs.get(broadcast_id)
+        if task:
+            task.cancel()
+        logger.info(f"Broadcast #{broadcast_id} cancelled")
+        return True
+
+    async def shutdown(self):
+        """Stop all jobs, keeping them 'running' to resume on next start."""
+        tasks = list(self._jobs.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def running_ids(self) -> List[int]:
+        """Get IDs of broadcasts being sent by this process."""
+        return list(self._jobs)
+
+    def _launch(self, bot: Bot, broadcast_id: int):
+        task = asyncio.create_task(self._run(bot, broadcast_id))
+        self._jobs[broadcast_id] = task
+        task.add_done_callback(lambda _: self._jobs.pop(broadcast_id, None))
+
+    async def _run(self, bot: Bot, broadcast_id: int):
+        """Send broadcast to all pending recipients."""
+        job = asyncio.current_task()
+        broadcast = await broadcast_repo.get(broadcast_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+        results: List[Tuple[int, str, Optional[str]]] = []
+        finished = False
+
+        async def produce():
+            last_user_id = 0
+            while True:
+                user_ids = await broadcast_repo.get_pending_recipients(
+                    broadcast_id, last_user_id, self.batch_size
+                )
+                if not user_ids:
+                    break
+                for user_id in user_ids:
+                    await queue.put(user_id)
+                last_user_id = user_ids[-1]
+            for _ in range(self.workers):
+                await queue.put(None)
+
+        async def work():
+            while True:
+                user_id = await queue.get()
+                if user_id is None:
+                    return
+                status, error = await self._send(bot, broadcast, user_id)
+                results.append((user_id, status, error))
+
+        async def checkpoint():
+            # Swap the list first - workers keep appending to the new one
+            batch = results[:]
+            del results[:len(batch)]
+            try:
+                await broadcast_repo.save_results(broadcast_id, batch)
+            except Exception:
+                # Saved with the next checkpoint
+                results[:0] = batch
+                raise
+            await self._update_progress(bot, broadcast_id)
+
+        stopping = asyncio.Event()
+
+        async def report():
+            # Claimed by start()/resume() just before the job was launched
+            renewed_at = time.monotonic()
+            while not stopping.is_set():
+                try:
+                    await asyncio.wait_for(stopping.wait(), self.progress_interval)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+                try:
+                    await checkpoint()
+                except Exception as e:
+                    logger.warning(f"Broadcast #{broadcast_id} checkpoint failed: {e}")
+                try:
+                    held = await broadcast_repo.claim(broadcast_id, self.owner, self.lease_seconds)
+                except Exception as e:
+                    # Transient (e.g. database is locked): the lease is still ours until it expires
+                    logger.warning(f"Broadcast #{broadcast_id} lease renewal failed: {e}")
+                    held = time.monotonic() - renewed_at < self.lease_seconds
+                else:
+                    if held:
+                        renewed_at = time.monotonic()
+                if not held:
+                    logger.info(f"Broadcast #{broadcast_id} lease lost")
+                    job.cancel()
+                    return
+
+        reporter = asyncio.create_task(report())
+        try:
+            # Tasks copy the context, so all sends are bulk traffic
+            with bulk_traffic():
+                await asyncio.gather(produce(), *(work() for _ in range(self.workers)))
+            finished = True
+        except asyncio.CancelledError:
+            logger.info(f"Broadcast #{broadcast_id} stopped")
+        except Exception as e:
+            logger.error(f"Broadcast #{broadcast_id} failed: {e}", exc_info=True)
+        finally:
+            # Let a checkpoint in progress finish instead of cancelling it
+            stopping.set()
+            await asyncio.gather(reporter, return_exceptions=True)
+            await broadcast_repo.save_results(broadcast_id, results)
+            if finished:
+                await broadcast_repo.set_status(broadcast_id, "completed")
+                logger.info(f"Broadcast #{broadcast_id} completed")
+            await broadcast_repo.release(broadcast_id, self.owner)
+            await self._update_progress(bot, broadcast_id)
+
+    async def _send(self, bot: Bot, broadcast: dict, user_id: int) -> Tuple[str, Optional[str]]:
+        """Copy broadcast message to user, return (status, error)."""
+        try:
+            await bot.copy_message(
+                chat_id=user_id,
+                from_chat_id=broadcast["from_chat_id"],
+                message_id=broadcast["message_id"]
+            )
+            return "sent", None
+        except TelegramForbiddenError as e:
+            # Bot blocked or user deactivated
+            return "blocked", str(e)[:200]
+        except Exception as e:
+            logger.warning(f"Broadcast #{broadcast['id']}: failed to send to {user_id}: {e}")
+            return "failed", str(e)[:200]
+
+    async def _update_progress(self, bot: Bot, broadcast_id: int):
+        """Edit progress message with current counters."""
+        broadcast = await broadcast_repo.get(broadcast_id)
+        if not broadcast or not broadcast["progress_message_id"]:
+            return
+        try:
+            await bot.edit_message_text(
+                self._progress_text(broadcast),
+                chat_id=broadcast["progress_chat_id"],
+                message_id=broadcast["progress_message_id"]
+            )
+        except TelegramBadRequest:
+            pass  # Message is not modified
+        except Exception as e:
+            logger.warning(f"Failed to update broadcast #{broadcast_id} progress: {e}")
+
+    @staticmethod
+    def _progress_text(broadcast: dict) -> str:
+        """Format broadcast progress."""
+        total = broadcast["total"] or 0
+        done = broadcast["sent"] + broadcast["failed"] + broadcast["blocked"]
+        percent = done / total * 100 if total else 100.0
+
+        titles = {
+            "running": "⏳ <b>РАССЫЛКА #{id}</b>",
+            "completed": "✅ <b>РАССЫЛКА #{id} ЗАВЕРШЕНА</b>",
+            "cancelled": "⛔ <b>РАССЫЛКА #{id} ОСТАНОВЛЕНА</b>",
+        }
+        title = titles.get(broadcast["status"], titles["running"]).format(id=broadcast["id"])
+
+        text = (
+            f"{title}\n\n"
+            f"📨 Обработано: {done}/{total} ({percent:.1f}%)\n"
+            f"✅ Отправлено: {broadcast['sent']}\n"
+            f"🚫 Заблокировали бота: {broadcast['blocked']}\n"
+            f"❌ Ошибок: {broadcast['failed']}\n"
+        )
+        if broadcast["status"] == "running":
+            text += f"\n<code>/mailing_stop {broadcast['id']}</code> - остановить"
+        return text
+
+
+# Global instance
+broadcast_service = BroadcastService(
+    workers=settings.BROADCAST_WORKERS,
+    progress_interval=settings.BROADCAST_PROGRESS_INTERVAL
+)
@@ -1,87 +1,135 @@
-"""Auth codes management for web dashboard authentication."""
+"""Auth codes management for web dashboard authentication.
+
+Codes and sessions live in a small SQLite database shared by the bot (which
+issues codes) and the dashboard API (which consumes them and checks
+sessions on every request). Lookups go by primary key, expired rows are
+purged through an index on expires, a code is consumed by a single
+DELETE ... RETURNING so two concurrent logins can't both use it, and
+verified sessions are cached in memory for SESSION_CACHE_TTL seconds.
+
+Kept free of src.config imports: the dashboard image copies only this file.
+"""
+import os
 import secrets
+import sqlite3
+import threading
 import time
-import json
-import os
 from pathlib import Path
-
-# File to store auth codes (shared between bot and dashboard API)
-AUTH_CODES_FILE = Path(__file__).parent.parent.parent / "data" / "auth_codes.json"
-
-
-def _load_codes() -> dict:
-    """Load auth codes from file."""
-    try:
-        if AUTH_CODES_FILE.exists():
-            with open(AUTH_CODES_FILE, 'r') as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return {}
-
-
-def _save_codes(codes: dict):
-    """Save auth codes to file."""
-    try:
-        AUTH_CODES_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(AUTH_CODES_FILE, 'w') as f:
-            json.dump(codes, f)
-    except Exception as e:
-        print(f"Error saving auth codes: {e}")
+from typing import Dict, Optional, Tuple
+
+# Database with auth codes and sessions (shared between bot and dashboard API)
+AUTH_DB_PATH = Path(
+    os.getenv("AUTH_DB_PATH", Path(__file__).parent.parent.parent / "data" / "auth.db")
+)
+
+CODE_TTL = 300  # 5 minutes
+SESSION_TTL = 86400  # 24 hours
+# How long a verified session is trusted without asking the database
+SESSION_CACHE_TTL = 60
+SESSION_CACHE_SIZE = 1024
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS auth_codes (
+        code TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        username TEXT,
+        expires REAL NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_auth_codes_expires ON auth_codes(expires)",
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        token TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        username TEXT,
+        is_admin INTEGER DEFAULT 1,
+        expires REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires)",
+)
+
+_lock = threading.Lock()
+_connection: Optional[sqlite3.Connection] = None
+_connection_path: Optional[Path] = None
+# token -> (session info, monotonic time until which it is trusted)
+_session_cache: Dict[str, Tuple[dict, float]] = {}
+
+
+def _connect() -> sqlite3.Connection:
+    """Shared connection, opened and set up on first use. Call with _lock held."""
+    global _connection, _connection_path
+    if _connection is None or _connection_path != AUTH_DB_PATH:
+        if _connection is not None:
+            _connection.close()
+        _session_cache.clear()
+        Path(AUTH_DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; multi-statement changes use explicit BEGIN IMMEDIATE
+        conn = sqlite3.connect(
+            str(AUTH_DB_PATH), timeout=5, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode = WAL")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        _connection, _connection_path = conn, AUTH_DB_PATH
+    return _connection
+
+
+def _purge_expired(conn: sqlite3.Connection, now: float):
+    conn.execute("DELETE FROM auth_codes WHERE expires < ?", (now,))
+    conn.execute("DELETE FROM sessions WHERE expires < ?", (now,))
+
+
+def _insert_session(conn: sqlite3.Connection, user_id: int, username: Optional[str], now: float) -> str:
+    session_token = secrets.token_urlsafe(48)
+    conn.execute(
+        "INSERT INTO sessions (token, user_id, username, is_admin, expires) VALUES (?, ?, ?, 1, ?)",
+        (session_token, user_id, username, now + SESSION_TTL)
+    )
+    return session_token
 
 
 def generate_auth_code(user_id: int, username: str = None) -> str:
     """Generate one-time auth code for admin."""
-    codes = _load_codes()
     current_time = time.time()
-
-    # Clean expired codes
-    codes = {k: v for k, v in codes.items() if v.get("expires", 0) > current_time}
-
-    # Generate new code
     code = secrets.token_urlsafe(32)
-    codes[code] = {
-        "user_id": user_id,
-        "username": username,
-        "expires": current_time + 300,  # 5 minutes
-        "used": False,
-        "created_at": current_time
-    }
 
-    _save_codes(codes)
+    with _lock:
+        conn = _connect()
+        _purge_expired(conn, current_time)
+        conn.execute(
+            "INSERT INTO auth_codes (code, user_id, username, expires, created_at) VALUES (?, ?, ?, ?, ?)",
+            (code, user_id, username, current_time + CODE_TTL, current_time)
+        )
     return code
 
 
-def verify_auth_code(code: str) -> dict:
-    """Verify auth code and return user info if valid."""
-    codes = _load_codes()
-
-    if code not in codes:
-        return None
-
-    auth_data = codes[code]
+def verify_auth_code(code: str) -> Optional[dict]:
+    """Consume auth code and open a session; None if unknown, used or expired."""
     current_time = time.time()
 
-    # Check if expired
-    if auth_data.get("expires", 0) < current_time:
-        del codes[code]
-        _save_codes(codes)
+    with _lock:
+        conn = _connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "DELETE FROM auth_codes WHERE code = ? AND expires >= ? RETURNING user_id, username",
+                (code, current_time)
+            ).fetchone()
+            session_token = _insert_session(conn, row[0], row[1], current_time) if row else None
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    if row is None:
         return None
 
-    # Check if already used
-    if auth_data.get("used", False):
-        return None
-
-    # Mark as used
-    codes[code]["used"] = True
-    _save_codes(codes)
-
-    # Generate session token
-    session_token = secrets.token_urlsafe(48)
-
     return {
-        "user_id": auth_data["user_id"],
-        "username": auth_data.get("username"),
+        "user_id": row[0],
+        "username": row[1],
         "is_admin": True,
         "session_token": session_token
     }
@@ -89,54 +137,46 @@ def verify_auth_code(code: str) -> dict:
 
 def create_session(user_id: int, username: str = None) -> str:
     """Create a session token for authenticated admin."""
-    codes = _load_codes()
     current_time = time.time()
 
-    # Generate session token
-    session_token = secrets.token_urlsafe(48)
-
-    # Store session (expires in 24 hours)
-    codes[f"session_{session_token}"] = {
-        "user_id": user_id,
-        "username": username,
-        "is_admin": True,
-        "expires": current_time + 86400,  # 24 hours
-        "type": "session"
-    }
-
-    _save_codes(codes)
-    return session_token
+    with _lock:
+        conn = _connect()
+        _purge_expired(conn, current_time)
+        return _insert_session(conn, user_id, username, current_time)
 
 
-def verify_session(token: str) -> dict:
+def verify_session(token: str) -> Optional[dict]:
     """Verify session token."""
-    codes = _load_codes()
-    session_key = f"session_{token}"
-
-    if session_key not in codes:
-        return None
+    now = time.monotonic()
+    cached = _session_cache.get(token)
+    if cached is not None and cached[1] > now:
+        return dict(cached[0])
 
-    session_data = codes[session_key]
     current_time = time.time()
-
-    # Check if expired
-    if session_data.get("expires", 0) < current_time:
-        del codes[session_key]
-        _save_codes(codes)
+    with _lock:
+        row = _connect().execute(
+            "SELECT user_id, username, is_admin, expires FROM sessions WHERE token = ? AND expires >= ?",
+            (token, current_time)
+        ).fetchone()
+
+    if row is None:
+        _session_cache.pop(token, None)
         return None
 
-    return {
-        "user_id": session_data["user_id"],
-        "username": session_data.get("username"),
-        "is_admin": session_data.get("is_admin", True)
+    session = {
+        "user_id": row[0],
+        "username": row[1],
+        "is_admin": bool(row[2])
     }
+    if len(_session_cache) >= SESSION_CACHE_SIZE:
+        _session_cache.clear()
+    # Never trust the cache past the session's own expiry
+    _session_cache[token] = (session, now + min(SESSION_CACHE_TTL, row[3] - current_time))
+    return dict(session)
 
 
 def invalidate_session(token: str):
     """Invalidate a session token."""
-    codes = _load_codes()
-    session_key = f"session_{token}"
-
-    if session_key in codes:
-        del codes[session_key]
-        _save_codes(codes)
+    _session_cache.pop(token, None)
+    with _lock:
+        _connect().execute("DELETE FROM sessions WHERE token = ?", (token,))
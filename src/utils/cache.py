@@ -1,34 +1,53 @@
 """Simple in-memory cache for search results."""
-from typing import Optional, List
+from typing import Any, Optional
 from datetime import datetime, timedelta
-from src.models import Track
-from src.utils.logger import logger
+from src.models import Track, pack_tracks, unpack_tracks
+from src.utils.logger import get_logger
+from src.utils.metrics import CACHE_REQUESTS
+
+logger = get_logger("cache")
+
+
+class _PackedTracks(bytes):
+    """Track page stored by pack_tracks(), told apart from cached bytes values."""
+
+    __slots__ = ()
+
+
+_HITS = CACHE_REQUESTS.labels("hit")
+_MISSES = CACHE_REQUESTS.labels("miss")
+_EXPIRED = CACHE_REQUESTS.labels("expired")
 
 
 class SimpleCache:
-    """Simple in-memory cache for search results."""
+    """
+    Simple in-memory cache for search results.
+
+    Lists of Track are kept packed (see src.models.pack_tracks): one bytes
+    object per page instead of 20 objects with their strings. Other values
+    are stored as is. Entries are (expire_at, value) tuples.
+    """
 
     def __init__(self):
         """Initialize cache."""
         self._cache = {}
 
-    def set(self, key: str, value: List[Track], ttl: int = 600):
+    def set(self, key: str, value: Any, ttl: int = 600):
         """
         Store value in cache with TTL.
 
         Args:
             key: Cache key
-            value: List of tracks to cache
+            value: List of tracks to cache (or any other value)
             ttl: Time to live in seconds (default: 10 minutes)
         """
         expire_at = datetime.now() + timedelta(seconds=ttl)
-        self._cache[key] = {
-            'data': value,
-            'expire_at': expire_at
-        }
-        logger.debug(f"Cache SET: {key} (TTL: {ttl}s)")
+        if isinstance(value, list) and value and all(isinstance(item, Track) for item in value):
+            value = _PackedTracks(pack_tracks(value))
+        self._cache[key] = (expire_at, value)
+        logger.debug("Cache SET: %s (TTL: %ss)", key, ttl)
 
-    def get(self, key: str) -> Optional[List[Track]]:
+    def get(self, key: str) -> Optional[Any]:
         """
         Get value from cache if not expired.
 
@@ -39,19 +58,24 @@ class SimpleCache:
             Cached tracks or None if expired/not found
         """
         if key not in self._cache:
-            logger.debug(f"Cache MISS: {key}")
+            _MISSES.inc()
+            logger.debug("Cache MISS: %s", key)
             return None
 
-        item = self._cache[key]
+        expire_at, value = self._cache[key]
 
         # Check expiration
-        if datetime.now() > item['expire_at']:
-            logger.debug(f"Cache EXPIRED: {key}")
+        if datetime.now() > expire_at:
+            _EXPIRED.inc()
+            logger.debug("Cache EXPIRED: %s", key)
             del self._cache[key]
             return None
 
-        logger.debug(f"Cache HIT: {key}")
-        return item['data']
+        _HITS.inc()
+        logger.debug("Cache HIT: %s", key)
+        if isinstance(value, _PackedTracks):
+            return unpack_tracks(value)
+        return value
 
     def clear(self):
         """Clear entire cache."""
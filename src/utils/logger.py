@@ -1,20 +1,90 @@
 """Logger configuration module."""
+import atexit
+import itertools
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Dict, Optional
 from src.config import settings
 
+LOGGER_NAME = "usp_music_finder"
+
+_listener: Optional[QueueListener] = None
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a share of DEBUG/INFO records of noisy loggers.
+
+    Rates are given per logger name prefix, e.g. {"usp_music_finder.cache": 0.01}
+    keeps every 100th record. Warnings and errors always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.every = {name: max(1, round(1 / rate)) for name, rate in rates.items() if rate > 0}
+        self.counters = {name: itertools.count() for name in self.every}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.every:
+            return True
+        for name, every in self.every.items():
+            if record.name == name or record.name.startswith(name + "."):
+                return next(self.counters[name]) % every == 0
+        return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats the whole record (time, traceback) in the
+    caller's thread; here only the message is merged with its args.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def parse_sampling(value: str) -> Dict[str, float]:
+    """Parse LOG_SAMPLING setting: "cache=0.01,rate_limiter=0.1"."""
+    rates = {}
+    for pair in value.split(","):
+        if "=" not in pair:
+            continue
+        name, rate = pair.split("=", 1)
+        name = name.strip()
+        if not name.startswith(LOGGER_NAME):
+            name = f"{LOGGER_NAME}.{name}"
+        rates[name] = float(rate)
+    return rates
+
 
 def setup_logger():
-    """Setup logger with console and file handlers."""
+    """
+    Setup logger with console and rotating file handlers.
+
+    Records go through a queue; a background thread writes them,
+    so disk latency never blocks the event loop.
+    """
+    global _listener
+
     # Create logs directory
     Path(settings.LOGS_DIR).mkdir(parents=True, exist_ok=True)
 
+    level = getattr(logging, settings.LOG_LEVEL)
+
     # Create logger
-    logger = logging.getLogger("usp_music_finder")
-    logger.setLevel(getattr(logging, settings.LOG_LEVEL))
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
 
     # Remove existing handlers
     logger.handlers.clear()
+    if _listener:
+        _listener.stop()
 
     # Create formatters
     formatter = logging.Formatter(
@@ -22,22 +92,46 @@ def setup_logger():
         datefmt="%Y-%m-%d %H:%M:%S"
     )
 
-    # File handler
-    file_handler = logging.FileHandler(
+    # File handler (size-based rotation)
+    file_handler = RotatingFileHandler(
         f"{settings.LOGS_DIR}/bot.log",
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
         encoding="utf-8"
     )
-    file_handler.setLevel(getattr(logging, settings.LOG_LEVEL))
+    file_handler.setLevel(level)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
 
     # Console handler
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(getattr(logging, settings.LOG_LEVEL))
+    console_handler.setLevel(level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+
+    # Writer thread
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+
+    queue_handler = LazyQueueHandler(log_queue)
+    if settings.LOG_SAMPLING:
+        queue_handler.addFilter(SamplingFilter(parse_sampling(settings.LOG_SAMPLING)))
+    logger.addHandler(queue_handler)
 
     return logger
 
 
+def get_logger(name: str) -> logging.Logger:
+    """Get child logger (e.g. for sampling via LOG_SAMPLING)."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+
 logger = setup_logger()
+atexit.register(stop_logging)
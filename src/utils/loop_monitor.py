@@ -0,0 +1,166 @@
+"""Event loop lag monitor with blocking call detection."""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
+
+from src.config import settings
+from src.utils.logger import logger
+from src.utils.metrics import registry
+
+PROJECT_ROOT = str(Path(__file__).resolve().parents[2]) + os.sep
+
+LOOP_LAG_SECONDS = registry.histogram(
+    "musicbot_loop_lag_seconds", "Event loop scheduling lag",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_BLOCKING_CALLS = registry.counter(
+    "musicbot_loop_blocking_calls_total", "Loop stalls by blocking call site", ["site"]
+)
+
+
+def _format_frame(frame: traceback.FrameSummary) -> str:
+    filename = frame.filename
+    if filename.startswith(PROJECT_ROOT):
+        filename = filename[len(PROJECT_ROOT):]
+    else:
+        filename = os.path.join(*Path(filename).parts[-2:])
+    return f"{filename}:{frame.lineno} in {frame.name}"
+
+
+def blocking_site(stack: traceback.StackSummary) -> Tuple[str, str]:
+    """
+    Get (project call site, innermost frame) of a blocked loop stack.
+
+    The project site is the deepest frame in our code - the line that made
+    the blocking call, even if the time is spent in a library below it.
+    """
+    innermost = _format_frame(stack[-1])
+    for frame in reversed(stack):
+        if frame.filename.startswith(PROJECT_ROOT) and frame.filename != __file__:
+            return _format_frame(frame), innermost
+    return innermost, innermost
+
+
+class LoopMonitor:
+    """
+    Measures event loop lag and catches code that blocks it.
+
+    A task on the loop wakes up every ``interval`` and records how late it
+    was. A watchdog thread watches the task's heartbeat: once the loop has
+    been stuck for longer than ``threshold``, it samples the loop thread's
+    stack, so the blocking call is caught in the act. Stalls are logged and
+    counted per call site.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1, max_recent: int = 20):
+        self.interval = interval
+        self.threshold = threshold
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id = 0
+        self._heartbeat = 0.0
+        self._sampled_heartbeat = 0.0
+        self._lags: Deque[float] = deque(maxlen=600)
+        self._sites: Counter = Counter()
+        self._recent: Deque[Tuple[float, str, str]] = deque(maxlen=max_recent)
+        self._stalls = 0
+        self._max_lag = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start monitoring the running loop."""
+        if self.enabled:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._tick())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"Loop monitor started (threshold {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self):
+        """Stop monitoring."""
+        if not self.enabled:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Loop monitor stopped")
+
+    async def _tick(self):
+        """Sleep for interval and record how late the loop woke us up."""
+        while True:
+            self._heartbeat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - self._heartbeat - self.interval)
+            LOOP_LAG_SECONDS.observe(lag)
+            self._lags.append(lag)
+            if lag > self._max_lag:
+                self._max_lag = lag
+            if lag >= self.threshold:
+                self._stalls += 1
+
+    def _watch(self):
+        """Watchdog thread: sample the loop stack while it is stuck."""
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            stuck = time.perf_counter() - heartbeat - self.interval
+            if stuck < self.threshold or heartbeat == self._sampled_heartbeat:
+                continue
+            # One sample per stall
+            self._sampled_heartbeat = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            self._record(stack, stuck)
+
+    def _record(self, stack: traceback.StackSummary, stuck: float):
+        site, innermost = blocking_site(stack)
+        self._sites[site] += 1
+        self._recent.append((time.time(), site, innermost))
+        LOOP_BLOCKING_CALLS.labels(site).inc()
+        logger.warning(
+            "Event loop blocked for %.0f ms at %s (in %s)\n%s",
+            stuck * 1000, site, innermost, "".join(stack.format()[-8:]).rstrip()
+        )
+
+    def stats(self) -> dict:
+        """Get lag statistics (milliseconds) and top blocking sites."""
+        lags = sorted(self._lags)
+
+        def pct(value: float) -> float:
+            return lags[min(len(lags) - 1, int(len(lags) * value))] * 1000 if lags else 0.0
+
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold * 1000,
+            "lag_p50_ms": pct(0.5),
+            "lag_p99_ms": pct(0.99),
+            "lag_max_ms": self._max_lag * 1000,
+            "stalls": self._stalls,
+            "top_sites": self._sites.most_common(5),
+        }
+
+    def recent(self) -> List[Tuple[float, str, str]]:
+        """Get recent stalls as (timestamp, site, innermost frame)."""
+        return list(self._recent)
+
+
+# Global instance
+loop_monitor = LoopMonitor(threshold=settings.LOOP_LAG_THRESHOLD_MS / 1000)
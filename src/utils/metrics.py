@@ -0,0 +1,329 @@
+"""
+In-process metrics (counters, gauges, histograms) in Prometheus text format.
+
+Metrics are plain Python objects updated in place - an observation is a
+perf_counter() call, a bisect and a few additions, so they are cheap enough
+for every DB query. Label children are created once and cached; hot paths
+bind them at import time:
+
+    DB_EXECUTE = DB_QUERY_SECONDS.labels("execute")
+    with DB_EXECUTE.time():
+        ...
+
+Values are scraped from /metrics (see start_metrics_server).
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from src.utils.logger import logger
+
+# Seconds; covers cache-hit DB queries up to slow downloads
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Timer:
+    """Context manager observing elapsed seconds into a histogram."""
+
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: "_HistogramChild"):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """Read value from function at scrape time."""
+        self.function = function
+
+    def get(self) -> float:
+        return float(self.function()) if self.function else self.value
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        # Downloads observe from executor threads
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> _Timer:
+        """Measure duration of a with-block."""
+        return _Timer(self)
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """Get (upper bound, cumulative count) pairs including +Inf."""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class _Metric:
+    """Metric family: one child per label values combination."""
+
+    type = ""
+    child_class: type = _CounterChild
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        return self.child_class()
+
+    def labels(self, *values: str):
+        """Get (and cache) child for label values."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    type = "counter"
+    child_class = _CounterChild
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, or is read from a function."""
+
+    type = "gauge"
+    child_class = _GaugeChild
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+    def samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            try:
+                value = child.get()
+            except Exception as e:
+                logger.warning(f"Gauge {self.name} failed: {e}")
+                continue
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self) -> _Timer:
+        return self._default.time()
+
+    def samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            with child.lock:
+                buckets = child.cumulative()
+                total, count = child.sum, child.count
+            for bound, cumulative in buckets:
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+# Global registry and bot metrics
+registry = MetricsRegistry()
+
+SEARCH_SECONDS = registry.histogram(
+    "musicbot_search_duration_seconds", "YouTube search (extraction) time"
+)
+SEARCH_ERRORS = registry.counter(
+    "musicbot_search_errors_total", "Failed YouTube searches"
+)
+DOWNLOAD_SECONDS = registry.histogram(
+    "musicbot_download_duration_seconds", "Track download time by stage (fetch, transcode)", ["stage"]
+)
+DOWNLOAD_ERRORS = registry.counter(
+    "musicbot_download_errors_total", "Failed downloads"
+)
+UPLOAD_SECONDS = registry.histogram(
+    "musicbot_upload_duration_seconds", "Audio upload to Telegram (answer_audio) time"
+)
+DB_QUERY_SECONDS = registry.histogram(
+    "musicbot_db_query_duration_seconds", "Database call time by operation", ["op"]
+)
+CACHE_REQUESTS = registry.counter(
+    "musicbot_cache_requests_total", "Search cache lookups by result", ["result"]
+)
+RATE_LIMIT_REJECTIONS = registry.counter(
+    "musicbot_rate_limit_rejections_total", "Searches rejected by rate limiter"
+)
+STARTUP_SECONDS = registry.gauge(
+    "musicbot_startup_seconds", "Time from importing src.main to accepting updates, by phase", ["phase"]
+)
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """Serve metrics in Prometheus text format."""
+    return web.Response(body=registry.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+def create_metrics_app() -> web.Application:
+    """Create aiohttp application serving /metrics and /debug/profile."""
+    from src.utils.profiler import profile_handler
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    app.router.add_get("/debug/profile", profile_handler)
+    return app
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Start metrics HTTP server, return runner to clean up on shutdown."""
+    runner = web.AppRunner(create_metrics_app())
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    logger.info(f"Metrics server listening on {host}:{port}/metrics")
+    return runner
@@ -0,0 +1,164 @@
+"""On-demand sampling profiler producing collapsed stacks."""
+import asyncio
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from aiohttp import web
+
+from src.config import settings
+from src.utils.logger import logger
+
+MAX_DURATION = 120  # Seconds
+
+# Innermost frames of threads that are just waiting (loop select, idle executor workers)
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+
+class SamplingProfiler:
+    """
+    Time-boxed statistical profiler of all threads.
+
+    A helper thread samples sys._current_frames() every ``interval``
+    seconds, so running code is not instrumented and nothing runs between
+    profiles. The thread is a dedicated one, not a default executor worker
+    that downloads need, and only one runs at a time. Output is in
+    collapsed stack format ("thread;outer;inner N"), ready for
+    flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def profile(self, seconds: float, include_idle: bool = False) -> Tuple[str, int]:
+        """
+        Profile the process for given seconds.
+
+        Returns:
+            Tuple (collapsed stacks text, number of samples)
+
+        Raises:
+            RuntimeError: If another profile is running
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("Profiler is already running")
+        seconds = min(max(seconds, 1), MAX_DURATION)
+        logger.info(f"Profiling for {seconds}s")
+        stacks, samples = await self._run_sampler(seconds, include_idle)
+
+        text = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        return text, samples
+
+    async def _run_sampler(self, seconds: float, include_idle: bool) -> Tuple[Counter, int]:
+        """Run _sample() in a dedicated thread holding the lock, and wait for it."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(method, value):
+            if not future.cancelled():
+                method(value)
+
+        def run():
+            try:
+                result = self._sample(seconds, include_idle)
+            except Exception as e:
+                loop.call_soon_threadsafe(resolve, future.set_exception, e)
+            else:
+                loop.call_soon_threadsafe(resolve, future.set_result, result)
+            finally:
+                # Released by the thread, so a cancelled request can't start a second one
+                self._lock.release()
+
+        try:
+            threading.Thread(target=run, name="profiler", daemon=True).start()
+        except Exception:
+            self._lock.release()
+            raise
+        return await future
+
+    def _sample(self, seconds: float, include_idle: bool) -> Tuple[Counter, int]:
+        """Collect stack samples (runs in its own thread)."""
+        stacks: Counter = Counter()
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        samples = 0
+
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                code = frame.f_code
+                if not include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, str(thread_id)).replace(" ", "_"))
+                stacks[";".join(reversed(labels))] += 1
+            samples += 1
+            time.sleep(self.interval)
+
+        return stacks, samples
+
+
+def top_functions(collapsed: str, limit: int = 10) -> List[Tuple[str, int]]:
+    """Get functions with most samples on top of the stack (self time)."""
+    counts: Counter = Counter()
+    for line in collapsed.splitlines():
+        stack, _, count = line.rpartition(" ")
+        counts[stack.rsplit(";", 1)[-1]] += int(count)
+    return counts.most_common(limit)
+
+
+def parse_duration(value: Optional[str], default: int = 10) -> int:
+    """Parse profile duration argument, clamped to 1..MAX_DURATION."""
+    try:
+        seconds = int(value) if value else default
+    except ValueError:
+        seconds = default
+    return min(max(seconds, 1), MAX_DURATION)
+
+
+async def profile_handler(request: web.Request) -> web.Response:
+    """
+    GET /debug/profile?seconds=N - profile and return collapsed stacks.
+
+    Requires X-Debug-Token header equal to DEBUG_TOKEN; disabled without it.
+    """
+    token = request.headers.get("X-Debug-Token", "")
+    if not settings.DEBUG_TOKEN or not hmac.compare_digest(token.encode(), settings.DEBUG_TOKEN.encode()):
+        raise web.HTTPNotFound()
+
+    seconds = parse_duration(request.query.get("seconds"))
+    include_idle = request.query.get("idle") == "1"
+    try:
+        text, samples = await profiler.profile(seconds, include_idle=include_idle)
+    except RuntimeError as e:
+        return web.Response(status=409, text=str(e))
+
+    return web.Response(text=text, headers={"X-Profile-Samples": str(samples)})
+
+
+# Global instance
+profiler = SamplingProfiler()
@@ -1,9 +1,10 @@
 """Rate limiter for controlling user requests - Day 7."""
 from datetime import datetime, timedelta
 from typing import Dict, Tuple
-import logging
+from src.utils.logger import get_logger
+from src.utils.metrics import RATE_LIMIT_REJECTIONS
 
-logger = logging.getLogger(__name__)
+logger = get_logger("rate_limiter")
 
 
 class RateLimiter:
@@ -49,9 +50,9 @@ class RateLimiter:
         if len(self.requests[user_id]) < self.max_requests:
             self.requests[user_id].append(now)
             
-            logger.info(
-                f"Rate limit check passed for user {user_id}: "
-                f"{len(self.requests[user_id])}/{self.max_requests} requests"
+            logger.debug(
+                "Rate limit check passed for user %s: %s/%s requests",
+                user_id, len(self.requests[user_id]), self.max_requests
             )
             return True, 0
 
@@ -59,10 +60,11 @@ class RateLimiter:
         oldest_request = self.requests[user_id][0]
         wait_until = oldest_request + self.time_window
         wait_seconds = max(1, int((wait_until - now).total_seconds()))
+        RATE_LIMIT_REJECTIONS.inc()
 
         logger.warning(
-            f"Rate limit exceeded for user {user_id}: "
-            f"Wait {wait_seconds} seconds"
+            "Rate limit exceeded for user %s: wait %s seconds",
+            user_id, wait_seconds
         )
         return False, wait_seconds
 
@@ -70,7 +72,7 @@ class RateLimiter:
         """Reset rate limit for specific user."""
         if user_id in self.requests:
             del self.requests[user_id]
-            logger.info(f"Rate limit reset for user {user_id}")
+            logger.info("Rate limit reset for user %s", user_id)
 
     def clear_all(self) -> None:
         """Clear all rate limit data."""
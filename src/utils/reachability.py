@@ -0,0 +1,48 @@
+"""Periodic report of users the bot can still message."""
+import asyncio
+from typing import Dict
+
+from src.database.repositories import user_repo
+from src.utils.logger import logger
+
+
+def format_reachability(stats: Dict[str, int]) -> str:
+    """Format reachability stats for admins."""
+    total = stats["total"] or 0
+    share = stats["reachable"] / total * 100 if total else 0.0
+    return (
+        "📬 <b>ДОСТУПНОСТЬ ПОЛЬЗОВАТЕЛЕЙ</b>\n\n"
+        f"👥 Всего: {total}\n"
+        f"✅ Доступны: {stats['reachable']} ({share:.1f}%)\n"
+        f"🚫 Заблокировали бота: {stats['unreachable']}\n\n"
+        f"📉 Новых блокировок:\n"
+        f"  • За сутки: {stats['blocked_day']}\n"
+        f"  • За неделю: {stats['blocked_week']}\n"
+    )
+
+
+async def reachability_report_task(interval_seconds: int = 86400):
+    """
+    Background task logging reachability stats.
+
+    Args:
+        interval_seconds: Report interval in seconds (default: 1 day)
+    """
+    while True:
+        try:
+            await asyncio.sleep(interval_seconds)
+            stats = await user_repo.get_reachability_stats()
+            logger.info(
+                f"Reachability: {stats['reachable']}/{stats['total']} reachable, "
+                f"{stats['unreachable']} unreachable, "
+                f"+{stats['blocked_day']} blocked in 24h, +{stats['blocked_week']} in 7d"
+            )
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            logger.error(f"Reachability report error: {e}")
+
+
+def create_reachability_task(interval_seconds: int = 86400) -> asyncio.Task:
+    """Create and return reachability report task."""
+    return asyncio.create_task(reachability_report_task(interval_seconds))
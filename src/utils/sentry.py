@@ -1,7 +1,8 @@
-"""Sentry error tracking integration."""
-import sentry_sdk
-from sentry_sdk.integrations.aiohttp import AioHttpIntegration
+"""Sentry error tracking integration.
 
+sentry_sdk is imported only when SENTRY_DSN is set, so bots without error
+tracking don't pay for loading it at startup.
+"""
 from src.config import settings
 from src.utils.logger import logger
 
@@ -13,6 +14,9 @@ def init_sentry():
         return False
 
     try:
+        import sentry_sdk
+        from sentry_sdk.integrations.aiohttp import AioHttpIntegration
+
         sentry_sdk.init(
             dsn=settings.SENTRY_DSN,
             integrations=[
@@ -72,6 +76,8 @@ def capture_exception(error: Exception, **extra):
     if not settings.SENTRY_DSN:
         return
 
+    import sentry_sdk
+
     with sentry_sdk.push_scope() as scope:
         for key, value in extra.items():
             scope.set_extra(key, value)
@@ -83,6 +89,8 @@ def capture_message(message: str, level: str = "info", **extra):
     if not settings.SENTRY_DSN:
         return
 
+    import sentry_sdk
+
     with sentry_sdk.push_scope() as scope:
         for key, value in extra.items():
             scope.set_extra(key, value)
@@ -94,6 +102,8 @@ def set_user(user_id: int, username: str = None):
     if not settings.SENTRY_DSN:
         return
 
+    import sentry_sdk
+
     sentry_sdk.set_user({
         "id": str(user_id),
         "username": username,
@@ -105,4 +115,6 @@ def set_tag(key: str, value: str):
     if not settings.SENTRY_DSN:
         return
 
+    import sentry_sdk
+
     sentry_sdk.set_tag(key, value)
@@ -0,0 +1,71 @@
+"""Startup time breakdown and deferred loading of heavy modules."""
+import asyncio
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Sequence, Tuple
+
+# Imported on first use by the code that needs them; preload() loads them
+# in the background once the bot is already answering
+HEAVY_MODULES = ("yt_dlp",)
+
+
+class StartupTimer:
+    """
+    Wall time of startup phases, from importing src.main to the first update.
+
+    Phases are timed with phase() and listed by report() in the order they
+    ran, like ``python -X importtime`` but per subsystem: imports, database,
+    locales, Telegram API calls and so on. Time not covered by any phase is
+    reported as "other".
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self.started = clock()
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block of startup code."""
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.phases.append((name, self._clock() - started))
+
+    def total(self) -> float:
+        """Seconds since the timer was created."""
+        return self._clock() - self.started
+
+    def report(self) -> str:
+        """Multi-line breakdown, slowest phase marked."""
+        total = self.total()
+        phases = list(self.phases)
+        other = total - sum(seconds for _, seconds in phases)
+        if other > 0.0005:
+            phases.append(("other", other))
+        slowest = max(phases, key=lambda phase: phase[1])[0] if phases else None
+        width = max((len(name) for name, _ in phases), default=0)
+        lines = [f"Startup took {total * 1000:.0f} ms:"]
+        for name, seconds in phases:
+            share = seconds / total * 100 if total else 0
+            marker = "  <- slowest" if name == slowest else ""
+            lines.append(f"  {name:<{width}}  {seconds * 1000:7.1f} ms  {share:5.1f}%{marker}")
+        return "\n".join(lines)
+
+
+async def preload(modules: Sequence[str] = HEAVY_MODULES) -> List[str]:
+    """Import modules in a worker thread, return the ones that were loaded."""
+    loop = asyncio.get_running_loop()
+    loaded = []
+    for name in modules:
+        if name in sys.modules:
+            continue
+        await loop.run_in_executor(None, importlib.import_module, name)
+        loaded.append(name)
+    return loaded
+
+
+startup_timer = StartupTimer()
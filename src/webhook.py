@@ -0,0 +1,182 @@
+"""
+Webhook mode: aiohttp server for Telegram updates and payment notifications.
+
+Each worker process listens on WEBHOOK_PORT + WORKER_ID, so several workers
+can run behind a local reverse proxy, e.g. nginx:
+
+    upstream musicbot { server 127.0.0.1:8080; server 127.0.0.1:8081; }
+    location /webhook { proxy_pass http://musicbot; }
+    location /yoomoney/notify { proxy_pass http://musicbot; }
+
+Only worker 0 registers the webhook with Telegram. Updates of one chat
+can reach any worker, so with WEBHOOK_WORKERS > 1:
+
+- FSM_STORAGE=redis is required (checked on startup by check_workers());
+  the SQLite storage caches states per process
+- entitlements (premium, bonus and daily limits) are read from the
+  database on every check instead of a per-process cache
+- each worker sends at most OUTBOUND_GLOBAL_RATE / WEBHOOK_WORKERS
+  messages per second; per-chat pacing and per-chat update order only
+  hold within a worker
+- broadcasts are sent by the worker holding their lease, the daily
+  channel post by worker 0
+
+Metrics are not served here but on METRICS_HOST:METRICS_PORT + WORKER_ID.
+"""
+import asyncio
+from typing import Callable, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from src.config import settings
+from src.database.repositories import user_repo
+from src.payments.yoomoney import yoomoney
+from src.utils.logger import logger
+
+YOOMONEY_PATH = "/yoomoney/notify"
+BOT_KEY = web.AppKey("bot", Bot)
+
+
+async def yoomoney_notification(request: web.Request) -> web.Response:
+    """
+    Handle YooMoney HTTP notification about incoming payment.
+
+    YooMoney retries until it gets 200, so duplicates are detected by
+    operation_id and answered with 200 as well. Without YOOMONEY_SECRET
+    notifications can't be authenticated and are refused.
+    """
+    if not yoomoney.secret_key:
+        return web.Response(status=403, text="notifications are not configured")
+
+    data = dict(await request.post())
+
+    if not yoomoney.verify_notification(data):
+        return web.Response(status=400, text="invalid signature")
+
+    operation_id = data.get("operation_id", "")
+    label = data.get("label", "")
+
+    if data.get("unaccepted") == "true":
+        # Payment is on hold (protection code etc), will be notified again
+        logger.info(f"YooMoney payment {operation_id} not accepted yet: {label}")
+        return web.Response(text="ok")
+
+    parsed = yoomoney.parse_label(label)
+    if not parsed:
+        logger.warning(f"YooMoney notification with unknown label: {label}")
+        return web.Response(text="ok")
+
+    user_id = parsed["user_id"]
+    bot: Bot = request.app[BOT_KEY]
+
+    try:
+        # withdraw_amount is what the payer paid, amount is after commission
+        paid = float(data.get("withdraw_amount") or data.get("amount") or 0)
+    except ValueError:
+        paid = 0.0
+
+    if parsed["type"] == "premium":
+        tariff = yoomoney.get_tariff(parsed["tariff_id"])
+        if not tariff or paid < tariff["amount"]:
+            logger.warning(f"YooMoney payment {operation_id} amount {paid} does not match {label}")
+            return web.Response(text="ok")
+
+    # The insert is the duplicate check: retries and proxied copies of the
+    # same operation can arrive concurrently, only one of them gets here
+    if not await user_repo.insert_payment(
+        user_id=user_id,
+        amount=paid,
+        currency="RUB",
+        payment_type=parsed["type"],
+        payload=label,
+        payment_system="yoomoney",
+        external_id=operation_id or None
+    ):
+        logger.info(f"Duplicate YooMoney notification: {operation_id}")
+        return web.Response(text="ok")
+
+    if parsed["type"] == "premium":
+        new_until = await user_repo.extend_premium(user_id, tariff["days"])
+        text = (
+            f"🎉 <b>Спасибо за покупку!</b>\n\n"
+            f"✅ Премиум активирован!\n"
+            f"📅 Действует до: {new_until.strftime('%d.%m.%Y %H:%M')}"
+        )
+        logger.info(f"Premium granted to {user_id} until {new_until} (YooMoney)")
+    else:
+        text = "❤️ <b>Огромное спасибо за поддержку!</b>"
+        logger.info(f"YooMoney donation received from {user_id}: {parsed['donation_id']}")
+
+    try:
+        await bot.send_message(user_id, text)
+    except Exception as e:
+        logger.warning(f"Failed to notify user {user_id} about payment: {e}")
+
+    return web.Response(text="ok")
+
+
+def create_app(bot: Bot, dp: Dispatcher) -> web.Application:
+    """Create aiohttp application with webhook and payment routes."""
+    app = web.Application()
+    app[BOT_KEY] = bot
+
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=settings.WEBHOOK_SECRET or None
+    ).register(app, path=settings.WEBHOOK_PATH)
+
+    if yoomoney.secret_key:
+        app.router.add_post(YOOMONEY_PATH, yoomoney_notification)
+    else:
+        logger.warning("YOOMONEY_SECRET is not set, YooMoney notifications are disabled")
+
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+def check_workers():
+    """Refuse a multi-worker setup whose state would diverge between processes."""
+    workers = settings.get_worker_count()
+    if not 0 <= settings.WORKER_ID < workers:
+        raise ValueError(f"WORKER_ID must be between 0 and WEBHOOK_WORKERS - 1 ({workers - 1})")
+    if workers > 1 and settings.FSM_STORAGE.lower() != "redis":
+        raise ValueError("WEBHOOK_WORKERS > 1 requires FSM_STORAGE=redis")
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher, on_ready: Optional[Callable[[], None]] = None):
+    """Run webhook server until cancelled, calling on_ready once it accepts updates."""
+    if not settings.WEBHOOK_URL:
+        raise ValueError("WEBHOOK_URL is required for webhook mode")
+    check_workers()
+
+    if not settings.WEBHOOK_SECRET:
+        logger.warning("WEBHOOK_SECRET is not set, webhook requests are not authenticated")
+
+    port = settings.WEBHOOK_PORT + settings.WORKER_ID
+    app = create_app(bot, dp)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.WEBHOOK_HOST, port=port)
+    await site.start()
+
+    try:
+        if settings.WORKER_ID == 0:
+            await bot.set_webhook(
+                url=settings.WEBHOOK_URL.rstrip("/") + settings.WEBHOOK_PATH,
+                secret_token=settings.WEBHOOK_SECRET or None,
+                allowed_updates=dp.resolve_used_update_types(),
+                max_connections=settings.WEBHOOK_MAX_CONNECTIONS
+            )
+            logger.info(f"Webhook set: {settings.WEBHOOK_URL}{settings.WEBHOOK_PATH}")
+
+        logger.info(f"Webhook mode activated: worker {settings.WORKER_ID} on {settings.WEBHOOK_HOST}:{port}")
+        if on_ready:
+            on_ready()
+
+        # Serve until the task is cancelled
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -74,6 +74,24 @@ def mock_bot():
     return bot
 
 
+@pytest.fixture
+async def repo_db(tmp_path):
+    """Connect the global database to a temporary file."""
+    from src.database.connection import db
+    from src.database.repositories import entitlements_repo
+
+    original_path = db.db_path
+    db.db_path = str(tmp_path / "test.db")
+    await db.connect()
+    entitlements_repo.clear()
+
+    yield db
+
+    entitlements_repo.clear()
+    await db.disconnect()
+    db.db_path = original_path
+
+
 @pytest.fixture
 async def test_db(tmp_path):
     """Create a test database."""
@@ -9,20 +9,15 @@ class TestAuthCodes:
     """Test auth codes generation and verification."""
 
     @pytest.fixture(autouse=True)
-    def setup(self, tmp_path):
+    def setup(self, tmp_path, monkeypatch):
         """Setup test environment."""
-        # Use temp file for auth codes
-        self.auth_file = tmp_path / "auth_codes.json"
-
-        # Patch the auth codes file path
+        # Use temp database for auth codes
         import src.utils.auth_codes as auth_module
-        self._original_path = auth_module.AUTH_CODES_FILE
-        auth_module.AUTH_CODES_FILE = self.auth_file
+        monkeypatch.setattr(auth_module, "AUTH_DB_PATH", tmp_path / "auth.db")
 
         yield
 
-        # Restore original path
-        auth_module.AUTH_CODES_FILE = self._original_path
+        auth_module._session_cache.clear()
 
     def test_generate_auth_code(self):
         """Test generating auth code."""
@@ -111,3 +106,61 @@ class TestAuthCodes:
 
         # Session should be invalid now
         assert verify_session(token) is None
+
+    def test_verify_auth_code_opens_session(self):
+        """Test that the session returned for a code is accepted."""
+        from src.utils.auth_codes import generate_auth_code, verify_auth_code, verify_session
+
+        result = verify_auth_code(generate_auth_code(123456789, "testuser"))
+
+        assert verify_session(result["session_token"])["user_id"] == 123456789
+
+    def test_auth_code_expired(self, monkeypatch):
+        """Test that an expired code is rejected."""
+        import src.utils.auth_codes as auth_module
+
+        code = auth_module.generate_auth_code(123456789, "testuser")
+        later = time.time() + auth_module.CODE_TTL + 1
+        monkeypatch.setattr(auth_module.time, "time", lambda: later)
+
+        assert auth_module.verify_auth_code(code) is None
+
+    def test_auth_code_single_use_concurrent(self):
+        """Test that concurrent logins with one code open one session."""
+        from concurrent.futures import ThreadPoolExecutor
+        from src.utils.auth_codes import generate_auth_code, verify_auth_code
+
+        code = generate_auth_code(123456789, "testuser")
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(verify_auth_code, [code] * 8))
+
+        assert len([r for r in results if r is not None]) == 1
+
+    def test_verify_session_cached(self):
+        """Test that a verified session is served from memory."""
+        import src.utils.auth_codes as auth_module
+
+        token = auth_module.create_session(123456789, "testuser")
+        assert auth_module.verify_session(token) is not None
+
+        statements = []
+        auth_module._connection.set_trace_callback(statements.append)
+        try:
+            assert auth_module.verify_session(token)["user_id"] == 123456789
+        finally:
+            auth_module._connection.set_trace_callback(None)
+
+        assert statements == []
+
+    def test_expired_sessions_purged(self, monkeypatch):
+        """Test that expired sessions are rejected and removed."""
+        import src.utils.auth_codes as auth_module
+
+        token = auth_module.create_session(123456789, "testuser")
+        later = time.time() + auth_module.SESSION_TTL + 1
+        monkeypatch.setattr(auth_module.time, "time", lambda: later)
+
+        assert auth_module.verify_session(token) is None
+        auth_module.create_session(1, "other")
+        rows = auth_module._connection.execute("SELECT user_id FROM sessions").fetchall()
+        assert rows == [(1,)]
@@ -0,0 +1,190 @@
+"""Tests for broadcast engine."""
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+
+def make_bot(blocked_ids=()):
+    """Bot double that records copies and rejects blocked users."""
+    from aiogram.exceptions import TelegramForbiddenError
+    from aiogram.methods import CopyMessage
+
+    bot = MagicMock()
+    bot.sent_to = []
+
+    async def copy_message(chat_id, from_chat_id, message_id):
+        if chat_id in blocked_ids:
+            raise TelegramForbiddenError(
+                method=CopyMessage(chat_id=chat_id, from_chat_id=from_chat_id, message_id=message_id),
+                message="Forbidden: bot was blocked by the user"
+            )
+        bot.sent_to.append(chat_id)
+
+    bot.copy_message = copy_message
+    bot.send_message = AsyncMock(return_value=MagicMock(chat=MagicMock(id=1), message_id=10))
+    bot.edit_message_text = AsyncMock()
+    return bot
+
+
+class TestBroadcastService:
+    """Test BroadcastService."""
+
+    @pytest.mark.asyncio
+    async def test_sends_and_marks_blocked(self, repo_db):
+        """Test that broadcast reaches users and marks blocked ones."""
+        from src.database.repositories import broadcast_repo, user_repo
+        from src.services.broadcast import BroadcastService
+
+        for user_id in (1, 2, 3):
+            await user_repo.create_user(user_id, f"u{user_id}", "U")
+
+        service = BroadcastService(workers=2, batch_size=2)
+        bot = make_bot(blocked_ids={2})
+        broadcast_id = await service.start(bot, admin_id=1, from_chat_id=1, message_id=5)
+        await service._jobs[broadcast_id]
+
+        broadcast = await broadcast_repo.get(broadcast_id)
+        assert broadcast["status"] == "completed"
+        assert (broadcast["total"], broadcast["sent"], broadcast["blocked"]) == (3, 2, 1)
+        assert sorted(bot.sent_to) == [1, 3]
+
+        # Blocked user is skipped by the next broadcast
+        next_id = await broadcast_repo.create(admin_id=1, from_chat_id=1, message_id=6)
+        assert (await broadcast_repo.get(next_id))["total"] == 2
+
+    @pytest.mark.asyncio
+    async def test_resume_sends_only_pending(self, repo_db):
+        """Test that resumed broadcast skips already delivered recipients."""
+        from src.database.repositories import broadcast_repo, user_repo
+        from src.services.broadcast import BroadcastService
+
+        for user_id in (1, 2, 3):
+            await user_repo.create_user(user_id, f"u{user_id}", "U")
+
+        broadcast_id = await broadcast_repo.create(admin_id=1, from_chat_id=1, message_id=5)
+        await broadcast_repo.save_results(broadcast_id, [(1, "sent", None)])
+
+        service = BroadcastService(workers=2)
+        bot = make_bot()
+        assert await service.resume(bot) == 1
+        await service._jobs[broadcast_id]
+
+        assert sorted(bot.sent_to) == [2, 3]
+        broadcast = await broadcast_repo.get(broadcast_id)
+        assert broadcast["sent"] == 3
+        assert broadcast["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_broadcast_of_other_worker(self, repo_db):
+        """Test that a broadcast leased by another process is not resumed."""
+        from src.database.repositories import broadcast_repo, user_repo
+        from src.services.broadcast import BroadcastService
+
+        await user_repo.create_user(1, "u1", "U")
+        broadcast_id = await broadcast_repo.create(admin_id=1, from_chat_id=1, message_id=5)
+        assert await broadcast_repo.claim(broadcast_id, "other:1", ttl=60)
+
+        service = BroadcastService(workers=2)
+        bot = make_bot()
+        assert await service.resume(bot) == 0
+        assert service.running_ids() == []
+        assert bot.sent_to == []
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_taken_over(self, repo_db):
+        """Test that a broadcast whose holder stopped renewing is resumed."""
+        from src.database.repositories import broadcast_repo, user_repo
+        from src.services.broadcast import BroadcastService
+
+        await user_repo.create_user(1, "u1", "U")
+        broadcast_id = await broadcast_repo.create(admin_id=1, from_chat_id=1, message_id=5)
+        assert await broadcast_repo.claim(broadcast_id, "other:1", ttl=-1)
+
+        service = BroadcastService(workers=2)
+        bot = make_bot()
+        assert await service.resume(bot) == 1
+        await service._jobs[broadcast_id]
+
+        assert bot.sent_to == [1]
+        broadcast = await broadcast_repo.get(broadcast_id)
+        assert broadcast["status"] == "completed"
+        assert broadcast["lease_owner"] is None
+
+    @pytest.mark.asyncio
+    async def test_stops_when_cancelled_elsewhere(self, repo_db):
+        """Test that a job stops at its next checkpoint once another worker cancels it."""
+        import asyncio
+        from src.database.repositories import broadcast_repo, user_repo
+        from src.services.broadcast import BroadcastService
+
+        for user_id in range(1, 6):
+            await user_repo.create_user(user_id, f"u{user_id}", "U")
+
+        service = BroadcastService(workers=1, progress_interval=0.01)
+        bot = make_bot()
+        copy_message = bot.copy_message
+        released = asyncio.Event()
+
+        async def slow_copy(chat_id, from_chat_id, message_id):
+            await copy_message(chat_id, from_chat_id, message_id)
+            await released.wait()
+
+        bot.copy_message = slow_copy
+        broadcast_id = await service.start(bot, admin_id=1, from_chat_id=1, message_id=5)
+        await asyncio.sleep(0.05)
+
+        # /mailing_stop handled by another worker only changes the status
+        await broadcast_repo.set_status(broadcast_id, "cancelled")
+        await asyncio.wait_for(service._jobs[broadcast_id], timeout=2)
+
+        assert bot.sent_to == [1]
+        assert (await broadcast_repo.get(broadcast_id))["status"] == "cancelled"
+
+    @pytest.mark.asyncio
+    async def test_survives_transient_database_errors(self, repo_db, monkeypatch):
+        """Test that failed checkpoints and lease renewals don't stop the job."""
+        import asyncio
+        import sqlite3
+        from src.database.repositories import broadcast_repo, user_repo
+        from src.services.broadcast import BroadcastService
+
+        for user_id in range(1, 4):
+            await user_repo.create_user(user_id, f"u{user_id}", "U")
+
+        service = BroadcastService(workers=1, progress_interval=0.01)
+        bot = make_bot()
+        copy_message = bot.copy_message
+
+        async def slow_copy(chat_id, from_chat_id, message_id):
+            await copy_message(chat_id, from_chat_id, message_id)
+            await asyncio.sleep(0.05)
+
+        bot.copy_message = slow_copy
+        claim, save_results = broadcast_repo.claim, broadcast_repo.save_results
+        calls = {"claim": 0, "save": 0}
+
+        async def flaky_claim(*args, **kwargs):
+            # start() claims first, then two renewals fail
+            calls["claim"] += 1
+            if calls["claim"] in (2, 3):
+                raise sqlite3.OperationalError("database is locked")
+            return await claim(*args, **kwargs)
+
+        async def flaky_save(broadcast_id, results):
+            if results:
+                calls["save"] += 1
+                if calls["save"] == 1:
+                    raise sqlite3.OperationalError("database is locked")
+            await save_results(broadcast_id, results)
+
+        monkeypatch.setattr(broadcast_repo, "claim", flaky_claim)
+        monkeypatch.setattr(broadcast_repo, "save_results", flaky_save)
+
+        broadcast_id = await service.start(bot, admin_id=1, from_chat_id=1, message_id=5)
+        await asyncio.wait_for(service._jobs[broadcast_id], timeout=5)
+
+        assert calls["claim"] > 3 and calls["save"] > 1
+        assert sorted(bot.sent_to) == [1, 2, 3]
+        broadcast = await broadcast_repo.get(broadcast_id)
+        assert broadcast["status"] == "completed"
+        assert broadcast["sent"] == 3
@@ -0,0 +1,331 @@
+"""Tests for dashboard API queries."""
+from datetime import datetime, timedelta
+
+import aiosqlite
+import pytest
+
+
+@pytest.fixture
+async def dashboard_db(tmp_path, monkeypatch):
+    """Migrated database with users and downloads around midnight."""
+    from dashboard import api
+    from dashboard.pool import ConnectionPool
+    from src.database.migrations import migrate
+
+    path = str(tmp_path / "test.db")
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    stamps = [
+        today - timedelta(days=1),                  # yesterday 00:00:00
+        today - timedelta(seconds=1),               # yesterday 23:59:59
+        today,                                      # today 00:00:00
+        today + timedelta(hours=12),                # today noon
+        today - timedelta(days=10),
+    ]
+    async with aiosqlite.connect(path) as conn:
+        await migrate(conn)
+        for i, stamp in enumerate(stamps):
+            text = stamp.strftime("%Y-%m-%d %H:%M:%S")
+            await conn.execute("INSERT INTO users (id, created_at) VALUES (?, ?)", (i + 1, text))
+            await conn.execute(
+                "INSERT INTO downloads (user_id, track_id, title, downloaded_at) VALUES (?, ?, ?, ?)",
+                (i + 1, f"track{i % 2}", "Song", text)
+            )
+        await conn.commit()
+
+    pool = ConnectionPool(path, size=2)
+    monkeypatch.setattr(api, "db_pool", pool)
+    api.stats_snapshot.reset()
+    yield path
+    await pool.close()
+
+
+class TestDashboardQueries:
+    """Test date range filters."""
+
+    @pytest.mark.asyncio
+    async def test_overview_day_boundaries(self, dashboard_db):
+        """Test that today and yesterday include both ends of the day."""
+        from dashboard.api import get_overview
+
+        overview = await get_overview(admin={"user_id": 0})
+
+        assert overview["new_users_today"] == 2
+        assert overview["new_users_yesterday"] == 2
+        assert overview["downloads_today"] == 2
+        assert overview["downloads_yesterday"] == 2
+        assert overview["active_users_week"] == 4
+
+    @pytest.mark.asyncio
+    async def test_daily_and_top_tracks(self, dashboard_db):
+        """Test charts grouped by day and top tracks over a period."""
+        from dashboard.api import get_downloads_daily, get_top_tracks
+
+        daily = await get_downloads_daily(days=3, admin={"user_id": 0})
+        top = await get_top_tracks(limit=10, days=3, admin={"user_id": 0})
+
+        assert [row["count"] for row in daily] == [2, 2]
+        assert {row["video_id"]: row["downloads"] for row in top} == {"track0": 2, "track1": 2}
+
+
+class TestStatsSnapshot:
+    """Test cached overview stats."""
+
+    @pytest.mark.asyncio
+    async def test_incremental_refresh(self, dashboard_db):
+        """Test that rows added after the snapshot are counted without recompute."""
+        from dashboard.stats import StatsSnapshot
+
+        clock = [0.0]
+        snapshot = StatsSnapshot(ttl=10, full_ttl=300, clock=lambda: clock[0])
+        async with aiosqlite.connect(dashboard_db) as conn:
+            conn.row_factory = aiosqlite.Row
+            first = await snapshot.get(conn)
+
+            # Later than any row of the fixture, as for rows stamped on insert
+            now = datetime.now().replace(hour=13, minute=0, second=0).strftime("%Y-%m-%d %H:%M:%S")
+            await conn.execute("INSERT INTO users (id, created_at, referred_by) VALUES (100, ?, 1)", (now,))
+            await conn.execute(
+                "INSERT INTO downloads (user_id, track_id, title, downloaded_at) VALUES (100, 't', 'Song', ?)", (now,)
+            )
+            await conn.execute(
+                "INSERT INTO payments (user_id, amount, currency, created_at) VALUES (100, 50, 'XTR', ?)", (now,)
+            )
+            await conn.commit()
+
+            # Within TTL the cached values are returned
+            assert await snapshot.get(conn) == first
+
+            clock[0] = 11
+            statements = []
+            await conn.set_trace_callback(statements.append)
+            second = await snapshot.get(conn)
+            await conn.set_trace_callback(None)
+
+            assert second["total_users"] == first["total_users"] + 1
+            assert second["new_users_today"] == first["new_users_today"] + 1
+            assert second["total_referrals"] == first["total_referrals"] + 1
+            assert second["total_downloads"] == first["total_downloads"] + 1
+            assert second["downloads_today"] == first["downloads_today"] + 1
+            assert second["revenue_today"] == first["revenue_today"] + 50
+            # Only new rows were read
+            assert all("WHERE" in statement for statement in statements)
+
+            # Same row is not counted twice
+            clock[0] = 22
+            assert await snapshot.get(conn) == second
+
+
+class TestConnectionPool:
+    """Test shared dashboard connections."""
+
+    @pytest.mark.asyncio
+    async def test_readers_are_read_only(self, dashboard_db):
+        """Test that readers reject writes and the writer commits."""
+        from dashboard.api import db_pool
+
+        async with db_pool.reader() as db:
+            with pytest.raises(Exception):
+                await db.execute("UPDATE users SET bonus_downloads = 5 WHERE id = 1")
+
+        async with db_pool.writer() as db:
+            await db.execute("UPDATE users SET bonus_downloads = 5 WHERE id = 1")
+
+        async with db_pool.reader() as db:
+            cursor = await db.execute("SELECT bonus_downloads FROM users WHERE id = 1")
+            assert (await cursor.fetchone())[0] == 5
+            cursor = await db.execute("PRAGMA journal_mode")
+            assert (await cursor.fetchone())[0] == "wal"
+
+    @pytest.mark.asyncio
+    async def test_connections_reused(self, dashboard_db):
+        """Test that concurrent requests share the pool's connections."""
+        import asyncio
+        from dashboard.api import db_pool, get_users_growth
+
+        await asyncio.gather(*(get_users_growth(days=30, admin={"user_id": 0}) for _ in range(10)))
+
+        assert len(db_pool._connections) == db_pool.size
+        assert db_pool._readers.qsize() == db_pool.size
+
+
+class TestPagination:
+    """Test keyset pagination and export."""
+
+    @pytest.mark.asyncio
+    async def test_users_cursor_walk(self, dashboard_db):
+        """Test that following next_cursor lists every user once, ties included."""
+        from dashboard.api import get_users_list
+
+        async with aiosqlite.connect(dashboard_db) as conn:
+            await conn.executemany(
+                "INSERT INTO users (id, created_at) VALUES (?, '2020-01-01 00:00:00')",
+                [(i,) for i in range(10, 15)]
+            )
+            await conn.commit()
+
+        first = await get_users_list(page=1, limit=2, search=None, filter_type=None, after=None, admin={"user_id": 0})
+        assert first["total"] == 10
+        seen = [user["telegram_id"] for user in first["users"]]
+        next_cursor = first["next_cursor"]
+        while next_cursor:
+            data = await get_users_list(
+                page=1, limit=2, search=None, filter_type=None, after=next_cursor, admin={"user_id": 0}
+            )
+            assert "total" not in data
+            seen.extend(user["telegram_id"] for user in data["users"])
+            next_cursor = data["next_cursor"]
+
+        assert seen == [4, 3, 2, 1, 5, 14, 13, 12, 11, 10]
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor(self, dashboard_db):
+        """Test that a malformed cursor is a client error."""
+        from fastapi import HTTPException
+        from dashboard.api import get_payments_list
+
+        with pytest.raises(HTTPException) as exc:
+            await get_payments_list(page=1, limit=10, after="not-a-cursor", admin={"user_id": 0})
+        assert exc.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_export_batches(self, dashboard_db):
+        """Test CSV and NDJSON export read in keyset batches."""
+        import csv
+        import json
+        from dashboard.api import db_pool
+        from dashboard.pagination import iter_batches, stream_csv, stream_ndjson
+
+        columns = ("id", "user_id", "track_id")
+        chunks = [chunk async for chunk in stream_csv(iter_batches(db_pool, "downloads", columns, batch_size=2), columns)]
+        rows = list(csv.reader("".join(chunks).splitlines()))
+        # Header, then batches of 2, 2 and 1 rows
+        assert len(chunks) == 4
+        assert rows[0] == list(columns)
+        assert [row[0] for row in rows[1:]] == ["1", "2", "3", "4", "5"]
+
+        chunks = [chunk async for chunk in stream_ndjson(iter_batches(db_pool, "downloads", columns, batch_size=2), columns)]
+        lines = [json.loads(line) for line in "".join(chunks).splitlines()]
+        assert lines[0] == {"id": 1, "user_id": 1, "track_id": "track0"}
+        assert len(lines) == 5
+
+    @pytest.mark.asyncio
+    async def test_export_endpoint(self, dashboard_db):
+        """Test the export endpoint streams the requested format."""
+        from dashboard.api import export_table
+
+        response = await export_table(table="users", format="ndjson", admin={"user_id": 0})
+        body = "".join([chunk async for chunk in response.body_iterator])
+
+        assert response.media_type == "application/x-ndjson"
+        assert len(body.splitlines()) == 5
+
+
+class TestEventBus:
+    """Test live overview updates."""
+
+    @pytest.mark.asyncio
+    async def test_one_poll_for_all_subscribers(self):
+        """Test that subscribers share polls and get snapshot then deltas."""
+        import asyncio
+        from contextlib import AsyncExitStack
+        from dashboard.events import EventBus
+
+        stats = {"total_users": 10, "total_downloads": 100}
+        calls = []
+
+        async def source():
+            calls.append(1)
+            return dict(stats)
+
+        bus = EventBus(source, interval=3600)
+        async with AsyncExitStack() as stack:
+            queues = [await stack.enter_async_context(bus.subscribe()) for _ in range(3)]
+            await asyncio.sleep(0)
+
+            stats["total_users"] += 2
+            await bus.poll()
+
+            assert len(calls) == 2
+            for queue in queues:
+                assert queue.get_nowait()[1:] == ("snapshot", {"total_users": 10, "total_downloads": 100})
+                assert queue.get_nowait()[1:] == ("delta", {"total_users": 2})
+
+            # Late subscriber starts from the current stats
+            async with bus.subscribe() as late:
+                assert late.get_nowait()[1:] == ("snapshot", {"total_users": 12, "total_downloads": 100})
+
+        assert bus.subscribers == 0
+        assert bus._task is None
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_gets_snapshot(self):
+        """Test that a subscriber whose queue is full is resynced with a snapshot."""
+        from dashboard.events import EventBus
+
+        stats = {"total_users": 10}
+
+        async def source():
+            return dict(stats)
+
+        bus = EventBus(source, interval=3600, queue_size=3)
+        async with bus.subscribe() as queue:
+            await bus.poll()
+            for _ in range(5):
+                stats["total_users"] += 1
+                await bus.poll()
+
+            events = []
+            while not queue.empty():
+                events.append(queue.get_nowait()[1:])
+
+        # Applying the events from the start must give the current stats
+        assert events[0] == ("snapshot", {"total_users": 13})
+        total = 0
+        for event, data in events:
+            total = data["total_users"] if event == "snapshot" else total + data["total_users"]
+        assert total == 15
+
+    @pytest.mark.asyncio
+    async def test_stream_endpoint(self, dashboard_db):
+        """Test that /api/stream starts with the overview snapshot."""
+        import json
+        from dashboard.api import event_bus, stream_overview
+
+        response = await stream_overview(admin={"user_id": 0})
+        events = response.body_iterator
+        try:
+            assert (await events.__anext__()).startswith("retry:")
+            message = await events.__anext__()
+        finally:
+            await events.aclose()
+
+        lines = message.strip().split("\n")
+        assert lines[1] == "event: snapshot"
+        assert json.loads(lines[2][len("data: "):])["total_users"] == 5
+        assert event_bus.subscribers == 0
+
+
+class TestDashboardAuth:
+    """Test dashboard login with the shared session store."""
+
+    @pytest.mark.asyncio
+    async def test_login_and_logout(self, tmp_path, monkeypatch):
+        """Test that a bot code logs in once and logout ends the session."""
+        from fastapi import HTTPException
+        from fastapi.security import HTTPAuthorizationCredentials
+        import src.utils.auth_codes as auth_module
+        from dashboard.api import AuthRequest, auth_logout, auth_telegram, verify_token
+
+        monkeypatch.setattr(auth_module, "AUTH_DB_PATH", tmp_path / "auth.db")
+        code = auth_module.generate_auth_code(42, "admin")
+
+        result = await auth_telegram(AuthRequest(code=code))
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=result["session_token"])
+        assert verify_token(credentials)["user_id"] == 42
+
+        with pytest.raises(HTTPException):
+            await auth_telegram(AuthRequest(code=code))
+
+        await auth_logout(user=verify_token(credentials), credentials=credentials)
+        with pytest.raises(HTTPException):
+            verify_token(credentials)
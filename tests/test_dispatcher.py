@@ -0,0 +1,82 @@
+"""Tests for ordered concurrent dispatcher."""
+import asyncio
+
+import pytest
+
+
+def make_update(update_id: int, chat_id: int, text: str):
+    """Build a private message update."""
+    from aiogram.types import Update
+
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "U"},
+            "text": text,
+        },
+    })
+
+
+class TestOrderedDispatcher:
+    """Test OrderedDispatcher."""
+
+    @pytest.mark.asyncio
+    async def test_same_chat_is_sequential(self):
+        """Test that a slow update delays only its own chat."""
+        from aiogram import Bot
+        from aiogram.types import Message
+        from src.dispatcher import OrderedDispatcher
+
+        dp = OrderedDispatcher(max_concurrency=10)
+        bot = Bot(token="42:TEST")
+        events = []
+
+        @dp.message()
+        async def handler(message: Message):
+            events.append(("start", message.chat.id, message.text))
+            if message.text == "slow":
+                await asyncio.sleep(0.05)
+            events.append(("end", message.chat.id, message.text))
+
+        await asyncio.gather(
+            dp.feed_update(bot, make_update(1, 1, "slow")),
+            dp.feed_update(bot, make_update(2, 1, "next")),
+            dp.feed_update(bot, make_update(3, 2, "other")),
+        )
+        await bot.session.close()
+
+        # Chat 1 keeps order, chat 2 finished while chat 1 was busy
+        assert events.index(("end", 1, "slow")) < events.index(("start", 1, "next"))
+        assert events.index(("end", 2, "other")) < events.index(("end", 1, "slow"))
+        assert dp.stats()["processed"] == 3
+        assert dp.stats()["active_chats"] == 0
+
+    @pytest.mark.asyncio
+    async def test_global_concurrency_limit(self):
+        """Test that no more than max_concurrency updates run at once."""
+        from aiogram import Bot
+        from aiogram.types import Message
+        from src.dispatcher import OrderedDispatcher
+
+        dp = OrderedDispatcher(max_concurrency=2)
+        bot = Bot(token="42:TEST")
+        running = 0
+        peak = 0
+
+        @dp.message()
+        async def handler(message: Message):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await asyncio.gather(*(
+            dp.feed_update(bot, make_update(i, 100 + i, "hi")) for i in range(6)
+        ))
+        await bot.session.close()
+
+        assert peak == 2
@@ -0,0 +1,89 @@
+"""Tests for the entitlements cache."""
+from datetime import datetime, timedelta
+
+import pytest
+
+
+class TestEntitlements:
+    """Test cached entitlements and write-through invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_unknown_user_defaults(self, repo_db):
+        """Test that unknown users get free-tier defaults."""
+        from src.database.repositories import entitlements_repo
+
+        entitlements = await entitlements_repo.get(42)
+
+        assert entitlements.is_premium is False
+        assert entitlements.today_downloads == 0
+        assert entitlements.bonus_downloads == 0
+        assert entitlements.language == "ru"
+
+    @pytest.mark.asyncio
+    async def test_premium_invalidated_on_set(self, repo_db):
+        """Test that set_premium drops the cached entry."""
+        from src.database.repositories import user_repo
+
+        await user_repo.create_user(1, "user", "User")
+        assert await user_repo.is_premium(1) is False
+
+        await user_repo.set_premium(1, True, datetime.now() + timedelta(days=1))
+        assert await user_repo.is_premium(1) is True
+
+        await user_repo.set_premium(1, True, datetime.now() - timedelta(days=1))
+        assert await user_repo.is_premium(1) is False
+
+    @pytest.mark.asyncio
+    async def test_daily_count_write_through(self, repo_db):
+        """Test that daily counter updates patch the cache."""
+        from src.database.repositories import user_repo, download_repo
+
+        await user_repo.create_user(2, "user", "User")
+        assert await download_repo.get_today_count(2) == 0
+
+        await download_repo.increment_daily_count(2)
+        await download_repo.increment_daily_count(2)
+
+        assert await download_repo.get_today_count(2) == 2
+
+    @pytest.mark.asyncio
+    async def test_bonus_usage(self, repo_db):
+        """Test that bonus downloads stay consistent with the database."""
+        from src.database.repositories import user_repo
+
+        await user_repo.create_user(3, "user", "User")
+        await user_repo.add_bonus_downloads(3, 2)
+        assert await user_repo.get_bonus_downloads(3) == 2
+
+        assert await user_repo.use_bonus_download(3) is True
+        assert await user_repo.get_bonus_downloads(3) == 1
+
+        row = await repo_db.fetchone("SELECT bonus_downloads FROM users WHERE id = 3")
+        assert row["bonus_downloads"] == 1
+
+    @pytest.mark.asyncio
+    async def test_bonus_usage_uncached(self, repo_db):
+        """Test that using a bonus download of an uncached user counts it once."""
+        from src.database.repositories import user_repo, entitlements_repo
+
+        await user_repo.create_user(5, "user", "User")
+        await user_repo.add_bonus_downloads(5, 2)
+        entitlements_repo.invalidate(5)
+
+        assert await user_repo.use_bonus_download(5) is True
+        assert await user_repo.get_bonus_downloads(5) == 1
+        assert await user_repo.use_bonus_download(5) is True
+        assert await user_repo.use_bonus_download(5) is False
+        assert await user_repo.get_bonus_downloads(5) == 0
+
+    @pytest.mark.asyncio
+    async def test_recognize_count(self, repo_db):
+        """Test recognition counter is visible through the cache."""
+        from src.database.repositories import user_repo, entitlements_repo
+
+        await user_repo.create_user(4, "user", "User")
+        await user_repo.increment_recognize_count(4)
+        await user_repo.increment_recognize_count(4)
+
+        entitlements = await entitlements_repo.get(4)
+        assert entitlements.today_recognitions == 2
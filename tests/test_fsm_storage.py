@@ -0,0 +1,114 @@
+"""Tests for SQLite FSM storage."""
+import pytest
+
+
+def make_key(user_id: int = 1):
+    """Build storage key for a private chat."""
+    from aiogram.fsm.storage.base import StorageKey
+
+    return StorageKey(bot_id=42, chat_id=user_id, user_id=user_id)
+
+
+class TestSQLiteStorage:
+    """Test SQLiteStorage."""
+
+    @pytest.mark.asyncio
+    async def test_state_and_data_persist(self, repo_db):
+        """Test that state and data survive a new storage instance."""
+        from aiogram.fsm.state import State, StatesGroup
+        from src.database.fsm_storage import SQLiteStorage
+
+        class Form(StatesGroup):
+            waiting = State()
+
+        storage = SQLiteStorage()
+        key = make_key()
+        await storage.set_state(key, Form.waiting)
+        await storage.update_data(key, {"query": "музыка"})
+
+        restored = SQLiteStorage()
+        assert await restored.get_state(key) == Form.waiting.state
+        assert await restored.get_data(key) == {"query": "музыка"}
+
+    @pytest.mark.asyncio
+    async def test_clear_removes_row(self, repo_db):
+        """Test that clearing state and data deletes the record."""
+        from src.database.fsm_storage import SQLiteStorage
+
+        storage = SQLiteStorage()
+        key = make_key()
+        await storage.set_state(key, "form:step")
+        await storage.set_data(key, {"a": 1})
+        await storage.set_state(key, None)
+        await storage.set_data(key, {})
+
+        row = await repo_db.fetchone("SELECT COUNT(*) as cnt FROM fsm_storage")
+        assert row["cnt"] == 0
+        assert await storage.get_state(key) is None
+
+    @pytest.mark.asyncio
+    async def test_expired_records(self, repo_db):
+        """Test that expired records are ignored and cleaned up."""
+        from src.database.fsm_storage import SQLiteStorage
+
+        storage = SQLiteStorage(state_ttl=60)
+        key = make_key()
+        await storage.set_state(key, "form:step")
+        await repo_db.execute("UPDATE fsm_storage SET expires_at = 0")
+        await repo_db.commit()
+
+        assert await SQLiteStorage().get_state(key) is None
+        assert await storage.cleanup() == 1
+        assert await storage.get_state(key) is None
+
+    @pytest.mark.asyncio
+    async def test_cached_record_expires(self, repo_db, monkeypatch):
+        """Test that a cached record is not served past its TTL."""
+        import time
+        from src.database.fsm_storage import SQLiteStorage
+
+        storage = SQLiteStorage(state_ttl=60)
+        key = make_key()
+        await storage.set_state(key, "form:step")
+        assert await storage.get_state(key) == "form:step"
+
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 61)
+        assert await storage.get_state(key) is None
+
+    @pytest.mark.asyncio
+    async def test_cache_disabled(self, repo_db):
+        """Test that with cache_size=0 every read sees other writers."""
+        from src.database.fsm_storage import SQLiteStorage
+
+        storage = SQLiteStorage(cache_size=0)
+        key = make_key()
+        await storage.set_state(key, "form:step")
+        await SQLiteStorage(cache_size=0).set_state(key, "form:done")
+
+        assert await storage.get_state(key) == "form:done"
+        assert storage._cache == {}
+
+    @pytest.mark.asyncio
+    async def test_data_is_copied(self, repo_db):
+        """Test that returned data can't mutate stored data."""
+        from src.database.fsm_storage import SQLiteStorage
+
+        storage = SQLiteStorage()
+        key = make_key()
+        await storage.set_data(key, {"a": 1})
+        data = await storage.get_data(key)
+        data["a"] = 2
+
+        assert await storage.get_data(key) == {"a": 1}
+
+    def test_no_cache_with_several_workers(self, monkeypatch):
+        """Test that SQLite storage is not cached when several workers share the database."""
+        from src.config import settings
+        from src.database.fsm_storage import create_fsm_storage
+
+        monkeypatch.setattr(settings, "FSM_STORAGE", "sqlite")
+        monkeypatch.setattr(settings, "BOT_MODE", "webhook")
+        monkeypatch.setattr(settings, "WEBHOOK_WORKERS", 2)
+
+        assert create_fsm_storage().cache_size == 0
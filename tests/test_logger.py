@@ -0,0 +1,54 @@
+"""Tests for logging pipeline."""
+import logging
+
+
+def make_record(name: str, level: int, msg: str = "msg %s", args=(1,)):
+    """Build a log record."""
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class TestSamplingFilter:
+    """Test per-logger sampling."""
+
+    def test_keeps_every_nth_record(self):
+        """Test that sampled logger keeps a share of INFO records."""
+        from src.utils.logger import SamplingFilter, parse_sampling
+
+        sampler = SamplingFilter(parse_sampling("cache=0.1"))
+        kept = sum(
+            sampler.filter(make_record("usp_music_finder.cache", logging.INFO))
+            for _ in range(100)
+        )
+        assert kept == 10
+
+    def test_warnings_and_other_loggers_pass(self):
+        """Test that warnings and unsampled loggers are never dropped."""
+        from src.utils.logger import SamplingFilter
+
+        sampler = SamplingFilter({"usp_music_finder.cache": 0.01})
+        assert all(
+            sampler.filter(make_record("usp_music_finder.cache", logging.WARNING))
+            for _ in range(10)
+        )
+        assert all(
+            sampler.filter(make_record("usp_music_finder", logging.INFO))
+            for _ in range(10)
+        )
+
+
+class TestLazyQueueHandler:
+    """Test queue handler."""
+
+    def test_message_merged_before_queueing(self):
+        """Test that args are merged but the record is not formatted."""
+        import queue
+        from src.utils.logger import LazyQueueHandler
+
+        log_queue = queue.SimpleQueue()
+        handler = LazyQueueHandler(log_queue)
+        handler.setFormatter(logging.Formatter("%(levelname)s | %(message)s"))
+        handler.handle(make_record("usp_music_finder", logging.INFO, "user %s searched", (42,)))
+
+        record = log_queue.get_nowait()
+        assert record.msg == "user 42 searched"
+        assert record.args is None
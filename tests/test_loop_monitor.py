@@ -0,0 +1,53 @@
+"""Tests for event loop lag monitor."""
+import asyncio
+import time
+
+import pytest
+
+
+def block_loop(seconds: float):
+    """Blocking call made from loop thread."""
+    time.sleep(seconds)
+
+
+class TestLoopMonitor:
+    """Test lag measurement and blocking call detection."""
+
+    @pytest.mark.asyncio
+    async def test_detects_blocking_call_site(self):
+        """Test that a stall is sampled with the call site that blocked."""
+        from src.utils.loop_monitor import LoopMonitor
+
+        monitor = LoopMonitor(interval=0.02, threshold=0.05)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            block_loop(0.3)
+            await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+
+        stats = monitor.stats()
+        assert stats["stalls"] >= 1
+        assert stats["lag_max_ms"] >= 200
+        site, count = stats["top_sites"][0]
+        assert site.startswith("tests/test_loop_monitor.py")
+        assert site.endswith("in block_loop")
+        assert monitor.recent()[0][1] == site
+
+    @pytest.mark.asyncio
+    async def test_toggle(self):
+        """Test monitor can be stopped and started again."""
+        from src.utils.loop_monitor import LoopMonitor
+
+        monitor = LoopMonitor(interval=0.01, threshold=0.1)
+        monitor.start()
+        assert monitor.enabled
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+        assert not monitor.enabled
+
+        monitor.start()
+        assert monitor.enabled
+        await monitor.stop()
+        assert monitor.stats()["stalls"] == 0
@@ -0,0 +1,110 @@
+"""Tests for metrics registry and /metrics endpoint."""
+import pytest
+
+
+class TestMetricsRegistry:
+    """Test metric types and text exposition."""
+
+    def test_counter_with_labels(self):
+        """Test that labelled counters render one sample per label set."""
+        from src.utils.metrics import MetricsRegistry
+
+        registry = MetricsRegistry()
+        requests = registry.counter("test_requests_total", "Requests", ["result"])
+        requests.labels("hit").inc()
+        requests.labels("hit").inc()
+        requests.labels("miss").inc(3)
+
+        text = registry.render()
+        assert "# TYPE test_requests_total counter" in text
+        assert 'test_requests_total{result="hit"} 2' in text
+        assert 'test_requests_total{result="miss"} 3' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets, sum and count."""
+        from src.utils.metrics import MetricsRegistry
+
+        registry = MetricsRegistry()
+        latency = registry.histogram("test_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 5.0):
+            latency.observe(value)
+
+        text = registry.render()
+        assert 'test_seconds_bucket{le="0.1"} 1' in text
+        assert 'test_seconds_bucket{le="1"} 3' in text
+        assert 'test_seconds_bucket{le="+Inf"} 4' in text
+        assert "test_seconds_sum 6.25" in text
+        assert "test_seconds_count 4" in text
+
+    def test_timer_and_gauge_function(self):
+        """Test timing a block and gauges read at scrape time."""
+        from src.utils.metrics import MetricsRegistry
+
+        registry = MetricsRegistry()
+        stage = registry.histogram("test_stage_seconds", "Stage", ["stage"])
+        with stage.labels("fetch").time():
+            pass
+        depth = registry.gauge("test_depth", "Depth")
+        depth.set_function(lambda: 7)
+
+        text = registry.render()
+        assert 'test_stage_seconds_count{stage="fetch"} 1' in text
+        assert "test_depth 7" in text
+
+    def test_wrong_labels_and_duplicates_rejected(self):
+        """Test label count and name uniqueness checks."""
+        from src.utils.metrics import MetricsRegistry
+
+        registry = MetricsRegistry()
+        counter = registry.counter("test_total", "Test", ["op"])
+        with pytest.raises(ValueError):
+            counter.labels("a", "b")
+        with pytest.raises(ValueError):
+            registry.counter("test_total", "Test")
+
+
+class TestInstrumentation:
+    """Test that bot components report metrics."""
+
+    def test_cache_hits_and_misses(self):
+        """Test search cache lookups are counted."""
+        from src.utils.cache import SimpleCache
+        from src.utils.metrics import CACHE_REQUESTS
+
+        hits = CACHE_REQUESTS.labels("hit")
+        misses = CACHE_REQUESTS.labels("miss")
+        hits_before, misses_before = hits.value, misses.value
+
+        cache = SimpleCache()
+        cache.set("key", [])
+        cache.get("key")
+        cache.get("missing")
+
+        assert hits.value == hits_before + 1
+        assert misses.value == misses_before + 1
+
+    def test_rate_limit_rejections(self):
+        """Test rejected requests are counted."""
+        from src.utils.metrics import RATE_LIMIT_REJECTIONS
+        from src.utils.rate_limiter import RateLimiter
+
+        before = RATE_LIMIT_REJECTIONS.labels().value
+        limiter = RateLimiter(max_requests=1, time_window=60)
+        limiter.is_allowed(1)
+        limiter.is_allowed(1)
+
+        assert RATE_LIMIT_REJECTIONS.labels().value == before + 1
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self):
+        """Test /metrics serves text exposition."""
+        from aiohttp.test_utils import TestClient, TestServer
+        from src.utils.metrics import create_metrics_app
+
+        async with TestClient(TestServer(create_metrics_app())) as client:
+            response = await client.get("/metrics")
+            text = await response.text()
+
+        assert response.status == 200
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert "musicbot_db_query_duration_seconds" in text
@@ -0,0 +1,137 @@
+"""Tests for versioned schema migrations."""
+import aiosqlite
+import pytest
+
+
+class TestMigrations:
+    """Test migration runner."""
+
+    def test_versions_increase(self):
+        """Test that steps are numbered 1, 2, 3... without gaps."""
+        from src.database.migrations import MIGRATIONS
+
+        assert [step.version for step in MIGRATIONS] == list(range(1, len(MIGRATIONS) + 1))
+
+    @pytest.mark.asyncio
+    async def test_fresh_database(self, tmp_path):
+        """Test that a new database gets the full schema and latest version."""
+        from src.database.migrations import MIGRATIONS, get_version, migrate
+
+        async with aiosqlite.connect(str(tmp_path / "test.db")) as conn:
+            version = await migrate(conn)
+
+            assert version == MIGRATIONS[-1].version
+            assert await get_version(conn) == version
+            cursor = await conn.execute("PRAGMA table_info(users)")
+            columns = [row[1] for row in await cursor.fetchall()]
+            assert {"recognize_count", "language", "reachable", "blocked_at"} <= set(columns)
+
+    @pytest.mark.asyncio
+    async def test_up_to_date_runs_no_ddl(self, tmp_path):
+        """Test that startup on an up to date database only reads the version."""
+        from src.database.migrations import migrate
+
+        path = str(tmp_path / "test.db")
+        async with aiosqlite.connect(path) as conn:
+            await migrate(conn)
+
+        statements = []
+        async with aiosqlite.connect(path) as conn:
+            await conn.set_trace_callback(statements.append)
+            await migrate(conn)
+
+        assert statements == ["PRAGMA user_version"]
+
+    @pytest.mark.asyncio
+    async def test_legacy_database(self, tmp_path):
+        """Test upgrade of a database created before versioning."""
+        from src.database.migrations import MIGRATIONS, migrate
+
+        path = str(tmp_path / "test.db")
+        async with aiosqlite.connect(path) as conn:
+            # Old startup code created the tables and added some of the columns
+            for statement in MIGRATIONS[0].statements:
+                await conn.execute(statement)
+            await conn.execute("ALTER TABLE users ADD COLUMN language TEXT DEFAULT 'ru'")
+            await conn.executemany("INSERT INTO users (id) VALUES (?)", [(i,) for i in range(1, 13)])
+            # User 1 referred 2..12, the odd ones downloaded something
+            await conn.executemany(
+                "INSERT INTO referrals (referrer_id, referred_id) VALUES (1, ?)",
+                [(i,) for i in range(2, 13)]
+            )
+            await conn.executemany(
+                "INSERT INTO downloads (user_id, track_id, title, downloaded_at) VALUES (?, 't', 'T', ?)",
+                [(i, f"2024-01-0{day} 00:00:00") for i in range(3, 13, 2) for day in (2, 1)]
+            )
+            await conn.commit()
+
+            version = await migrate(conn, batch_size=2)
+
+            assert version == MIGRATIONS[-1].version
+            cursor = await conn.execute(
+                "SELECT referred_id, first_download_at FROM referrals WHERE is_active = 1 ORDER BY referred_id"
+            )
+            assert await cursor.fetchall() == [(i, "2024-01-01 00:00:00") for i in range(3, 13, 2)]
+
+    @pytest.mark.asyncio
+    async def test_duplicate_payment_ids(self, tmp_path):
+        """Test that payments logged twice before the unique index keep one external ID."""
+        from src.database.migrations import MIGRATIONS, migrate
+
+        async with aiosqlite.connect(str(tmp_path / "test.db")) as conn:
+            await migrate(conn, MIGRATIONS[:7])
+            await conn.executemany(
+                "INSERT INTO payments (user_id, amount, external_id) VALUES (?, ?, ?)",
+                [(1, 99, "op-1"), (1, 99, "op-1"), (2, 99, "op-2"), (3, 99, None)]
+            )
+            await conn.commit()
+
+            await migrate(conn)
+
+            cursor = await conn.execute("SELECT id, external_id FROM payments ORDER BY id")
+            assert await cursor.fetchall() == [(1, "op-1"), (2, None), (3, "op-2"), (4, None)]
+            with pytest.raises(aiosqlite.IntegrityError):
+                await conn.execute("INSERT INTO payments (user_id, amount, external_id) VALUES (1, 99, 'op-2')")
+
+    @pytest.mark.asyncio
+    async def test_failed_migration_rolls_back(self, tmp_path):
+        """Test that a failing step leaves schema and version untouched."""
+        from src.database.migrations import Migration, get_version, migrate
+
+        migrations = [
+            Migration(1, "ok", statements=("CREATE TABLE a (id INTEGER)",)),
+            Migration(2, "broken", statements=("CREATE TABLE b (id INTEGER", )),
+        ]
+        async with aiosqlite.connect(str(tmp_path / "test.db")) as conn:
+            with pytest.raises(Exception):
+                await migrate(conn, migrations)
+
+            assert await get_version(conn) == 0
+            cursor = await conn.execute("SELECT name FROM sqlite_master WHERE name = 'a'")
+            assert await cursor.fetchone() is None
+
+
+class TestIndexes:
+    """Test that hot queries are served by indexes."""
+
+    QUERIES = {
+        "SELECT track_id FROM downloads WHERE user_id = ? ORDER BY downloaded_at DESC LIMIT 20": "idx_downloads_user_date",
+        "SELECT DISTINCT user_id FROM downloads WHERE track_id = ?": "idx_downloads_track_user",
+        "SELECT artist, COUNT(*) FROM downloads WHERE user_id = ? GROUP BY artist": "idx_downloads_user_artist",
+        "SELECT * FROM favorites WHERE user_id = ? ORDER BY added_at DESC LIMIT 50": "idx_favorites_user_added",
+        "SELECT COUNT(*) FROM users WHERE last_seen > ?": "idx_users_last_seen",
+        "SELECT COUNT(*) FROM users WHERE referred_by = ?": "idx_users_referred_by",
+        "SELECT 1 FROM payments WHERE external_id = ? LIMIT 1": "idx_payments_external_id",
+    }
+
+    @pytest.mark.asyncio
+    async def test_query_plans(self, tmp_path):
+        """Test query plans on a fresh database."""
+        from src.database.migrations import migrate
+
+        async with aiosqlite.connect(str(tmp_path / "test.db")) as conn:
+            await migrate(conn)
+            for query, index in self.QUERIES.items():
+                cursor = await conn.execute(f"EXPLAIN QUERY PLAN {query}", (1,))
+                plan = " ".join(row[3] for row in await cursor.fetchall())
+                assert index in plan, f"{query}: {plan}"
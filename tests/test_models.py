@@ -0,0 +1,86 @@
+"""Tests for track model and cached result pages."""
+import pytest
+
+
+class TestTrack:
+    """Test compact Track."""
+
+    def test_fields(self):
+        """Test precomputed duration and interned artist."""
+        from src.models import Track
+
+        track = Track(id="abc", title="Song", artist="".join(["Art", "ist"]), duration=125.7)
+        other = Track(id="def", title="Other", artist="".join(["Art", "ist"]))
+
+        assert track.duration == 125
+        assert track.formatted_duration == "2:05"
+        assert str(track) == "Artist - Song (2:05)"
+        assert track.artist is other.artist
+        assert Track(id="x", title="t", artist=None, duration=None).artist == "Unknown"
+
+    def test_immutable_and_slotted(self):
+        """Test that tracks can't be changed and have no __dict__."""
+        from dataclasses import FrozenInstanceError
+        from src.models import Track
+
+        track = Track(id="abc", title="Song")
+
+        with pytest.raises(FrozenInstanceError):
+            track.title = "Other"
+        assert not hasattr(track, "__dict__")
+        assert track == Track(id="abc", title="Song")
+
+
+class TestPackTracks:
+    """Test binary result page format."""
+
+    def test_round_trip(self):
+        """Test that a page survives pack/unpack, URLs and unicode included."""
+        from src.models import Track, pack_tracks, unpack_tracks
+
+        tracks = [
+            Track(id="dQw4w9WgXcQ", title="Never Gonna Give You Up", artist="Rick Astley",
+                  duration=213, url="https://youtube.com/watch?v=dQw4w9WgXcQ"),
+            Track(id="v2", title="Кино — Группа крови", artist="Кино", duration=4 * 3600),
+            Track(id="v3", title="Another", artist="Rick Astley", duration=0, url=""),
+        ]
+
+        data = pack_tracks(tracks)
+        restored = unpack_tracks(data)
+
+        assert restored == tracks
+        assert [t.formatted_duration for t in restored] == ["3:33", "240:00", "0:00"]
+        # Watch URL of the id is not stored, artists once per page
+        assert b"youtube.com" not in data
+        assert data.count("Rick Astley".encode()) == 1
+
+    def test_unknown_version(self):
+        """Test that data from another format version is rejected."""
+        from src.models import Track, pack_tracks, unpack_tracks
+
+        data = pack_tracks([Track(id="a", title="b")])
+
+        with pytest.raises(ValueError):
+            unpack_tracks(b"\x09" + data[1:])
+
+
+class TestCachePacking:
+    """Test that the result cache stores pages packed."""
+
+    def test_tracks_packed(self):
+        """Test that track lists are packed and other values kept as is."""
+        from src.models import Track
+        from src.utils.cache import SimpleCache
+
+        cache = SimpleCache()
+        tracks = [Track(id=f"v{i}", title=f"Song {i}", artist="Artist", duration=i) for i in range(20)]
+        cache.set("search:1", tracks)
+        cache.set("query:1", "artist song")
+        cache.set("favorites:1", [{"track_id": "v1"}])
+        cache.set("raw", b"bytes")
+
+        assert isinstance(cache._cache["search:1"][1], bytes)
+        assert cache.get("search:1") == tracks
+        assert cache.get("query:1") == "artist song"
+        assert cache.get("favorites:1") == [{"track_id": "v1"}]
+        assert cache.get("raw") == b"bytes"
@@ -0,0 +1,87 @@
+"""Tests for outbound message pacing."""
+import asyncio
+import time
+
+import pytest
+
+
+class TestOutboundScheduler:
+    """Test OutboundScheduler."""
+
+    @pytest.mark.asyncio
+    async def test_per_chat_pacing(self):
+        """Test that sends to one chat are spread by chat rate."""
+        from src.middlewares.outbound import OutboundScheduler
+
+        scheduler = OutboundScheduler(global_rate=1000, chat_rate=20, chat_burst=1)
+        started = time.monotonic()
+        for _ in range(3):
+            await scheduler.acquire(1)
+
+        # First send is immediate, then 1/20 s apart
+        assert time.monotonic() - started >= 0.09
+        assert scheduler.stats()["sent"] == 3
+
+    @pytest.mark.asyncio
+    async def test_interactive_before_bulk(self):
+        """Test that interactive sends overtake queued bulk sends."""
+        from src.middlewares.outbound import BULK, INTERACTIVE, OutboundScheduler
+
+        scheduler = OutboundScheduler(global_rate=20, chat_rate=1000, chat_burst=1000)
+        # Drain initial burst of the global bucket
+        scheduler._global.tokens = 0
+        order = []
+
+        async def send(chat_id, priority):
+            await scheduler.acquire(chat_id, priority)
+            order.append(priority)
+
+        bulk = [asyncio.create_task(send(i, BULK)) for i in range(3)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(send(100, INTERACTIVE))
+        await asyncio.gather(*bulk, interactive)
+
+        assert order[0] == INTERACTIVE
+
+
+class TestOutboundRateMiddleware:
+    """Test flood control handling."""
+
+    @pytest.mark.asyncio
+    async def test_retries_after_flood_control(self):
+        """Test that TelegramRetryAfter is retried and counted."""
+        from aiogram.exceptions import TelegramRetryAfter
+        from aiogram.methods import SendMessage
+        from src.middlewares.outbound import OutboundRateMiddleware, OutboundScheduler
+
+        scheduler = OutboundScheduler()
+        middleware = OutboundRateMiddleware(scheduler)
+        method = SendMessage(chat_id=1, text="hi")
+        calls = 0
+
+        async def make_request(bot, method):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=0)
+            return "ok"
+
+        assert await middleware(make_request, None, method) == "ok"
+        assert calls == 2
+        assert scheduler.stats()["retry_after"] == 1
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        """Test that persistent flood control is raised to the caller."""
+        from aiogram.exceptions import TelegramRetryAfter
+        from aiogram.methods import SendMessage
+        from src.middlewares.outbound import OutboundRateMiddleware, OutboundScheduler
+
+        middleware = OutboundRateMiddleware(OutboundScheduler(max_retries=1))
+        method = SendMessage(chat_id=1, text="hi")
+
+        async def make_request(bot, method):
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=0)
+
+        with pytest.raises(TelegramRetryAfter):
+            await middleware(make_request, None, method)
@@ -0,0 +1,91 @@
+"""Tests for sampling profiler."""
+import asyncio
+import threading
+
+import pytest
+
+
+def busy_loop(stop: threading.Event):
+    """CPU-bound work to be caught by the profiler."""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestSamplingProfiler:
+    """Test collapsed stack output."""
+
+    @pytest.mark.asyncio
+    async def test_samples_all_threads(self):
+        """Test that work in another thread shows up in collapsed stacks."""
+        from src.utils.profiler import SamplingProfiler, top_functions
+
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,), name="busy worker")
+        worker.start()
+        try:
+            text, samples = await SamplingProfiler(interval=0.005).profile(1)
+        finally:
+            stop.set()
+            worker.join()
+
+        assert samples > 10
+        lines = [line for line in text.splitlines() if line.startswith("busy_worker;")]
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert "busy_loop (test_profiler.py)" in stack
+        assert int(count) > 0
+        assert "busy_loop (test_profiler.py)" in dict(top_functions(text))
+
+    @pytest.mark.asyncio
+    async def test_one_profile_at_a_time(self):
+        """Test that a second concurrent profile is rejected."""
+        from src.utils.profiler import SamplingProfiler
+
+        profiler = SamplingProfiler()
+        first = asyncio.create_task(profiler.profile(1))
+        await asyncio.sleep(0.05)
+        assert profiler.running
+        with pytest.raises(RuntimeError):
+            await profiler.profile(1)
+        await first
+        assert not profiler.running
+
+    @pytest.mark.asyncio
+    async def test_samples_in_own_thread(self):
+        """Test that sampling runs outside the default executor and outlives a cancelled request."""
+        from src.utils.profiler import SamplingProfiler
+
+        profiler = SamplingProfiler()
+        request = asyncio.create_task(profiler.profile(1))
+        await asyncio.sleep(0.05)
+        assert "profiler" in [thread.name for thread in threading.enumerate()]
+
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+        # The sampling thread still runs - no second one until it is done
+        assert profiler.running
+        with pytest.raises(RuntimeError):
+            await profiler.profile(1)
+        while profiler.running:
+            await asyncio.sleep(0.05)
+
+    def test_parse_duration(self):
+        """Test duration argument is clamped."""
+        from src.utils.profiler import MAX_DURATION, parse_duration
+
+        assert parse_duration(None) == 10
+        assert parse_duration("abc") == 10
+        assert parse_duration("0") == 1
+        assert parse_duration("100000") == MAX_DURATION
+
+    @pytest.mark.asyncio
+    async def test_endpoint_requires_token(self):
+        """Test /debug/profile is hidden without DEBUG_TOKEN."""
+        from aiohttp.test_utils import TestClient, TestServer
+        from src.utils.metrics import create_metrics_app
+
+        async with TestClient(TestServer(create_metrics_app())) as client:
+            response = await client.get("/debug/profile?seconds=1")
+
+        assert response.status == 404
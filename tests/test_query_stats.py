@@ -0,0 +1,72 @@
+"""Tests for per-statement DB timing."""
+import pytest
+
+
+@pytest.fixture
+async def temp_db(tmp_path):
+    """Temporary database (not the global one)."""
+    from src.database.connection import Database
+
+    db = Database(str(tmp_path / "test.db"))
+    await db.connect()
+
+    yield db
+
+    await db.disconnect()
+
+
+class TestNormalizeSql:
+    """Test SQL normalization."""
+
+    def test_literals_and_whitespace(self):
+        """Test that statements differing in literals aggregate together."""
+        from src.database.query_stats import normalize_sql
+
+        first = normalize_sql("SELECT *\n  FROM users WHERE id = 5 AND name = 'a'")
+        second = normalize_sql("SELECT * FROM users WHERE id = 42 AND name = 'it''s'")
+        assert first == second == "SELECT * FROM users WHERE id = ? AND name = ?"
+
+    def test_in_lists_collapse(self):
+        """Test IN lists of any length give one statement."""
+        from src.database.query_stats import normalize_sql
+
+        assert normalize_sql("DELETE FROM t WHERE id IN (?, ?, ?)") == "DELETE FROM t WHERE id IN (...)"
+        assert normalize_sql("DELETE FROM t WHERE id IN (1,2)") == "DELETE FROM t WHERE id IN (...)"
+
+
+class TestQueryStats:
+    """Test timing aggregation in Database wrapper."""
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self, temp_db):
+        """Test that no stats are collected unless enabled."""
+        assert temp_db.query_stats is None
+        await temp_db.fetchone("SELECT 1")
+
+    @pytest.mark.asyncio
+    async def test_aggregates_by_statement(self, temp_db):
+        """Test count and times per normalized statement."""
+        temp_db.enable_query_stats(slow_threshold=10)
+        for user_id in range(3):
+            await temp_db.fetchone("SELECT * FROM users WHERE id = ?", (user_id,))
+        await temp_db.fetchall("SELECT id FROM users")
+
+        top = temp_db.query_stats.top(order_by="count")
+        assert top[0]["sql"] == "SELECT * FROM users WHERE id = ?"
+        assert top[0]["count"] == 3
+        assert top[0]["p95_ms"] >= 0
+        assert temp_db.query_stats.slow_count == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_query_captures_plan(self, temp_db):
+        """Test slow statements get their query plan, once."""
+        temp_db.enable_query_stats(slow_threshold=0)
+        await temp_db.fetchall("SELECT * FROM downloads WHERE title = ?", ("x",))
+        await temp_db.fetchall("SELECT * FROM downloads WHERE title = ?", ("y",))
+
+        row = temp_db.query_stats.top()[0]
+        assert any("SCAN" in step for step in row["plan"])
+        assert temp_db.query_stats.slow_count == 2
+
+        temp_db.disable_query_stats()
+        assert temp_db.query_stats is None
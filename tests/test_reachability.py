@@ -0,0 +1,61 @@
+"""Tests for user reachability tracking."""
+import pytest
+
+
+class TestReachability:
+    """Test reachable/blocked user state."""
+
+    @pytest.mark.asyncio
+    async def test_mark_and_stream(self, repo_db):
+        """Test that unreachable users are excluded from streaming."""
+        from src.database.repositories import user_repo
+
+        for user_id in range(1, 6):
+            await user_repo.create_user(user_id, f"u{user_id}", "U")
+        await user_repo.mark_unreachable(2)
+        await user_repo.mark_unreachable(4)
+
+        ids = [user_id async for user_id in user_repo.iter_reachable_user_ids(batch_size=2)]
+        assert ids == [1, 3, 5]
+
+        stats = await user_repo.get_reachability_stats()
+        assert (stats["total"], stats["reachable"], stats["unreachable"]) == (5, 3, 2)
+        assert stats["blocked_day"] == 2
+        assert await user_repo.get_reachable_count() == 3
+
+    @pytest.mark.asyncio
+    async def test_activity_makes_user_reachable(self, repo_db):
+        """Test that a returning user becomes reachable again."""
+        from src.database.repositories import user_repo
+        from src.middlewares.user_activity import UserActivityTracker
+
+        await user_repo.create_user(1, "u1", "U")
+        await user_repo.mark_unreachable(1)
+
+        tracker = UserActivityTracker()
+        tracker.touch(1, "u1", "U")
+        await tracker.flush()
+
+        user = await user_repo.get_user(1)
+        assert user["reachable"] == 1
+        assert user["blocked_at"] is None
+
+    @pytest.mark.asyncio
+    async def test_forbidden_reply_marks_user(self, repo_db):
+        """Test that 403 on an interactive send marks the user."""
+        from aiogram.exceptions import TelegramForbiddenError
+        from aiogram.methods import SendMessage
+        from src.database.repositories import user_repo
+        from src.middlewares.outbound import OutboundRateMiddleware, OutboundScheduler
+
+        await user_repo.create_user(7, "u7", "U")
+        middleware = OutboundRateMiddleware(OutboundScheduler(), on_forbidden=user_repo.mark_unreachable)
+        method = SendMessage(chat_id=7, text="hi")
+
+        async def make_request(bot, method):
+            raise TelegramForbiddenError(method=method, message="Forbidden: bot was blocked by the user")
+
+        with pytest.raises(TelegramForbiddenError):
+            await middleware(make_request, None, method)
+
+        assert await user_repo.get_reachable_count() == 0
@@ -0,0 +1,59 @@
+"""Tests for startup timing and deferred imports."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+class TestStartupTimer:
+    """Test startup phase report."""
+
+    def test_report(self):
+        """Test that phases and untimed rest add up to the total."""
+        from src.utils.startup import StartupTimer
+
+        now = [0.0]
+        timer = StartupTimer(clock=lambda: now[0])
+        with timer.phase("import aiogram"):
+            now[0] += 0.5
+        with timer.phase("database"):
+            now[0] += 0.1
+        now[0] += 0.2
+
+        report = timer.report()
+
+        assert timer.phases == [("import aiogram", 0.5), ("database", pytest.approx(0.1))]
+        assert report.splitlines()[0] == "Startup took 800 ms:"
+        assert "import aiogram" in report and "<- slowest" in report.splitlines()[1]
+        assert "other" in report.splitlines()[-1]
+
+    @pytest.mark.asyncio
+    async def test_preload(self):
+        """Test that preload skips loaded modules."""
+        from src.utils.startup import preload
+
+        sys.modules.pop("colorsys", None)
+
+        assert await preload(("json", "colorsys")) == ["colorsys"]
+        assert await preload(("colorsys",)) == []
+
+    def test_import_has_no_side_effects(self, tmp_path):
+        """Test that importing the bot loads no heavy modules and creates no directories."""
+        env = {
+            **os.environ,
+            "BOT_TOKEN": "123456:TEST",
+            "TEMP_DIR": str(tmp_path / "temp"),
+            "CACHE_DIR": str(tmp_path / "cache"),
+            "LOGS_DIR": str(tmp_path / "logs"),
+        }
+        code = "import sys, src.main; print(sorted(m for m in ('yt_dlp', 'sentry_sdk') if m in sys.modules))"
+        result = subprocess.run(
+            [sys.executable, "-c", code], env=env, capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == "[]"
+        assert not (tmp_path / "temp").exists()
+        assert not (tmp_path / "cache").exists()
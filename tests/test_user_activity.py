@@ -0,0 +1,98 @@
+"""Tests for batched user activity tracking."""
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+
+class TestUserActivityTracker:
+    """Test batched user upserts."""
+
+    @pytest.mark.asyncio
+    async def test_flush_creates_and_updates_users(self, repo_db):
+        """Test that one flush creates new users and updates existing ones."""
+        from src.middlewares.user_activity import UserActivityTracker
+
+        tracker = UserActivityTracker()
+        tracker.touch(1, "first", "First")
+        tracker.touch(2, "second", "Second")
+        assert await tracker.flush() == 2
+
+        tracker.touch(1, "renamed", "First")
+        assert await tracker.flush() == 1
+        assert tracker.pending_count == 0
+
+        rows = await repo_db.fetchall("SELECT id, username, referral_code FROM users ORDER BY id")
+        assert [row["id"] for row in rows] == [1, 2]
+        assert rows[0]["username"] == "renamed"
+        assert rows[0]["referral_code"]
+
+    @pytest.mark.asyncio
+    async def test_block_survives_pending_activity(self, repo_db, monkeypatch):
+        """Test that a 403 after recording activity is not undone by the next flush."""
+        from src.database.repositories import user_repo
+        from src.middlewares.user_activity import UserActivityTracker
+
+        tracker = UserActivityTracker()
+        # The package exports the instances under the module names
+        monkeypatch.setattr(sys.modules["src.database.repositories.user_repo"], "user_activity", tracker)
+        await user_repo.create_user(1, "user", "User")
+
+        tracker.touch(1, "user", "User")
+        await user_repo.mark_unreachable(1)
+        await tracker.flush()
+
+        row = await repo_db.fetchone("SELECT reachable, blocked_at FROM users WHERE id = 1")
+        assert row["reachable"] == 0
+        assert row["blocked_at"] is not None
+
+    @pytest.mark.asyncio
+    async def test_empty_flush(self, repo_db):
+        """Test that flushing nothing does not touch the database."""
+        from src.middlewares.user_activity import UserActivityTracker
+
+        tracker = UserActivityTracker()
+        assert await tracker.flush() == 0
+
+
+class TestUserActivityMiddleware:
+    """Test the update middleware."""
+
+    @pytest.mark.asyncio
+    async def test_records_user(self):
+        """Test that regular updates mark the user as seen."""
+        from src.middlewares.user_activity import UserActivityMiddleware, UserActivityTracker
+
+        tracker = UserActivityTracker()
+        middleware = UserActivityMiddleware(tracker)
+        user = MagicMock(id=7, username="u", first_name="U", is_bot=False)
+        handler = AsyncMock(return_value="ok")
+
+        result = await middleware(handler, MagicMock(), {"event_from_user": user})
+
+        assert result == "ok"
+        assert tracker.pending_count == 1
+
+    @pytest.mark.asyncio
+    async def test_skips_start_command(self):
+        """Test that /start is left to the start handler."""
+        from aiogram.types import Update
+        from src.middlewares.user_activity import UserActivityMiddleware, UserActivityTracker
+
+        tracker = UserActivityTracker()
+        middleware = UserActivityMiddleware(tracker)
+        update = Update.model_validate({
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "date": 0,
+                "chat": {"id": 7, "type": "private"},
+                "from": {"id": 7, "is_bot": False, "first_name": "U"},
+                "text": "/start ref_1",
+            },
+        })
+        user = update.message.from_user
+
+        await middleware(AsyncMock(), update, {"event_from_user": user})
+
+        assert tracker.pending_count == 0
@@ -0,0 +1,203 @@
+"""Tests for webhook server routes."""
+import asyncio
+import hashlib
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def yoomoney_secret(monkeypatch):
+    """Configure the YooMoney notification secret."""
+    from src.payments.yoomoney import yoomoney
+
+    monkeypatch.setattr(yoomoney, "secret_key", SECRET)
+    return SECRET
+
+
+def sign(data: dict, secret: str = SECRET) -> dict:
+    """Add sha1_hash the way YooMoney signs notifications."""
+    fields = ("notification_type", "operation_id", "amount", "currency", "datetime", "sender", "codepro")
+    hash_string = "&".join([*(data.get(name, "") for name in fields), secret, data.get("label", "")])
+    return {**data, "sha1_hash": hashlib.sha1(hash_string.encode()).hexdigest()}
+
+
+def make_app():
+    from aiohttp import web
+    from src.webhook import BOT_KEY, YOOMONEY_PATH, yoomoney_notification
+
+    app = web.Application()
+    app[BOT_KEY] = MagicMock(send_message=AsyncMock())
+    app.router.add_post(YOOMONEY_PATH, yoomoney_notification)
+    return app
+
+
+NOTIFICATION = {
+    "notification_type": "card-incoming",
+    "operation_id": "op-1",
+    "amount": "96.03",
+    "withdraw_amount": "99.00",
+    "currency": "643",
+    "label": "premium_month_1_555",
+}
+
+
+class TestYooMoneyNotification:
+    """Test YooMoney notification endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_grants_premium_once(self, repo_db, yoomoney_secret):
+        """Test that repeated notifications grant premium only once."""
+        from aiohttp.test_utils import TestClient, TestServer
+        from src.database.repositories import user_repo
+        from src.webhook import BOT_KEY, YOOMONEY_PATH
+
+        await user_repo.create_user(555, "buyer", "Buyer")
+        app = make_app()
+
+        async with TestClient(TestServer(app)) as client:
+            for _ in range(2):
+                response = await client.post(YOOMONEY_PATH, data=sign(NOTIFICATION))
+                assert response.status == 200
+
+        assert await user_repo.is_premium(555)
+        row = await repo_db.fetchone("SELECT COUNT(*) as cnt FROM payments WHERE external_id = 'op-1'")
+        assert row["cnt"] == 1
+        app[BOT_KEY].send_message.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_extend_once(self, repo_db, yoomoney_secret, monkeypatch):
+        """Test that notifications arriving together extend premium only once."""
+        from aiohttp.test_utils import TestClient, TestServer
+        from src.database.repositories import user_repo
+        from src.webhook import YOOMONEY_PATH
+
+        await user_repo.create_user(555, "buyer", "Buyer")
+        extend_premium = AsyncMock(wraps=user_repo.extend_premium)
+        monkeypatch.setattr(user_repo, "extend_premium", extend_premium)
+
+        async with TestClient(TestServer(make_app())) as client:
+            responses = await asyncio.gather(*(
+                client.post(YOOMONEY_PATH, data=sign(NOTIFICATION)) for _ in range(5)
+            ))
+
+        assert [response.status for response in responses] == [200] * 5
+        extend_premium.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_underpaid_is_ignored(self, repo_db, yoomoney_secret):
+        """Test that payment below tariff price does not grant premium."""
+        from aiohttp.test_utils import TestClient, TestServer
+        from src.database.repositories import user_repo
+        from src.webhook import YOOMONEY_PATH
+
+        await user_repo.create_user(556, "buyer", "Buyer")
+
+        async with TestClient(TestServer(make_app())) as client:
+            response = await client.post(YOOMONEY_PATH, data=sign({
+                "operation_id": "op-2",
+                "withdraw_amount": "1.00",
+                "label": "premium_year_556",
+            }))
+            assert response.status == 200
+
+        assert not await user_repo.is_premium(556)
+
+    @pytest.mark.asyncio
+    async def test_invalid_signature_rejected(self, repo_db, yoomoney_secret):
+        """Test that a notification signed with another secret is rejected."""
+        from aiohttp.test_utils import TestClient, TestServer
+        from src.database.repositories import user_repo
+        from src.webhook import YOOMONEY_PATH
+
+        await user_repo.create_user(555, "buyer", "Buyer")
+
+        async with TestClient(TestServer(make_app())) as client:
+            response = await client.post(YOOMONEY_PATH, data=sign(NOTIFICATION, "forged"))
+            assert response.status == 400
+
+        assert not await user_repo.is_premium(555)
+
+    @pytest.mark.asyncio
+    async def test_refused_without_secret(self, repo_db, monkeypatch):
+        """Test that notifications are refused when no secret is configured."""
+        from aiohttp.test_utils import TestClient, TestServer
+        from src.database.repositories import user_repo
+        from src.payments.yoomoney import yoomoney
+        from src.webhook import YOOMONEY_PATH
+
+        monkeypatch.setattr(yoomoney, "secret_key", "")
+        await user_repo.create_user(555, "buyer", "Buyer")
+
+        async with TestClient(TestServer(make_app())) as client:
+            response = await client.post(YOOMONEY_PATH, data=NOTIFICATION)
+            assert response.status == 403
+
+        assert not await user_repo.is_premium(555)
+
+    def test_route_not_registered_without_secret(self, monkeypatch):
+        """Test that create_app leaves the notification route out without a secret."""
+        from src.payments.yoomoney import yoomoney
+        from src.webhook import YOOMONEY_PATH, create_app
+
+        monkeypatch.setattr(yoomoney, "secret_key", "")
+        monkeypatch.setattr("src.webhook.SimpleRequestHandler", MagicMock())
+        monkeypatch.setattr("src.webhook.setup_application", MagicMock())
+        app = create_app(MagicMock(), MagicMock())
+
+        paths = {resource.canonical for resource in app.router.resources()}
+        assert YOOMONEY_PATH not in paths
+
+    def test_metrics_not_public(self, monkeypatch):
+        """Test that the webhook app does not expose /metrics."""
+        from src.webhook import create_app
+
+        monkeypatch.setattr("src.webhook.SimpleRequestHandler", MagicMock())
+        monkeypatch.setattr("src.webhook.setup_application", MagicMock())
+        app = create_app(MagicMock(), MagicMock())
+
+        paths = {resource.canonical for resource in app.router.resources()}
+        assert "/metrics" not in paths
+
+
+class TestWorkers:
+    """Test multi-worker startup checks."""
+
+    @pytest.fixture
+    def webhook_settings(self, monkeypatch):
+        from src.config import settings
+
+        monkeypatch.setattr(settings, "BOT_MODE", "webhook")
+        monkeypatch.setattr(settings, "FSM_STORAGE", "sqlite")
+        monkeypatch.setattr(settings, "WEBHOOK_WORKERS", 1)
+        monkeypatch.setattr(settings, "WORKER_ID", 0)
+        return settings
+
+    def test_single_worker(self, webhook_settings):
+        """Test that one worker starts with the default storage."""
+        from src.webhook import check_workers
+
+        check_workers()
+        assert webhook_settings.get_worker_count() == 1
+
+    def test_several_workers_require_redis(self, webhook_settings):
+        """Test that several workers refuse the per-process SQLite FSM cache."""
+        from src.webhook import check_workers
+
+        webhook_settings.WEBHOOK_WORKERS = 2
+        webhook_settings.WORKER_ID = 1
+        with pytest.raises(ValueError):
+            check_workers()
+
+        webhook_settings.FSM_STORAGE = "redis"
+        check_workers()
+
+    def test_worker_id_in_range(self, webhook_settings):
+        """Test that a worker ID beyond WEBHOOK_WORKERS is refused."""
+        from src.webhook import check_workers
+
+        webhook_settings.WORKER_ID = 1
+        with pytest.raises(ValueError):
+            check_workers()